@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+
+# (C) Copyright 1996-2018 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+"""
+
+Benchmark of the per-class statistics of a set of simulations
+(KResultsDataSet.retrieve_common_job_classes and calculate_class_stats_sums),
+against the job-by-job implementation, for synthetic jobs.
+
+> bench_class_stats.py --n-sims 4 --n-jobs 5000 --n-procs 16 --n-classes 20
+
+"""
+
+import argparse
+import contextlib
+import io
+import math
+import random
+import time
+
+from kronos_executor.io_formats.definitions import kresults_stats_info
+from kronos_executor.io_formats.format_data_handlers.kresults_data import KResultsData, KResultsDataSet
+from kronos_executor.io_formats.format_data_handlers.kresults_decorator import KResultsDecorator
+from kronos_executor.io_formats.format_data_handlers.kresults_job import KResultsJob
+
+
+def synthetic_sim(name, n_jobs, n_procs, n_workloads, rng):
+
+    def rank_stats():
+        return {metric: {field: rng.random() * 1.0e6 for field in info["to_sum"]}
+                for metric, info in kresults_stats_info.items() if rng.random() < 0.8}
+
+    jobs = []
+    for i_job in range(n_jobs):
+        kresults_json_data = {"created": "2017-07-31T01:28:42+00:00",
+                              "ranks": [{"stats": rank_stats(), "time_series": {"durations": [1.0], "flops": [1]}}
+                                        for _ in range(n_procs)]}
+        decor_data = KResultsDecorator(workload_name="workload_{}/parallel".format(rng.randrange(n_workloads)),
+                                       job_name="job_{}".format(i_job))
+        jobs.append(KResultsJob(kresults_json_data, decorator_data=decor_data))
+
+    return KResultsData(jobs=jobs, sim_name=name)
+
+
+def legacy_common_job_classes(sims, class_dict):
+    """
+    Regex scan of all the jobs of all the simulations for each class (previous implementation)
+    """
+    return {class_name: class_regex for class_name, class_regex in class_dict.items()
+            if all(any([job.is_in_class(class_regex) for job in sim.jobs]) for sim in sims)}
+
+
+def legacy_class_stats_sums(sim, job_classes):
+    """
+    Job-by-job sums (previous implementation, without the rates)
+    """
+
+    per_class_stats = {}
+    for job in sim.jobs:
+        for class_name in job.get_class_name(job_classes):
+            per_class_stats.setdefault(class_name, []).append(job.get_stats())
+
+    per_class_stats_sums = {}
+    for class_name, stats_list in per_class_stats.items():
+        sums = {stat_metric: {field: 0.0 for field in info["to_sum"]} for stat_metric, info in kresults_stats_info.items()}
+        for job_stats in stats_list:
+            for stat_entry in job_stats:
+                for stat_metric in stat_entry.keys():
+                    for field in kresults_stats_info[stat_metric]["to_sum"]:
+                        if field in kresults_stats_info[stat_metric].get("per_process", []):
+                            val = float(stat_entry[stat_metric][field]) / float(len(job_stats))
+                        else:
+                            val = float(stat_entry[stat_metric][field])
+                        sums[stat_metric][field] += val
+        per_class_stats_sums[class_name] = sums
+
+    return per_class_stats_sums
+
+
+def timed(func, *args):
+    t_start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        res = func(*args)
+    return res, time.perf_counter() - t_start
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--n-sims", type=int, default=4)
+    parser.add_argument("--n-jobs", type=int, default=2000)
+    parser.add_argument("--n-procs", type=int, default=16)
+    parser.add_argument("--n-classes", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    sims = [synthetic_sim("sim_{}".format(i), args.n_jobs, args.n_procs, args.n_classes, rng) for i in range(args.n_sims)]
+    job_classes = {"class_{}".format(i): "workload_{}/.*".format(i) for i in range(args.n_classes)}
+    job_classes["missing"] = "no_workload/.*"
+
+    legacy_classes, t_legacy_classes = timed(legacy_common_job_classes, sims, job_classes)
+    legacy_sums, t_legacy_sums = timed(lambda: {sim.name: legacy_class_stats_sums(sim, legacy_classes) for sim in sims})
+
+    sim_set = KResultsDataSet(sims)
+    common_classes, t_classes = timed(sim_set.retrieve_common_job_classes, job_classes)
+    _, t_sums = timed(sim_set.calculate_class_stats_sums, common_classes)
+
+    assert common_classes == legacy_classes, "common classes differ"
+    for sim_name, class_sums in legacy_sums.items():
+        for class_name, sums in class_sums.items():
+            for stat_metric, fields in sums.items():
+                for field, val in fields.items():
+                    calc = sim_set.class_stats_sums[sim_name][class_name].get(stat_metric, {}).get(field, 0.0)
+                    assert math.isclose(calc, val, rel_tol=1.0e-12), "class stats differ"
+
+    print("sims: {}  jobs: {}  procs: {}  classes: {}".format(args.n_sims, args.n_jobs, args.n_procs, len(job_classes)))
+    print("common job classes: {:8.3f} s (legacy {:8.3f} s)".format(t_classes, t_legacy_classes))
+    print("class stats sums:   {:8.3f} s (legacy {:8.3f} s)".format(t_sums, t_legacy_sums))
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+# (C) Copyright 1996-2018 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+"""
+
+Load benchmark of the Kronos event dispatchers.
+
+Many concurrent clients send "Complete" events to the dispatcher, the benchmark
+reports the throughput (events/s) and the latency between the moment an event is sent
+and the moment it is stored in the dispatcher queue (p50/p99).
+
+> bench_event_dispatcher.py --mode asyncio --n-clients 64 --n-events 20000 --events-per-connection 100
+
+"""
+
+import argparse
+import json
+import multiprocessing
+import socket
+import time
+
+import numpy as np
+
+from kronos_executor.kronos_events.dispatcher import dispatcher_types
+
+
+def send_events(server_address, first_job, n_events, events_per_connection):
+    """
+    Send n_events events, events_per_connection events on each connection
+    """
+
+    for i_start in range(first_job, first_job + n_events, events_per_connection):
+        i_end = min(i_start + events_per_connection, first_job + n_events)
+        with socket.create_connection(server_address) as sock:
+            for job in range(i_start, i_end):
+                msg = {"info": {"job": job, "app": "bench", "timestamp": time.time()},
+                       "type": "Complete",
+                       "token": "bench"}
+                sock.sendall((json.dumps(msg) + "\n").encode('ascii'))
+
+
+def run_benchmark(mode, n_clients, n_events, events_per_connection):
+
+    dispatcher = dispatcher_types[mode](multiprocessing.Queue(),
+                                        server_host='localhost',
+                                        server_port=0,
+                                        sim_token="bench")
+    server_address = dispatcher.sock.getsockname()
+    dispatcher.start()
+
+    events_per_client = n_events // n_clients
+    clients = [multiprocessing.Process(target=send_events,
+                                       args=(server_address, c * events_per_client, events_per_client, events_per_connection))
+               for c in range(n_clients)]
+
+    t_start = time.time()
+    for c in clients:
+        c.start()
+
+    latencies = []
+    t_last = t_start
+    for _ in range(events_per_client * n_clients):
+        msg, t_queue = dispatcher.listener_queue.get()
+        latencies.append(t_queue - json.loads(msg)["info"]["timestamp"])
+        t_last = max(t_last, t_queue)
+
+    for c in clients:
+        c.join()
+
+    dispatcher.stop()
+
+    latencies = np.asarray(latencies)
+    print("mode: {:8s} clients: {:5d} events: {:8d} events/conn: {:5d}".format(
+        mode, n_clients, latencies.size, events_per_connection))
+    print("    throughput  : {:12.1f} events/s".format(latencies.size / (t_last - t_start)))
+    print("    latency p50 : {:12.3f} ms".format(np.percentile(latencies, 50) * 1000))
+    print("    latency p99 : {:12.3f} ms".format(np.percentile(latencies, 99) * 1000))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--mode", choices=list(dispatcher_types.keys()), default="asyncio")
+    parser.add_argument("--n-clients", type=int, default=32)
+    parser.add_argument("--n-events", type=int, default=10000)
+    parser.add_argument("--events-per-connection", type=int, default=1,
+                        help="Events sent on each connection (must be 1 for the socket dispatcher)")
+    args = parser.parse_args()
+
+    if args.mode == "socket" and args.events_per_connection != 1:
+        parser.error("the socket dispatcher only accepts one event per connection")
+
+    run_benchmark(args.mode, args.n_clients, args.n_events, args.events_per_connection)
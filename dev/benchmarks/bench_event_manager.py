@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+
+# (C) Copyright 1996-2018 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+"""
+
+Micro-benchmark of the hand-over of events from the event manager to the executor
+(Manager.get_latest_events), on synthetic "Complete" events.
+
+The dispatcher is fed from memory, so that only the cost of the manager is measured.
+The cost of deep-copying each batch (the former behaviour) is reported for reference.
+
+> bench_event_manager.py --n-events 1000000 --batch-size 10 --history-size 10000
+
+"""
+
+import argparse
+import copy
+import logging
+import time
+import tracemalloc
+
+from kronos_executor.kronos_events import EventFactory
+from kronos_executor.kronos_events.manager import Manager
+
+
+def synthetic_batches(n_events, batch_size):
+    """
+    Batches of synthetic 'Complete' events
+    """
+
+    events = [EventFactory.from_dictionary({"type": "Complete",
+                                            "info": {"app": "kronos-synapp", "job": i, "timestamp": float(i)}})
+              for i in range(n_events)]
+
+    return [events[i:i+batch_size] for i in range(0, n_events, batch_size)]
+
+
+def run_manager(manager, batches):
+    """
+    Hand over all the batches through the manager
+    """
+
+    batches_iter = iter(batches)
+    manager.dispatcher.get_events_batch = lambda batch_size=1, timeout=0.0: (False, next(batches_iter))
+
+    n_events = 0
+    for _ in range(len(batches)):
+        n_events += len(manager.get_latest_events(batch_size=len(batches[0])))
+
+    return n_events
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--n-events", type=int, default=1000000)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--history-size", type=int, default=None,
+                        help="Max number of events stored by the manager (default: unbounded)")
+    parser.add_argument("--log-events", action="store_true",
+                        help="Keep the per-event logging enabled")
+    args = parser.parse_args()
+
+    if not args.log_events:
+        logging.getLogger("kronos_executor.kronos_events.manager").setLevel(logging.WARNING)
+
+    batches = synthetic_batches(args.n_events, args.batch_size)
+
+    manager = Manager(server_port=0, max_stored_events=args.history_size)
+    manager.stop_dispatcher()
+
+    tracemalloc.start()
+    mem_0 = tracemalloc.get_traced_memory()[0]
+    t_start = time.perf_counter()
+    n_events = run_manager(manager, batches)
+    t_manager = time.perf_counter() - t_start
+    mem_history = tracemalloc.get_traced_memory()[0] - mem_0
+    tracemalloc.stop()
+
+    t_start = time.perf_counter()
+    for batch in batches:
+        copy.deepcopy(batch)
+    t_deepcopy = time.perf_counter() - t_start
+
+    print("events: {:10d}  batch size: {:5d}  history size: {}".format(n_events, args.batch_size, args.history_size))
+    print("    get_latest_events : {:10.3f} s ({:10.1f} events/s)".format(t_manager, n_events / t_manager))
+    print("    deepcopy (former) : {:10.3f} s".format(t_deepcopy))
+    print("    history memory    : {:10.1f} MiB".format(mem_history / 2.0 ** 20))
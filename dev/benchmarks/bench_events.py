@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+# (C) Copyright 1996-2018 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+"""
+
+Parse and match throughput of the Kronos events.
+
+ - parse: EventFactory.from_string on the messages sent by the synthetic apps
+          (NUL-terminated) and by kronos-notify (newline-terminated)
+ - match: lookup of the events in a dependency tree (as done by the events executor)
+
+Run it on two revisions to compare them.
+
+> bench_events.py --n-events 200000
+
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from kronos_executor.kronos_events import EventFactory
+
+
+def synapp_message(job):
+    msg = {"type": "Complete", "info": {"app": "kronos-synapp", "job": str(job), "timestamp": 1600000000.0 + job},
+           "token": "abcd"}
+    return json.dumps(msg, separators=(",", ":")).encode("ascii") + b"\0"
+
+
+def notify_message(job):
+    msg = {"info": {"job": str(job), "app": "kronos-synapp"}, "type": "Complete", "token": "abcd"}
+    return (json.dumps(msg) + "\n").encode("ascii")
+
+
+def bench_parse(messages):
+    t_start = time.perf_counter()
+    events = [EventFactory.from_string(msg) for msg in messages]
+    return events, time.perf_counter() - t_start
+
+
+def bench_match(events):
+
+    # one job depending on each event
+    deps = [EventFactory.from_dictionary({"type": "Complete", "info": {"app": "kronos-synapp", "job": i}})
+            for i in range(len(events))]
+
+    t_start = time.perf_counter()
+    deps_tree = {}
+    for i, d in enumerate(deps):
+        deps_tree.setdefault(d.get_hashed(), []).append(i)
+    t_tree = time.perf_counter() - t_start
+
+    t_start = time.perf_counter()
+    n_matched = 0
+    for ev in events:
+        if deps_tree.get(ev.get_hashed()):
+            n_matched += 1
+    t_match = time.perf_counter() - t_start
+
+    assert n_matched == len(events)
+
+    return t_tree, t_match
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--n-events", type=int, default=200000)
+    args = parser.parse_args()
+
+    for name, make_message in [("synapp", synapp_message), ("kronos-notify", notify_message)]:
+
+        messages = [make_message(i) for i in range(args.n_events)]
+
+        events, t_parse = bench_parse(messages)
+
+        # memory footprint of the events (measured separately, tracemalloc slows down parsing)
+        del events
+        tracemalloc.start()
+        events, _ = bench_parse(messages)
+        mem_events = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        t_tree, t_match = bench_match(events)
+
+        print("{} messages: {}".format(name, args.n_events))
+        print("    parse      : {:10.3f} s ({:10.1f} events/s)".format(t_parse, args.n_events / t_parse))
+        print("    deps tree  : {:10.3f} s".format(t_tree))
+        print("    match      : {:10.3f} s ({:10.1f} events/s)".format(t_match, args.n_events / t_match))
+        print("    memory     : {:10.1f} B/event".format(mem_events / float(args.n_events)))
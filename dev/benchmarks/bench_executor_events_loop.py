@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+
+# (C) Copyright 1996-2018 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+"""
+
+Scaling benchmark of the main loop of the events executor (ExecutorEventsPar.do_run).
+
+Synthetic schedules of chained jobs are "executed" against an in-memory event manager
+(no network, no real submission): every submitted job completes straight away and its
+"Complete" event is delivered in the next batch. The average cost of a submission cycle
+should not depend on the number of jobs in the schedule.
+
+> bench_executor_events_loop.py --n-jobs 1000 10000 100000
+
+"""
+
+import argparse
+import logging
+import time
+from collections import deque
+
+from kronos_executor.executor_events_par import ExecutorEventsPar
+from kronos_executor.kronos_events import EventFactory
+
+
+class SyntheticJob(object):
+
+    def __init__(self, job_id, depends):
+        self.id = job_id
+        self.depends = [EventFactory.from_dictionary(d) for d in depends]
+        self.is_job_timed = False
+
+
+class InMemoryManager(object):
+    """
+    Event manager whose events are the completions of the submitted jobs
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.pending = deque()
+        self.n_events = 0
+        self.n_cycles = 0
+
+    def add_time_event(self, timestamp):
+        pass
+
+    def get_latest_events(self, batch_size=1, timeout=0.0):
+        self.n_cycles += 1
+        batch = [self.pending.popleft() for _ in range(min(batch_size, len(self.pending)))]
+        self.n_events += len(batch)
+        return batch
+
+    def get_total_n_events(self):
+        return self.n_events
+
+
+class InstantSubmitter(object):
+    """
+    Submitter that completes the jobs straight away
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    def submit_async(self, jobs, deps=None):
+        for j in jobs:
+            self.manager.pending.append(EventFactory.from_dictionary(
+                {"type": "Complete", "info": {"app": "kronos-synapp", "job": j.id}}))
+
+    def poll(self, timeout=0.0):
+        return []
+
+    def n_outstanding(self):
+        return 0
+
+    def get_wait_time(self):
+        return None
+
+
+def synthetic_executor(n_jobs, n_chains, batch_size):
+    """
+    An events executor running n_jobs jobs, organised in n_chains independent chains
+    """
+
+    executor = ExecutorEventsPar.__new__(ExecutorEventsPar)
+
+    executor.jobs = []
+    for i in range(n_jobs):
+        deps = [] if i < n_chains else [{"type": "Complete", "info": {"app": "kronos-synapp", "job": i - n_chains}}]
+        executor.jobs.append(SyntheticJob(str(i), deps))
+
+    executor.event_batch_size = batch_size
+    executor.event_manager = InMemoryManager(batch_size)
+    executor.job_submitter = InstantSubmitter(executor.event_manager)
+    executor.initial_submission_time = None
+    executor.dag_scheduler = executor.build_dag_scheduler()
+
+    return executor
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--n-jobs", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--n-chains", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=10)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    for n_jobs in args.n_jobs:
+
+        executor = synthetic_executor(n_jobs, args.n_chains, args.batch_size)
+
+        t_start = time.perf_counter()
+        executor.do_run()
+        t_run = time.perf_counter() - t_start
+
+        n_cycles = executor.event_manager.n_cycles
+        print("jobs: {:8d}  cycles: {:8d}  total: {:10.3f} s  per cycle: {:10.2f} us".format(
+            n_jobs, n_cycles, t_run, t_run / n_cycles * 1e6))
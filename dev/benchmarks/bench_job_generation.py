@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+# (C) Copyright 1996-2018 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+"""
+
+Benchmark of the generation of the job scripts (Executor.generate_job_internals),
+for a schedule of synthetic-app jobs, with an increasing number of setup workers.
+
+The output directory should be on the file system of interest (e.g. a shared one),
+as creating the job directories and writing the scripts dominates on those.
+
+> bench_job_generation.py --n-jobs 5000 --workers 1 8 32 --output-dir /path/to/scratch
+
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from kronos_executor.executor import Executor
+from kronos_executor.io_formats.schedule_format import ScheduleFormat
+
+
+def synthetic_schedule(n_jobs):
+    job = {"job_class": "synapp", "num_procs": 4, "frames": [[{"name": "cpu", "kernel": "cpu", "frames": 10}]]}
+    return ScheduleFormat(sa_data_json=[dict(job) for _ in range(n_jobs)])
+
+
+def bench_generation(n_jobs, n_workers, output_dir):
+
+    run_dir = tempfile.mkdtemp(dir=output_dir)
+    config = {
+        'procs_per_node': 4,
+        'job_dir': os.path.join(run_dir, "run"),
+        'job_dir_shared': os.path.join(run_dir, "shared"),
+        'read_cache': os.path.join(run_dir, "read_cache"),
+        'coordinator_binary': 'kronos-synapp',
+        'execution_context': 'trivial',
+        'file_read_multiplicity': 1,
+        'file_read_size_min_pow': 10,
+        'file_read_size_max_pow': 10,
+        'n_setup_workers': n_workers
+    }
+
+    try:
+        executor = Executor(config, synthetic_schedule(n_jobs))
+        t_start = time.perf_counter()
+        executor.generate_job_internals()
+        t_setup = time.perf_counter() - t_start
+        executor.job_submitter.close()
+    finally:
+        shutil.rmtree(run_dir)
+
+    return t_setup
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--n-jobs", type=int, default=5000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--output-dir", default=None, help="Where to generate the jobs (default: temporary dir)")
+    args = parser.parse_args()
+
+    logging.getLogger("kronos_executor").setLevel(logging.WARNING)
+
+    cwd = os.getcwd()
+    for n_workers in args.workers:
+        t_setup = bench_generation(args.n_jobs, n_workers, args.output_dir)
+        os.chdir(cwd)
+
+        print("jobs: {:8d}  workers: {:4d}  setup: {:10.3f} s  ({:8.1f} jobs/s)".format(
+            args.n_jobs, n_workers, t_setup, args.n_jobs / t_setup))
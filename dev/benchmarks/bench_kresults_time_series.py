@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+
+# (C) Copyright 1996-2018 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+"""
+
+Benchmark of the binning of the global time series of a simulation
+(KResultsData.create_global_time_series and create_global_running_series),
+against the interval-by-interval implementation, for synthetic jobs.
+
+The results of both implementations are checked to be identical.
+
+> bench_kresults_time_series.py --n-jobs 2000 --n-intervals 200 --n-bins 1000
+
+"""
+
+import argparse
+import math
+import random
+import time
+
+from kronos_executor.definitions import signal_types
+from kronos_executor.io_formats.format_data_handlers.kresults_data import KResultsData
+from kronos_executor.io_formats.format_data_handlers.kresults_decorator import KResultsDecorator
+from kronos_executor.io_formats.format_data_handlers.kresults_job import KResultsJob
+from kronos_executor.io_formats.format_data_handlers.tests.local_test_utils import create_kresults
+from kronos_executor.tools import add_value_to_sublist
+
+
+def synthetic_sim(n_jobs, n_procs, n_intervals, seed=0):
+
+    rng = random.Random(seed)
+
+    jobs = []
+    for i_job in range(n_jobs):
+        time_series = [{
+            "flops": [rng.random() * 1.0e9 for _ in range(n_intervals)],
+            "bytes_read": [rng.choice([0, rng.random() * 1.0e6]) for _ in range(n_intervals - 1)] + [1],
+            "n_read": [rng.randint(0, 5) for _ in range(n_intervals - 1)] + [1],
+            "bytes_write": [rng.choice([0, rng.random() * 1.0e6]) for _ in range(n_intervals - 1)] + [1],
+            "n_write": [rng.randint(0, 5) for _ in range(n_intervals - 1)] + [1],
+            "durations": [rng.random() for _ in range(n_intervals)]
+        } for _ in range(n_procs)]
+
+        t_created = rng.randint(0, 3600)
+        kresults_json_data = create_kresults(time_series, creation_date="2017-07-31T{:02d}:{:02d}:{:02d}+00:00".format(
+            1 + t_created // 3600, (t_created // 60) % 60, t_created % 60))
+        decor_data = KResultsDecorator(workload_name="synthetic", job_name="job_{}".format(i_job))
+        jobs.append(KResultsJob(kresults_json_data, decorator_data=decor_data))
+
+    return KResultsData(jobs=jobs, sim_name="synthetic", n_procs_node=n_procs)
+
+
+def legacy_global_time_series(sim_data, times):
+    """
+    Interval-by-interval binning (previous implementation)
+    """
+
+    global_time_series = {}
+    bin_width = times[1] - times[0]
+    tmin_epochs = sim_data.tmin_epochs
+
+    for ts_name in signal_types:
+        _values, _elapsed, _processes = [0]*len(times), [0]*len(times), [0]*len(times)
+
+        for job in sim_data.jobs:
+            if job.time_series.get(ts_name):
+                job_ts_timestamps = [0] + job.time_series[ts_name]["times"].tolist()
+                t_start = job.t_start
+
+                for tt in range(1, len(job_ts_timestamps)):
+                    first = int(math.floor((job_ts_timestamps[tt-1] + t_start-tmin_epochs) / bin_width))
+                    last = int(math.ceil((job_ts_timestamps[tt] + t_start-tmin_epochs) / bin_width))
+                    last = last if last > first else first + 1
+                    n_span_bin = max(1, last-first)
+
+                    _values = add_value_to_sublist(
+                        _values, first, last, job.time_series[ts_name]["values"][tt-1]/float(n_span_bin))
+                    _elapsed = add_value_to_sublist(
+                        _elapsed, first, last, job.time_series[ts_name]["elapsed"][tt-1]/float(n_span_bin))
+                    _processes = add_value_to_sublist(_processes, first, last, 1)
+
+        global_time_series[ts_name] = {"times": times, "values": _values,
+                                       "elapsed": _elapsed, "processes": _processes}
+
+    return global_time_series
+
+
+def legacy_running_series(sim_data, times):
+    """
+    Job-by-job binning (previous implementation)
+    """
+
+    bin_width = times[1] - times[0]
+    running = {"jobs": [0]*len(times), "procs": [0]*len(times), "nodes": [0]*len(times)}
+    n_procs_node = int(sim_data.n_procs_node)
+    tmin_epochs = sim_data.tmin_epochs
+
+    for job in sim_data.jobs:
+        first = int(math.ceil((job.t_start - tmin_epochs - times[0]) / bin_width))
+        last = int(math.floor((job.t_end - tmin_epochs - times[0]) / bin_width))
+        last = last if last > first else first + 1
+        n_nodes = job.n_cpu // n_procs_node if not job.n_cpu % n_procs_node else job.n_cpu // n_procs_node + 1
+
+        running["jobs"] = add_value_to_sublist(running["jobs"], first, last, 1)
+        running["procs"] = add_value_to_sublist(running["procs"], first, last, job.n_cpu)
+        running["nodes"] = add_value_to_sublist(running["nodes"], first, last, n_nodes)
+
+    return running
+
+
+def timed(func, *args):
+    t_start = time.perf_counter()
+    res = func(*args)
+    return res, time.perf_counter() - t_start
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--n-jobs", type=int, default=500)
+    parser.add_argument("--n-procs", type=int, default=4)
+    parser.add_argument("--n-intervals", type=int, default=100)
+    parser.add_argument("--n-bins", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    sim_data = synthetic_sim(args.n_jobs, args.n_procs, args.n_intervals)
+
+    for n_bins in args.n_bins:
+        bin_width = sim_data.runtime() / (n_bins - 1)
+        times = [i * bin_width for i in range(n_bins)]
+
+        (_, series), t_series = timed(sim_data.create_global_time_series, times)
+        legacy_series, t_legacy_series = timed(legacy_global_time_series, sim_data, times)
+        assert series == legacy_series, "time series differ"
+
+        (_, _, running), t_running = timed(sim_data.create_global_running_series, times)
+        legacy_running, t_legacy_running = timed(legacy_running_series, sim_data, times)
+        assert running == legacy_running, "running series differ"
+
+        print("bins: {:7d}  time series: {:8.3f} s (legacy {:8.3f} s)  running series: {:8.3f} s (legacy {:8.3f} s)".format(
+            n_bins, t_series, t_legacy_series, t_running, t_legacy_running))
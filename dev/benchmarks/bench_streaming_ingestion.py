@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+
+# (C) Copyright 1996-2018 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+"""
+
+Benchmark of the peak memory (RSS) of the ingestion of synthetic profiled jobs, as done by
+kronos-ingest-logs (the dataset is pickled to a cache file, then loaded and modelled job by
+job), with the jobs held in memory ("list"), with the jobs written to disk in chunks as
+they are read ("stream", kronos-ingest-logs --stream), and with the jobs also recorded in an
+ingestion index ("stream+index", as kronos-ingest-logs does for the profiler log types). In the
+last mode, the logs (one file per job) are ingested twice: the second time, no file is parsed.
+
+Each mode runs in a separate process, so that the peak RSS of one does not hide the other.
+The modelled jobs of both modes are checked to be identical.
+
+> bench_streaming_ingestion.py --n-jobs 2000 5000 --n-samples 2000 --chunk-size 100
+
+"""
+
+import argparse
+import os
+import pickle
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from kronos_modeller.jobs import IngestedJob, ModelJob
+from kronos_modeller.logreader.base import LogReader
+from kronos_modeller.logreader.dataset import ChunkedJobList, IngestedDataSet
+from kronos_modeller.time_signal.time_signal import TimeSignal
+
+
+class SyntheticIngestedJob(IngestedJob):
+
+    samples = None
+
+    def model_job(self):
+        timesignals = {name: TimeSignal.from_values(name, self.samples[0], values, base_signal_name=name)
+                       for name, values in zip(["flops", "kb_read", "kb_write"], self.samples[1:])}
+
+        return ModelJob(job_name=self.jobname, time_start=self.time_start, duration=float(self.samples[0][-1]),
+                        ncpus=self.ncpus, nnodes=1, label=self.label, timesignals=timesignals)
+
+
+def synthetic_job(i, n_samples):
+    rng = np.random.RandomState(i)
+    samples = np.empty((4, n_samples))
+    samples[0] = np.cumsum(rng.exponential(1.0, n_samples))
+    samples[1:] = rng.rand(3, n_samples) * 1.0e6
+    return SyntheticIngestedJob(label="job_{}".format(i), jobname="job_{}".format(i),
+                                time_start=float(i), ncpus=1 + i % 64, samples=samples)
+
+
+class SyntheticLogReader(object):
+
+    def __init__(self, path, n_jobs=0, n_samples=0):
+        self.path = path
+        self.n_jobs = n_jobs
+        self.n_samples = n_samples
+
+    def read_logs(self):
+        for i in range(self.n_jobs):
+            yield synthetic_job(i, self.n_samples)
+
+
+class SyntheticFileLogReader(LogReader):
+    """
+    One log file per job, holding the job number
+    """
+    file_pattern = "*.log"
+    pool_readers = 1
+
+    def __init__(self, path, n_samples=0, **kwargs):
+        super(SyntheticFileLogReader, self).__init__(path, **kwargs)
+        self.n_samples = n_samples
+
+    def logfiles(self):
+        return sorted(super(SyntheticFileLogReader, self).logfiles())
+
+    def read_log(self, filename, suggested_label):
+        with open(filename, "r") as f:
+            return [synthetic_job(int(f.read()), self.n_samples)]
+
+
+class SyntheticDataSet(IngestedDataSet):
+    log_reader_class = SyntheticLogReader
+
+
+class SyntheticFileDataSet(IngestedDataSet):
+    log_reader_class = SyntheticFileLogReader
+
+
+def ingest_and_model(dataset_class, ingest_path, ingest_config, work_dir):
+    """
+    Ingest and cache the jobs, then reload and model them
+    :return: digest of the modelled jobs
+    """
+    streamed = "chunk_file" in ingest_config
+
+    dataset = dataset_class.from_logs_path(ingest_path, ingest_config)
+    with open(os.path.join(work_dir, "dataset.kronos"), "wb") as f:
+        pickle.dump(dataset, f)
+    del dataset
+
+    with open(os.path.join(work_dir, "dataset.kronos"), "rb") as f:
+        dataset = pickle.load(f)
+
+    digest = 0.0
+    for job in dataset.model_jobs():
+        digest += job.ncpus + job.timesignals["flops"].yvalues.sum() + job.timesignals["kb_write"].xvalues[-1]
+
+    assert streamed == isinstance(dataset.joblist, ChunkedJobList)
+    return float(digest)
+
+
+def run_mode(mode, n_jobs, n_samples, chunk_size, work_dir):
+    """
+    Ingest, cache, reload and model the jobs (in this process)
+    :return: (digest of the modelled jobs, times of the ingestions)
+    """
+    ingest_config = {"cache": False, "reparse": True}
+    if mode != "list":
+        ingest_config.update({"chunk_file": os.path.join(work_dir, "dataset.jobs"), "chunk_size": chunk_size})
+
+    if mode != "stream+index":
+        ingest_config.update({"n_jobs": n_jobs, "n_samples": n_samples})
+        t_start = time.perf_counter()
+        digest = ingest_and_model(SyntheticDataSet, work_dir, ingest_config, work_dir)
+        return digest, [time.perf_counter() - t_start]
+
+    log_dir = os.path.join(work_dir, "logs")
+    os.makedirs(log_dir)
+    for i in range(n_jobs):
+        with open(os.path.join(log_dir, "job_{:08d}.log".format(i)), "w") as f:
+            f.write(str(i))
+
+    ingest_config.update({"n_samples": n_samples, "index_file": os.path.join(work_dir, "dataset.index")})
+
+    digests = []
+    times = []
+    for _ in range(2):
+        t_start = time.perf_counter()
+        digests.append(ingest_and_model(SyntheticFileDataSet, log_dir, dict(ingest_config), work_dir))
+        times.append(time.perf_counter() - t_start)
+
+    assert digests[0] == digests[1], "re-ingested jobs differ"
+    return digests[0], times
+
+
+def bench_mode(mode, n_jobs, n_samples, chunk_size):
+    """
+    Run a mode in a separate process
+    :return: (digest, peak RSS in MiB, times)
+    """
+    work_dir = tempfile.mkdtemp()
+    try:
+        output = subprocess.check_output([sys.executable, __file__, "--run-mode", mode, "--n-jobs", str(n_jobs),
+                                          "--n-samples", str(n_samples), "--chunk-size", str(chunk_size),
+                                          "--work-dir", work_dir])
+    finally:
+        shutil.rmtree(work_dir)
+
+    # (the ingestion prints progress messages: the results are on the last line)
+    results = output.decode().splitlines()[-1].split()
+    return float(results[0]), float(results[1]), [float(t) for t in results[2:]]
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--n-jobs", type=int, nargs="+", default=[2000, 5000])
+    parser.add_argument("--n-samples", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=100)
+    parser.add_argument("--run-mode", choices=["list", "stream", "stream+index"], help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        digest, times = run_mode(args.run_mode, args.n_jobs[0], args.n_samples, args.chunk_size, args.work_dir)
+
+        # (ru_maxrss is in KiB on Linux)
+        print(repr(digest), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, *times)
+        sys.exit(0)
+
+    for n_jobs in args.n_jobs:
+        results = {mode: bench_mode(mode, n_jobs, args.n_samples, args.chunk_size)
+                   for mode in ("list", "stream", "stream+index")}
+        assert len(set(digest for digest, _, _ in results.values())) == 1, "modelled jobs differ"
+
+        print("jobs: {:7d}  {}  (re-run: {:.2f} s)".format(n_jobs, "  ".join(
+            "{}: {:8.1f} MiB {:7.2f} s".format(mode, max_rss, times[0])
+            for mode, (_, max_rss, times) in results.items()), results["stream+index"][2][1]))
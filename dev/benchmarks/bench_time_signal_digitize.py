@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+
+# (C) Copyright 1996-2018 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+"""
+
+Benchmark of the digitisation of time signals (TimeSignal.digitized, with and without
+durations), against the bin-by-bin and sample-by-sample implementations, for synthetic
+signals digitised in a few bins (as for the clustering and the KSchedule export) and in
+many bins.
+
+The results of both implementations are checked to be identical.
+
+> bench_time_signal_digitize.py --n-signals 200 --n-samples 1000 --n-bins 10 10000
+
+"""
+
+import argparse
+import math
+import time
+
+import numpy as np
+
+from kronos_modeller.time_signal.time_signal import TimeSignal
+
+
+def legacy_digitized(ts, nbins):
+    """
+    Bin-by-bin digitisation (previous implementation)
+    """
+
+    key = ts.digitization_key
+
+    xedge_bins = np.linspace(min(ts.xvalues), max(ts.xvalues) + 1.0e-6, nbins + 1)
+    bins_delta = xedge_bins[1] - xedge_bins[0]
+    xvalues = xedge_bins[1:] - (0.5 * bins_delta)
+
+    bin_indices = np.digitize(ts.xvalues, xedge_bins)
+
+    yvalues = np.zeros(nbins)
+    for i in range(nbins):
+        if any(ts.yvalues[bin_indices == i+1]):
+            if key == 'mean':
+                val = ts.yvalues[bin_indices == i+1].mean()
+            elif key == 'sum':
+                val = ts.yvalues[bin_indices == i+1].sum()
+            else:
+                raise ValueError("Digitization key value not recognised: {}".format(key))
+
+            yvalues[i] = val
+
+    return xvalues, yvalues
+
+
+def legacy_digitize_durations(ts, nbins):
+    """
+    Sample-by-sample digitisation (previous implementation)
+    """
+
+    xedge_bins = np.linspace(0.0, max(ts.xvalues + ts.durations) + 1.0e-6, nbins + 1)
+    dx_bins = xedge_bins[1] - xedge_bins[0]
+    xvalues_bins = 0.5 * (xedge_bins[1:] + xedge_bins[:-1])
+    yvalues_bins = np.zeros(len(xvalues_bins))
+
+    start_bins = np.digitize(ts.xvalues, xedge_bins) - 1
+    end_bins = np.digitize(ts.xvalues + ts.durations, xedge_bins) - 1
+    for start, stop, x, y, dur in zip(start_bins, end_bins, ts.xvalues, ts.yvalues, ts.durations):
+
+        assert start >= 0
+        assert stop >= 0
+
+        if start == stop:
+            yvalues_bins[start] += y
+        else:
+            yvalues_bins[start] = y * (dx_bins - math.fmod(x, dx_bins)) / dur
+            yvalues_bins[start+1:stop--1] = y * dx_bins / dur
+            yvalues_bins[stop] = y * math.fmod(x + dur, dx_bins) / dur
+
+    yvalues_bins = np.asarray(yvalues_bins)
+    yvalues_bins = yvalues_bins.astype(ts.ts_type)
+
+    return xvalues_bins, yvalues_bins
+
+
+def synthetic_signals(n_signals, n_samples, with_durations, seed=0):
+
+    rng = np.random.RandomState(seed)
+
+    signals = []
+    for i_signal in range(n_signals):
+        ts_name = ["flops", "kb_read", "n_write", "n_pairwise"][i_signal % 4]
+        yvals = rng.rand(n_samples) * 1.0e6
+        yvals[rng.rand(n_samples) < 0.3] = 0.0
+
+        if with_durations:
+            # consecutive (partly overlapping) intervals, with a few long ones
+            durations = rng.exponential(1.0, n_samples)
+            durations[rng.rand(n_samples) < 0.01] *= 50.0
+            xvals = np.cumsum(rng.exponential(1.0, n_samples))
+            signals.append(TimeSignal.from_values(ts_name, xvals, yvals, base_signal_name=ts_name,
+                                                  durations=durations))
+        else:
+            xvals = np.cumsum(rng.exponential(1.0, n_samples))
+            signals.append(TimeSignal.from_values(ts_name, xvals, yvals, base_signal_name=ts_name))
+
+    return signals
+
+
+def timed(func, *args):
+    t_start = time.perf_counter()
+    res = func(*args)
+    return res, time.perf_counter() - t_start
+
+
+def check_identical(res, legacy_res):
+    for arr, legacy_arr in zip(res, legacy_res):
+        assert arr.dtype == legacy_arr.dtype, "dtypes differ"
+        assert np.array_equal(arr, legacy_arr, equal_nan=True), "digitised signals differ"
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--n-signals", type=int, default=200)
+    parser.add_argument("--n-samples", type=int, default=1000)
+    parser.add_argument("--n-bins", type=int, nargs="+", default=[10, 10000])
+    args = parser.parse_args()
+
+    for with_durations in (False, True):
+        signals = synthetic_signals(args.n_signals, args.n_samples, with_durations)
+        legacy_func = legacy_digitize_durations if with_durations else legacy_digitized
+
+        for n_bins in args.n_bins:
+            t_new = t_legacy = 0.0
+            for ts in signals:
+                res, t_ts = timed(ts.digitized, n_bins)
+                legacy_res, t_legacy_ts = timed(legacy_func, ts, n_bins)
+                check_identical(res, legacy_res)
+                t_new += t_ts
+                t_legacy += t_legacy_ts
+
+            print("{:15}  bins: {:6d}  digitized: {:8.3f} s (legacy {:8.3f} s)".format(
+                "with durations" if with_durations else "samples", n_bins, t_new, t_legacy))
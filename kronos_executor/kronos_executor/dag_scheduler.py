@@ -0,0 +1,131 @@
+import collections
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidDependencies(Exception):
+    """Exception raised when the job dependencies can never be satisfied"""
+    pass
+
+
+class DAGScheduler(object):
+    """
+    Dependency-counter scheduler of a DAG of jobs.
+
+    Each job keeps the number of its dependencies still to be satisfied, and it is moved
+    to the ready queue as soon as this number drops to zero. Each dependency is identified
+    by a hashable key (e.g. a job id or a hashed event) and is satisfied (once and for all
+    the jobs depending on it) by calling `satisfy` with that key.
+
+    :param jobs: list of jobs (objects with an `id` attribute)
+    :param get_dependencies: function returning the dependencies of a job, as a list of
+                             (key, producer) tuples: `producer` is the id of the job that
+                             satisfies the dependency, or None if it is not satisfied by
+                             a job of the schedule (e.g. timer events)
+    :raise: InvalidDependencies if some dependencies cannot be satisfied (unknown producer
+            or dependency cycle)
+    """
+
+    def __init__(self, jobs, get_dependencies):
+
+        self.jobs = {j.id: j for j in jobs}
+
+        # number of unsatisfied dependencies of each job
+        self._remaining = {}
+
+        # dependency key -> ids of the jobs waiting for it
+        self._dependents = {}
+
+        # job id -> ids of the jobs that need to run before it
+        producers = {}
+
+        for j in jobs:
+
+            # a dependency listed more than once is still satisfied only once
+            deps = dict(get_dependencies(j))
+
+            for key, producer in deps.items():
+                self._dependents.setdefault(key, []).append(j.id)
+
+                if producer is not None:
+                    if producer not in self.jobs:
+                        raise InvalidDependencies(
+                            "Job {} depends on job {} that is not in the schedule".format(j.id, producer))
+                    producers.setdefault(j.id, set()).add(producer)
+
+            self._remaining[j.id] = len(deps)
+
+        self._check_cycles(producers)
+
+        # jobs ready for submission (root jobs first)
+        self._ready = collections.deque(j for j in jobs if not self._remaining[j.id])
+        self._n_released = 0
+
+    def _check_cycles(self, producers):
+        """
+        Check that the dependencies between jobs do not contain cycles (Kahn's algorithm)
+        :param producers: job id -> set of ids of the jobs it depends upon
+        :return:
+        """
+
+        in_degree = {jid: len(producers.get(jid, ())) for jid in self.jobs}
+
+        consumers = {}
+        for jid, job_producers in producers.items():
+            for p in job_producers:
+                consumers.setdefault(p, []).append(jid)
+
+        sorted_jobs = [jid for jid, n in in_degree.items() if n == 0]
+        for jid in sorted_jobs:
+            for c in consumers.get(jid, []):
+                in_degree[c] -= 1
+                if in_degree[c] == 0:
+                    sorted_jobs.append(c)
+
+        if len(sorted_jobs) < len(self.jobs):
+            cyclic_jobs = sorted(jid for jid, n in in_degree.items() if n > 0)
+            raise InvalidDependencies("Dependency cycle between jobs: {}{}".format(
+                ", ".join(str(jid) for jid in cyclic_jobs[:10]),
+                ", ..." if len(cyclic_jobs) > 10 else ""))
+
+    def satisfy(self, key):
+        """
+        Satisfy a dependency (the jobs with no unsatisfied dependencies left become ready)
+        :param key: key of the dependency
+        :return: number of jobs that became ready
+        """
+
+        # each dependency is satisfied only once
+        dependents = self._dependents.pop(key, None)
+        if dependents is None:
+            return 0
+
+        n_ready = 0
+        for jid in dependents:
+            self._remaining[jid] -= 1
+            if not self._remaining[jid]:
+                self._ready.append(self.jobs[jid])
+                n_ready += 1
+
+        return n_ready
+
+    def pop_ready(self):
+        """
+        Jobs ready for submission (each job is returned only once)
+        :return: list of jobs
+        """
+
+        ready = list(self._ready)
+        self._ready.clear()
+        self._n_released += len(ready)
+
+        return ready
+
+    def n_pending(self):
+        """
+        Number of jobs not returned yet as ready
+        :return:
+        """
+
+        return len(self.jobs) - self._n_released
@@ -24,6 +24,22 @@ class ExecutionContext:
     submit_job_dependency = None
     #: Separator for a list of dependencies (e.g. ``":"``)
     submit_dependency_separator = None
+    #: Max number of job submissions per second accepted by the scheduler
+    #: (None if unlimited), can be overridden with ``submit_rate_limit``
+    submit_rate_limit = None
+
+    #: Parameter to submit a job array (e.g. ``"--array="``)
+    submit_array_param = None
+    #: Environment variable holding the index of a job in its array
+    #: (e.g. ``"SLURM_ARRAY_TASK_ID"``), None if job arrays are not supported
+    array_index_variable = None
+    #: Index of the first job of an array
+    array_index_start = 0
+    #: Placeholder for the array index in the output file names (e.g. ``"%a"``)
+    array_index_pattern = ""
+    #: ``format()`` string for the id of a job of an array, from the id of the
+    #: array (``array_id``) and the index of the job (``index``)
+    array_job_id = "{array_id}_{index}"
 
     #: Parallel launcher command (e.g. ``"mpirun"``, ``"srun"``)
     launcher_command = None
@@ -106,6 +122,44 @@ class ExecutionContext:
         command.append(job_script_path)
         return command
 
+    def supports_batch_submission(self):
+        """Whether independent jobs can be submitted at once (as a job array)"""
+        return self.array_index_variable is not None
+
+    def batch_script(self, job_config, job_scripts):
+        """Generate a script running each of the given job scripts as an element of a job array
+        :param job_config: job configuration for the scheduler directives of the array (dict)
+        :param job_scripts: list of (job script, output file, error file) tuples
+        :return: script (str)"""
+        assert self.supports_batch_submission()
+
+        lines = ["#!/bin/bash", self.scheduler_params(job_config), ""]
+        lines.append('case "${}" in'.format(self.array_index_variable))
+        for index, (script, output_file, error_file) in enumerate(job_scripts, self.array_index_start):
+            lines.append("    {}) exec {} >{} 2>{} ;;".format(index, script, output_file, error_file))
+        lines.append("esac")
+
+        return "\n".join(lines) + "\n"
+
+    def batch_submit_command(self, job_config, batch_script_path, n_jobs):
+        """Generate the command line to submit a job array of n_jobs jobs"""
+        assert self.submit_command_ is not None and self.submit_array_param is not None
+
+        # e.g. "--array=0-9", or "-J" "0-9"
+        array_arg = "{}{}-{}".format(self.submit_array_param, self.array_index_start,
+                                     self.array_index_start + n_jobs - 1)
+
+        return [self.submit_command_] + array_arg.split(" ", 1) + [batch_script_path]
+
+    def batch_job_ids(self, output, n_jobs):
+        """Ids of the jobs of an array, from the output of the submission command
+        :param output: output of the submission command (bytes)
+        :param n_jobs: number of jobs in the array
+        :return: list of job ids (str)"""
+        array_id = output.decode("utf-8").strip()
+        return [self.array_job_id.format(array_id=array_id, index=index)
+                for index in range(self.array_index_start, self.array_index_start + n_jobs)]
+
     def cancel_entry(self, sequence_id, first):
         """Generate a new entry to append to the cancel file"""
         entry = ""
@@ -25,6 +25,12 @@ class LSFExecutionContext(ExecutionContext):
     submit_job_dependency = "-w "
     submit_dependency_separator = ":"
 
+    # the job array is defined by the job name, e.g. "name[1-10]"
+    array_index_variable = "LSB_JOBINDEX"
+    array_index_start = 1
+    array_index_pattern = "%I"
+    array_job_id = "{array_id}[{index}]"
+
     launcher_command = "mpiexec"
     launcher_params = {
         "procs_per_node": "-N ",
@@ -41,6 +47,14 @@ class LSFExecutionContext(ExecutionContext):
         self.config['export_library_path'] = 'LD_LIBRARY_PATH="${LD_LIBRARY_PATH}"'
         self.config['hold_job'] = ""
 
+    def batch_script(self, job_config, job_scripts):
+        job_config = dict(job_config, job_name="{}[{}-{}]".format(
+            job_config['job_name'], self.array_index_start, self.array_index_start + len(job_scripts) - 1))
+        return super().batch_script(job_config, job_scripts)
+
+    def batch_submit_command(self, job_config, batch_script_path, n_jobs):
+        return self.submit_command(job_config, batch_script_path)
+
     def env_setup(self, job_config):
         return  """\
 export LD_LIBRARY_PATH={coordinator_library_path}:${{LD_LIBRARY_PATH}}
@@ -28,6 +28,10 @@ class PBSExecutionContext(ExecutionContext):
     submit_job_dependency = "-W dependency=afterany:"
     submit_dependency_separator = ":"
 
+    submit_array_param = "-J "
+    array_index_variable = "PBS_ARRAY_INDEX"
+    array_index_pattern = "^array_index^"
+
     launcher_command = "aprun"
     launcher_params = {
         "procs_per_node": "-N ",
@@ -45,6 +49,12 @@ class PBSExecutionContext(ExecutionContext):
         self.config['scheduler_queue'] = 'np'
         self.config['export_library_path'] = 'LD_LIBRARY_PATH="${LD_LIBRARY_PATH}"'
 
+    def batch_job_ids(self, output, n_jobs):
+        # the array id looks like "1234[].server"
+        array_id = output.decode("utf-8").strip()
+        return [array_id.replace("[]", "[{}]".format(index))
+                for index in range(self.array_index_start, self.array_index_start + n_jobs)]
+
     def env_setup(self, job_config):
         libpath = ""
         if "coordinator_library_path" in job_config:
@@ -22,6 +22,11 @@ class SlurmExecutionContext(ExecutionContext):
     submit_job_dependency = "--dependency=afterany:"
     submit_dependency_separator = ":"
 
+    submit_array_param = "--array="
+    array_index_variable = "SLURM_ARRAY_TASK_ID"
+    array_index_pattern = "%a"
+    array_job_id = "{array_id}_{index}"
+
     launcher_command = "mpirun"
     launcher_params = {"num_procs": "-np "}
     launcher_use_params = ["num_procs"]
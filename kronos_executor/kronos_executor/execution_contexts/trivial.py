@@ -4,6 +4,7 @@ import pathlib
 from kronos_executor.execution_context import ExecutionContext
 
 run_script = pathlib.Path(__file__).parent / "trivial_run.sh"
+array_run_script = pathlib.Path(__file__).parent / "trivial_array_run.sh"
 
 class TrivialExecutionContext(ExecutionContext):
 
@@ -13,6 +14,9 @@ class TrivialExecutionContext(ExecutionContext):
     scheduler_cancel_head = "#!/bin/bash\nkill "
     scheduler_cancel_entry = "{sequence_id} "
 
+    # job arrays are simulated by running the array script once per index
+    array_index_variable = "KRONOS_ARRAY_INDEX"
+
     launcher_command = "mpirun"
     launcher_params = {"num_procs": "-np "}
     launcher_use_params = ["num_procs"]
@@ -26,4 +30,14 @@ class TrivialExecutionContext(ExecutionContext):
                 job_config['job_error_file'],
                 job_script_path]
 
+    def batch_submit_command(self, job_config, batch_script_path, n_jobs):
+        return [str(array_run_script),
+                str(self.array_index_start),
+                str(self.array_index_start + n_jobs - 1),
+                batch_script_path]
+
+    def batch_job_ids(self, output, n_jobs):
+        # one process id per job
+        return output.decode("utf-8").split()
+
 Context = TrivialExecutionContext
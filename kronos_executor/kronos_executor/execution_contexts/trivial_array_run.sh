@@ -0,0 +1,11 @@
+#!/bin/bash
+
+# simulates a job array: runs the script once per index, with the index in KRONOS_ARRAY_INDEX
+first=$1
+last=$2
+shift 2
+
+for index in $(seq $first $last); do
+    KRONOS_ARRAY_INDEX=$index $@ >/dev/null 2>&1 &
+    echo $!
+done
@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 
+import concurrent.futures
 import datetime
 import logging
 import os
@@ -14,6 +15,7 @@ from kronos_executor import log_msg_format
 from kronos_executor.global_config import global_config
 from kronos_executor import generate_read_files
 from kronos_executor.execution_context import load_context
+from kronos_executor.io_formats.run_journal import RunJournal
 from kronos_executor.job_submitter import JobSubmitter
 from kronos_executor.tools import load_module
 
@@ -42,6 +44,12 @@ class Executor(object):
         'read_cache',
         'local_tmpdir',
         'n_submitters',
+        'n_setup_workers',
+        'submit_window',
+        'submit_rate_limit',
+        'submit_retries',
+        'submit_retry_delay',
+        'submit_batch_size',
         'file_read_multiplicity',
         'file_read_size_min_pow',
         'file_read_size_max_pow',
@@ -59,6 +67,8 @@ class Executor(object):
         'notification_port',
         'time_event_cycles',
         'event_batch_size',
+        'event_dispatcher',
+        'event_history_size',
 
         # if NVRAM is to be used
         'nvdimm_root_path'
@@ -158,15 +168,30 @@ class Executor(object):
         self.job_classes_path = [os.getcwd()]
         self.job_classes_path.extend(config.get('job_classes_path', []))
         self.job_classes_path.append(os.path.join(os.path.dirname(__file__), "job_classes"))
+        self._job_classes = {}
+
+        # number of threads generating the job scripts
+        self.n_setup_workers = config.get('n_setup_workers', 8)
 
         self.cancel_file_path = os.path.join(self.job_dir, "killjobs")
         self.cancel_file = None
 
+        # timing journal of the jobs (written alongside the log by the executors that support it)
+        self.journal_path = os.path.join(self.job_dir, RunJournal.journal_filename)
+        self.journal = None
+
         self.read_cache_path = config.get("read_cache", None)
         if self.read_cache_path is None:
             raise KeyError("read_cache not provided in time_schedule config")
 
-        self.job_submitter = JobSubmitter(config.get('n_submitters', 4))
+        # the rate limit defaults to the one of the scheduler (if any)
+        self.job_submitter = JobSubmitter(config.get('n_submitters', 4),
+                                          window=config.get('submit_window', None),
+                                          rate_limit=config.get('submit_rate_limit',
+                                                                self.execution_context.submit_rate_limit),
+                                          retries=config.get('submit_retries', 0),
+                                          retry_delay=config.get('submit_retry_delay', 1.0),
+                                          batch_size=config.get('submit_batch_size', 1))
 
         self.submitted_job_ids = {}
 
@@ -208,6 +233,14 @@ class Executor(object):
         if self.execution_mode != "events" and config.get('event_batch_size'):
             raise KeyError("parameter 'event_batch_size' should only be set if execution_mode = events")
 
+        if self.execution_mode != "events" and config.get('event_dispatcher'):
+            raise KeyError("parameter 'event_dispatcher' should only be set if execution_mode = events")
+        else:
+            self.event_dispatcher = config.get('event_dispatcher', "socket")
+
+        if self.execution_mode != "events" and config.get('event_history_size'):
+            raise KeyError("parameter 'event_history_size' should only be set if execution_mode = events")
+
         # nvdimm path if present
         self.nvdimm_root_path = self.config.get("nvdimm_root_path")
 
@@ -278,17 +311,21 @@ class Executor(object):
         if self.config.get("nvdimm_root_path"):
             config['nvdimm_root_path'] = self.nvdimm_root_path
 
-        try:
-            mod = load_module(name, self.job_classes_path, prefix="kronos_job_class_")
-        except RuntimeError:
-            raise ValueError("Job class {!r} not found in paths {}".format(name, ", ".join(self.job_classes_path)))
+        job_class = self._job_classes.get(name)
+        if job_class is None:
+            try:
+                mod = load_module(name, self.job_classes_path, prefix="kronos_job_class_")
+            except RuntimeError:
+                raise ValueError("Job class {!r} not found in paths {}".format(name, ", ".join(self.job_classes_path)))
+
+            if not hasattr(mod, 'Job'):
+                raise RuntimeError(
+                    "Module {!r} does not define a Job class" \
+                    .format(name))
 
-        if not hasattr(mod, 'Job'):
-            raise RuntimeError(
-                "Module {!r} does not define a Job class" \
-                .format(name))
+            job_class = self._job_classes[name] = mod.Job
 
-        return mod.Job(config, self, job_dir)
+        return job_class(config, self, job_dir)
 
     def generate_job_internals(self):
 
@@ -296,6 +333,7 @@ class Executor(object):
         jobs = []
         need_cache = False
 
+        t_start = time.perf_counter()
         for job_num, job_config in enumerate(self.job_iterator()):
             job_dir = os.path.join(self.job_dir, "job-{}".format(job_num))
             job_config['job_num'] = str(job_num)
@@ -306,10 +344,22 @@ class Executor(object):
             j = self.load_job(job_class_name, job_config, job_dir)
             need_cache = need_cache or j.needs_read_cache
 
-            j.generate()
             jobs.append(j)
+        t_load = time.perf_counter() - t_start
+
+        # render and write the job scripts (mostly waiting for the file system, hence threads)
+        t_start = time.perf_counter()
+        if self.n_setup_workers > 1 and len(jobs) > 1:
+            with concurrent.futures.ThreadPoolExecutor(self.n_setup_workers) as pool:
+                for _ in pool.map(lambda j: j.generate(), jobs):
+                    pass
+        else:
+            for j in jobs:
+                j.generate()
+        t_generate = time.perf_counter() - t_start
 
         # Test the read cache if needed
+        t_start = time.perf_counter()
         if need_cache:
             logger.info("Testing read cache ...")
             if not generate_read_files.test_read_cache(
@@ -320,17 +370,25 @@ class Executor(object):
 
                 logger.info("Read cache not filled, generating ...")
 
-                generate_read_files.generate_read_cache(
+                total_bytes, elapsed = generate_read_files.generate_read_cache(
                     self.read_cache_path,
                     self._file_read_multiplicity,
                     self._file_read_size_min_pow,
-                    self._file_read_size_max_pow
+                    self._file_read_size_max_pow,
+                    n_workers=self.n_setup_workers
                 )
-                logger.info("Generated.")
+                logger.info("Generated {} in {:.3f} s.".format(
+                    generate_read_files.human_readable_bytes(total_bytes), elapsed))
             else:
                 logger.info("OK.")
         else:
             logger.info("Not testing read cache, no job needs it.")
+        t_cache = time.perf_counter() - t_start
+
+        logger.info("Setup timings ({} jobs, {} workers):".format(len(jobs), self.n_setup_workers))
+        logger.info("    load jobs            : {:10.3f} s".format(t_load))
+        logger.info("    generate job scripts : {:10.3f} s".format(t_generate))
+        logger.info("    read cache           : {:10.3f} s".format(t_cache))
 
         return jobs
 
@@ -472,6 +530,9 @@ class Executor(object):
         if self.cancel_file is not None:
             self.cancel_file.close()
 
+        if self.journal is not None:
+            self.journal.close()
+
         self.job_submitter.close()
 
         # Copy the log file into the output directory
@@ -3,7 +3,9 @@
 import logging
 from datetime import datetime
 
+from kronos_executor.dag_scheduler import DAGScheduler
 from kronos_executor.executor import Executor
+from kronos_executor.io_formats.run_journal import RunJournalWriter
 from kronos_executor.kronos_events import EventComplete, EventFailed
 from kronos_executor.kronos_events.manager import Manager
 from kronos_executor.kronos_events.time_ticker import TimeTicker
@@ -25,19 +27,26 @@ class ExecutorEventsPar(Executor):
         super(ExecutorEventsPar, self).__init__(config, schedule, arg_config=arg_config)
 
         self.event_batch_size = config.get("event_batch_size", 10)
+        self.event_history_size = config.get("event_history_size", None)
         self.n_submitters = config.get("n_submitters", 4)
 
         self.event_manager = None
 
-        self.submitted_jobs = set()
+        self.dag_scheduler = None
+        self.outstanding_jobs = None
+        self.timed_jobs = None
         self.initial_submission_time = None
-        self.deps_to_jobs_tree = None
-        self.job_to_deps = None
+        self.last_timed_completion_time = None
+
+        # job id -> ids of the jobs it depends on
+        self.job_producers = {}
 
         logger.info("======= Executor multiproc config: =======")
         logger.info("events notification host: {}".format(self.notification_host))
         logger.info("events notification port: {}".format(self.notification_port))
         logger.info("events batch size       : {}".format(self.event_batch_size))
+        logger.info("events dispatcher       : {}".format(self.event_dispatcher))
+        logger.info("events history size     : {}".format(self.event_history_size))
         logger.info("job submitting processes: {}".format(self.n_submitters))
 
     def setup(self):
@@ -52,29 +61,44 @@ class ExecutorEventsPar(Executor):
         # init the event manager
         self.event_manager = Manager(server_host=self.notification_host,
                                      server_port=self.notification_port,
-                                     sim_token=self.simulation_token)
+                                     sim_token=self.simulation_token,
+                                     dispatcher_mode=self.event_dispatcher,
+                                     max_stored_events=self.event_history_size)
 
-        # generate the dependency tree structure
-        self.deps_to_jobs_tree, self.job_to_deps = self.build_deps_to_job_tree()
+        # generate the dependency DAG (checks that all the dependencies can be satisfied)
+        self.dag_scheduler = self.build_dag_scheduler()
 
-    def build_deps_to_job_tree(self):
+    def build_dag_scheduler(self):
         """
-        Build a structure that allows getting jobs that depend on a particular event
+        Build the scheduler of the jobs, triggered by the events they depend on
         :return:
         """
 
-        # structure dependency->jobs
-        _deps_2_jobs = {}
-        for j in self.jobs:
-            for d in j.depends:
-                _deps_2_jobs.setdefault(d.get_hashed(), []).append(j)
+        job_ids = set(j.id for j in self.jobs)
+
+        def event_dependencies(job):
+
+            deps = []
+            for d in job.depends:
+
+                # events sent by a job (or by one of its sub-jobs) can only occur after that job starts
+                producer = None
+                if "job" in getattr(d, "info", {}):
+                    producer = d.info["job"].split(".")[0]
 
-        # structure j.id->dependency
-        job_2_deps = {}
-        for j in self.jobs:
-            job_2_deps[j.id] = [d.get_hashed() for d in j.depends]
+                    # only job completions are guaranteed to come from the jobs of the schedule
+                    if producer not in job_ids and d.type != "Complete":
+                        logger.warning("Job {} depends on a {} event from job {} not in the schedule".format(
+                            job.id, d.type, d.info["job"]))
+                        producer = None
 
-        return _deps_2_jobs, job_2_deps
+                deps.append((d.get_hashed(), producer))
+                if producer is not None:
+                    self.job_producers.setdefault(job.id, set()).add(producer)
+
+            return deps
+
+        return DAGScheduler(self.jobs, event_dependencies)
 
     def do_run(self):
         """
@@ -83,17 +107,23 @@ class ExecutorEventsPar(Executor):
         """
 
         # the submission loop info
-        completed_jobs = []
-        completed_jobs_prev = []
         i_submission_cycle = 0
 
+        # jobs not completed yet (updated as new events arrive)
+        self.outstanding_jobs = set(j.id for j in self.jobs)
+        self.timed_jobs = set(j.id for j in self.jobs if j.is_job_timed)
+
+        self.journal = RunJournalWriter(self.journal_path, sim_token=self.simulation_token)
+        self.journal.jobs([(j.id, j.job_config.get("metadata", {}).get("workload_name")) for j in self.jobs],
+                          self.job_producers)
+
         new_events = []
         time_0 = datetime.now()
         time_ticker = TimeTicker(time_0)
 
         # ========= MAIN SIMULATION LOOP =========
         logger.info("Running..")
-        while not all(j.id in completed_jobs for j in self.jobs):
+        while self.outstanding_jobs:
 
             # Add a time event for every second elapsed since last call
             new_seconds = time_ticker.get_elapsed_seconds(datetime.now())
@@ -104,69 +134,96 @@ class ExecutorEventsPar(Executor):
             # submit jobs
             self.submit_eligible_jobs(new_events=new_events)
 
-            # Get next message from manager
-            if not all(j.id in completed_jobs for j in self.jobs):
-                new_events = self.event_manager.get_latest_events(batch_size=self.event_batch_size)
-
-                for event in new_events:
-                    if isinstance(event, EventFailed):
-                        raise Executor.SimulationFailed(
-                            "Job {} ({}) failed. Aborting.".format(event.info["job"], event.info["app"]))
+            # Wait for the next messages from manager (or until the next time event
+            # or delayed job submission is due)
+            wait_time = time_ticker.get_seconds_to_next_tick(datetime.now())
+            submit_wait_time = self.job_submitter.get_wait_time()
+            if submit_wait_time is not None:
+                wait_time = min(wait_time, submit_wait_time)
+            new_events = self.event_manager.get_latest_events(batch_size=self.event_batch_size,
+                                                              timeout=wait_time)
 
-            # completed job id's
-            completed_jobs = set([e.info["job"]
-                for e in self.event_manager.get_events(type_filter="Complete")
-                if e.info["job"].count(".") == 0])
-            if len(completed_jobs) > len(completed_jobs_prev):
-                logger.info("completed_jobs: {}/{}".format(len(completed_jobs), len(self.jobs)))
-                completed_jobs_prev = completed_jobs
+            # update the completed jobs with the new events only
+            self.update_outstanding_jobs(new_events)
+            self.collect_submissions()
+            self.journal.flush()
 
             # update cycle counter and ref time
             i_submission_cycle += 1
 
+        # collect the last submissions (for the simulation summary)
+        while self.job_submitter.n_outstanding():
+            self.collect_submissions(timeout=None)
+
         # Finally stop the event dispatcher
         logger.info("Total #events received: {}".format(self.event_manager.get_total_n_events()))
 
-    def submit_eligible_jobs(self, new_events=None):
+    def update_outstanding_jobs(self, new_events):
         """
-        Submit the jobs eligible for submission
+        Remove the jobs completed by the new events from the outstanding jobs
         :param new_events:
         :return:
         """
 
-        submittable_jobs = []
+        n_outstanding_prev = len(self.outstanding_jobs)
 
-        if not new_events:
-            submittable_jobs = [j for j in self.jobs if not j.depends and j.id not in self.submitted_jobs]
-            self.submitted_jobs.update(j.id for j in submittable_jobs)
+        for event in new_events:
+            if isinstance(event, EventFailed):
+                raise Executor.SimulationFailed(
+                    "Job {} ({}) failed. Aborting.".format(event.info["job"], event.info["app"]))
 
-        else:
-            for new_event in new_events:
+            # completed job id's (sub-jobs are not accounted for)
+            if isinstance(event, EventComplete) and event.info["job"].count(".") == 0:
+                if self.journal is not None and event.info["job"] in self.outstanding_jobs:
+                    self.journal.event("complete", event.info["job"], event.reception_time)
+                self.outstanding_jobs.discard(event.info["job"])
+
+                # keep track of the end of the timed jobs (for the simulation summary)
+                if event.info["job"] in self.timed_jobs and event.reception_time is not None:
+                    self.last_timed_completion_time = max(event.reception_time,
+                                                          self.last_timed_completion_time or event.reception_time)
 
-                triggered = self.deps_to_jobs_tree.get(new_event.get_hashed(), [])
-                for j in triggered:
+        if len(self.outstanding_jobs) < n_outstanding_prev:
+            logger.info("completed_jobs: {}/{}".format(len(self.jobs) - len(self.outstanding_jobs), len(self.jobs)))
 
-                    if new_event.get_hashed() in self.job_to_deps[j.id]:
-                        self.job_to_deps[j.id].remove(new_event.get_hashed())
+    def submit_eligible_jobs(self, new_events=None):
+        """
+        Submit the jobs eligible for submission
+        :param new_events:
+        :return:
+        """
+
+        # satisfy the dependencies on the new events
+        for new_event in new_events or []:
+            self.dag_scheduler.satisfy(new_event.get_hashed())
 
-                    if not self.job_to_deps[j.id] and j.id not in self.submitted_jobs:
-                        submittable_jobs.append(j)
-                        self.submitted_jobs.add(j.id)
+        submittable_jobs = self.dag_scheduler.pop_ready()
 
-        if not submittable_jobs:
-            return
+        if self.journal is not None:
+            t_ready = datetime.now().timestamp()
+            for job in submittable_jobs:
+                self.journal.event("ready", job.id, t_ready)
 
-        # submit the jobs
-        submission_output = self.job_submitter.submit(submittable_jobs)
+        # queue the jobs for submission (completions are collected later, without blocking)
+        if submittable_jobs:
+            self.job_submitter.submit_async(submittable_jobs)
 
-        min_submission_time = None
-        for tt, jid, output in submission_output:
-            t_ep = tt.timestamp()
-            min_submission_time = min( t_ep, min_submission_time ) if min_submission_time else t_ep
+    def collect_submissions(self, timeout=0.0):
+        """
+        Collect the job submissions completed so far
+        :param timeout: max time to wait for a submission to complete (s), None to wait indefinitely
+        :return:
+        """
+
+        for tt, jid, output in self.job_submitter.poll(timeout=timeout):
 
-        # start the timer if any of the submitted jobs was a "timed" job
-        if any([j.is_job_timed for j in submittable_jobs]) and not self.initial_submission_time:
-            self.initial_submission_time = min_submission_time
+            if self.journal is not None:
+                self.journal.event("submitted", jid, tt.timestamp())
+
+            # start the timer at the first submission of a "timed" job
+            if jid in self.timed_jobs:
+                t_ep = tt.timestamp()
+                self.initial_submission_time = min(t_ep, self.initial_submission_time or t_ep)
 
     def print_summary(self):
         """
@@ -176,15 +233,8 @@ class ExecutorEventsPar(Executor):
         # print TOTAL TIMED simulation time (= T_end_last_timed_job - T_start_first_timed_job)
         if self.initial_submission_time:
 
-            jobid_to_timed_flag = {j.id: j.is_job_timed for j in self.jobs}
-            completed_jobs_and_timings = [(ev, time) for (ev, time) in self.event_manager.get_timed_events()
-                                          if isinstance(ev, EventComplete)]
-
-            times_of_timed_jobs = [time for (ev, time) in completed_jobs_and_timings
-                                   if jobid_to_timed_flag.get(ev.info["job"], False)]
-
-            if times_of_timed_jobs:
-                last_timed_msg_timestamp = max(times_of_timed_jobs)
+            if self.last_timed_completion_time:
+                last_timed_msg_timestamp = self.last_timed_completion_time
                 timed_simulation_time = last_timed_msg_timestamp - self.initial_submission_time
 
                 logger.info("=" * 37)
@@ -1,4 +1,5 @@
 #!/usr/bin/env python
+from kronos_executor.dag_scheduler import DAGScheduler
 from kronos_executor.executor import Executor
 
 
@@ -16,29 +17,33 @@ class ExecutorDepsScheduler(Executor):
 
         super(ExecutorDepsScheduler, self).__init__(config, schedule, arg_config=arg_config)
 
-    def do_run(self):
+        self.dag_scheduler = None
+
+    def setup(self):
         """
-        Specific run function for this type of execution
+        Some preparation before the simulation
         :return:
         """
 
-        while len(self.jobs) != 0:
-            submittable = []
-            job_deps = []
-            for j in self.jobs:
+        super(ExecutorDepsScheduler, self).setup()
 
-                try:
-                    depends = j.depends
-                    depend_ids = [self.submitted_job_ids[d] for d in depends]
+        # a job can be submitted once all the jobs it depends on have been submitted
+        # (checks that all the dependencies can be satisfied)
+        self.dag_scheduler = DAGScheduler(self.jobs, lambda j: [(d, d) for d in j.depends])
+
+    def do_run(self):
+        """
+        Specific run function for this type of execution
+        :return:
+        """
 
-                    # We have found a job
-                    submittable.append(j)
-                    job_deps.append(depend_ids)
+        while self.dag_scheduler.n_pending() or self.job_submitter.n_outstanding():
 
-                except KeyError:
-                    # Go on to the next job in the list
-                    pass
+            submittable = self.dag_scheduler.pop_ready()
+            if submittable:
+                job_deps = [[self.submitted_job_ids[d] for d in j.depends] for j in submittable]
+                self.job_submitter.submit_async(submittable, job_deps)
 
-            self.job_submitter.submit(submittable, job_deps)
-            for job in submittable:
-                self.jobs.remove(job)
+            # the dependent jobs can be submitted as soon as each submission completes
+            for tt, jid, output in self.job_submitter.poll(timeout=self.job_submitter.get_wait_time()):
+                self.dag_scheduler.satisfy(jid)
@@ -1,12 +1,29 @@
 #!/usr/bin/env python
 
+import concurrent.futures
+import json
+import mmap
 import os
+import time
+import zlib
+
+import numpy as np
 
 from .global_config import global_config
 
 
 # Global configuration (configured by CMake)
 
+# files are written by chunks of this size
+write_chunk_size = 4 * 1024 * 1024
+
+# O_DIRECT requires the sizes of the writes to be a multiple of the block size
+direct_io_alignment = 4096
+
+# manifest of the read cache, listing the generated files
+manifest_name = "read-cache-manifest.json"
+manifest_version = 1
+
 
 def human_readable_bytes(num):
     """
@@ -44,40 +61,192 @@ def enumerate_cache_files(path, multiplicity=None, size_min=None, size_max=None)
         yield (file, size)
 
 
+def _manifest_path(path):
+    return os.path.join(path, manifest_name)
+
+
+def load_manifest(path):
+    """
+    Load the manifest of the read cache in 'path'
+
+    :return: the manifest (dict), or None if there is no (valid) manifest
+    """
+    try:
+        with open(_manifest_path(path), 'r') as f:
+            manifest = json.load(f)
+    except (IOError, ValueError):
+        return None
+
+    if not isinstance(manifest, dict) or manifest.get("version") != manifest_version:
+        return None
+
+    return manifest
+
+
 def test_read_cache(path, multiplicity=None, min_size=None, max_size=None):
     """
     Test that the directory 'path' is initialised properly
+    (the files are checked against the manifest, if any, using their stat() information only)
 
     :return: True if correct, else False
     """
+    manifest = load_manifest(path)
+    manifest_files = {} if manifest is None else manifest["files"]
+
     for filename, size in enumerate_cache_files(path, multiplicity, min_size, max_size):
 
-        if not (os.path.exists(filename) and os.path.isfile(filename)):
+        try:
+            st = os.stat(filename)
+        except OSError:
+            st = None
+
+        if st is None or not os.path.isfile(filename):
             print("File missing: {}".format(filename))
             return False
 
-        real_size = os.path.getsize(filename)
-        if real_size != size:
-            print("File size incorrect for {}. Expected {}, found {}".format(filename, size, real_size))
+        if st.st_size != size:
+            print("File size incorrect for {}. Expected {}, found {}".format(filename, size, st.st_size))
+            return False
+
+        # the file must not have been modified since it was generated
+        entry = manifest_files.get(os.path.basename(filename))
+        if manifest is not None and (entry is None or entry["size"] != size or entry["mtime_ns"] != st.st_mtime_ns):
+            print("File {} does not match the read cache manifest".format(filename))
             return False
 
     return True
 
 
-def generate_read_cache(path, multiplicity=None, size_min=None, size_max=None):
+def verify_read_cache(path):
     """
-    In the directory 'path', generate the read cache files
+    Verify the checksums of all the files listed in the manifest of the read cache in 'path'
+    (reads all the files)
+
+    :return: True if correct, else False
     """
-    if not os.path.exists(path):
-        os.makedirs(path)
+    manifest = load_manifest(path)
+    if manifest is None:
+        print("No read cache manifest in {}".format(path))
+        return False
+
+    for name, entry in manifest["files"].items():
+        filename = os.path.join(path, name)
+
+        checksum = 0
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(write_chunk_size), b''):
+                checksum = zlib.crc32(chunk, checksum)
+
+        if checksum != entry["crc32"]:
+            print("Checksum incorrect for {}. Expected {}, found {}".format(filename, entry["crc32"], checksum))
+            return False
+
+    return True
+
 
-    for filename, size in enumerate_cache_files(path, multiplicity, size_min, size_max):
+def _aligned_buffer(size):
+    """
+    Page-aligned writable buffer (as required by O_DIRECT)
+    """
+    return mmap.mmap(-1, size)
 
-        with open(filename, 'w') as f:
 
-            # Note that just using truncate creates a sparse file, as will any method that just seeks and writes
-            # a small number of bytes. We need to force there to be actual file output to generate actual files
-            # of the right size --- necessary as we want to test read performance in benchmarking...
+def write_cache_file(filename, size, seed=0, chunk_size=None, use_fallocate=False, direct_io=False):
+    """
+    Write a read cache file of the given size, streaming chunks of incompressible (pseudo-random) data
+
+    Note that just using truncate creates a sparse file, as will any method that just seeks and writes
+    a small number of bytes. We need to force there to be actual file output to generate actual files
+    of the right size --- necessary as we want to test read performance in benchmarking...
+
+    :param filename: file to write
+    :param size: size of the file (bytes)
+    :param seed: seed of the data
+    :param chunk_size: size of the chunks written at once (bytes)
+    :param use_fallocate: allocate the whole file upfront (posix_fallocate)
+    :param direct_io: write with O_DIRECT, bypassing the page cache (if the sizes are block-aligned)
+    :return: CRC32 of the file
+    """
+    chunk_size = min(chunk_size or write_chunk_size, size) or 1
+
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    if direct_io:
+        if not hasattr(os, "O_DIRECT"):
+            raise ValueError("O_DIRECT is not supported on this platform")
+        if size % direct_io_alignment == 0 and chunk_size % direct_io_alignment == 0:
+            flags |= os.O_DIRECT
+
+    # a random chunk, made different for each write by xor-ing it with a (random) 64-bit key
+    rng = np.random.default_rng(seed)
+    n_words = (chunk_size + 7) // 8
+    base = rng.integers(0, 2 ** 64, size=n_words, dtype=np.uint64, endpoint=False)
+    chunk = _aligned_buffer(8 * n_words)
+    words = np.frombuffer(chunk, dtype=np.uint64)
+
+    checksum = 0
+    fd = os.open(filename, flags, 0o644)
+    try:
+        if use_fallocate and size > 0 and hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(fd, 0, size)
+
+        offset = 0
+        while offset < size:
+            n_bytes = min(chunk_size, size - offset)
+            np.bitwise_xor(base, rng.integers(0, 2 ** 64, dtype=np.uint64, endpoint=False), out=words)
+
+            with memoryview(chunk)[:n_bytes] as data:
+                written = 0
+                while written < n_bytes:
+                    written += os.write(fd, data[written:])
+                checksum = zlib.crc32(data, checksum)
+            offset += n_bytes
+    finally:
+        os.close(fd)
+        del words
+        chunk.close()
+
+    return checksum
+
+
+def generate_read_cache(path, multiplicity=None, size_min=None, size_max=None,
+                        n_workers=1, use_fallocate=False, direct_io=False, chunk_size=None):
+    """
+    In the directory 'path', generate the read cache files, and the manifest describing them
+
+    :param n_workers: number of files written in parallel
+    :param use_fallocate: allocate each file upfront
+    :param direct_io: write the files with O_DIRECT (bypassing the page cache)
+    :param chunk_size: size of the chunks written at once (bytes)
+    :return: total number of bytes written, elapsed time (s)
+    """
+    if not os.path.exists(path):
+        os.makedirs(path)
 
-            f.write('\0' * size)
-            # f.truncate(size)
+    # invalidate any previous manifest while the files are being written
+    if os.path.exists(_manifest_path(path)):
+        os.remove(_manifest_path(path))
+
+    files = list(enumerate_cache_files(path, multiplicity, size_min, size_max))
+
+    def write_file(i_file):
+        filename, size = files[i_file]
+        checksum = write_cache_file(filename, size, seed=i_file, chunk_size=chunk_size,
+                                    use_fallocate=use_fallocate, direct_io=direct_io)
+        return {"size": size, "crc32": checksum, "mtime_ns": os.stat(filename).st_mtime_ns}
+
+    t_start = time.perf_counter()
+    if n_workers > 1 and len(files) > 1:
+        with concurrent.futures.ThreadPoolExecutor(n_workers) as pool:
+            entries = list(pool.map(write_file, range(len(files))))
+    else:
+        entries = [write_file(i_file) for i_file in range(len(files))]
+    elapsed = time.perf_counter() - t_start
+
+    manifest = {
+        "version": manifest_version,
+        "files": {os.path.basename(filename): entry for (filename, _), entry in zip(files, entries)}
+    }
+    with open(_manifest_path(path), 'w') as f:
+        json.dump(manifest, f, indent=1)
+
+    return sum(size for _, size in files), elapsed
@@ -3,10 +3,42 @@ import jinja2
 import math
 import os
 import stat
+import threading
 
 from kronos_executor.base_job import BaseJob
 
 
+# template environments shared by all the jobs (so that each template is compiled only once)
+_template_envs = {}
+_template_envs_lock = threading.Lock()
+
+
+def get_template_env(templates_path):
+    """
+    Jinja environment looking up the job templates in the current directory, then in the
+    given paths, then in the Kronos templates
+    :param templates_path: list of directories
+    :return:
+    """
+    if isinstance(templates_path, str):
+        templates_path = [templates_path]
+
+    key = (os.getcwd(), tuple(templates_path))
+    with _template_envs_lock:
+        template_env = _template_envs.get(key)
+        if template_env is None:
+            template_loader = jinja2.ChoiceLoader([
+                jinja2.FileSystemLoader(os.getcwd()),
+                jinja2.FileSystemLoader(list(templates_path)),
+                jinja2.PackageLoader('kronos_executor', 'job_templates')
+            ])
+            # the templates do not change during the setup, no need to check them for each job
+            template_env = jinja2.Environment(loader=template_loader, auto_reload=False)
+            _template_envs[key] = template_env
+
+    return template_env
+
+
 class HPCJob(BaseJob):
 
     default_template = None
@@ -19,15 +51,15 @@ class HPCJob(BaseJob):
         super(HPCJob, self).__init__(job_config, executor, path)
 
         self.submit_script = os.path.join(self.path, "submit_script")
+        self.batch_submit_script = os.path.join(self.path, "batch_submit_script")
         self.output_file = os.path.join(self.path, "output")
         self.error_file = os.path.join(self.path, "error")
 
-        template_loader = jinja2.ChoiceLoader([
-            jinja2.FileSystemLoader(os.getcwd()),
-            jinja2.FileSystemLoader(executor.config.get('job_templates_path', [])),
-            jinja2.PackageLoader('kronos_executor', 'job_templates')
-        ])
-        self.template_env = jinja2.Environment(loader=template_loader)
+        self.template_env = get_template_env(executor.config.get('job_templates_path', []))
+
+        # scheduler configuration, for the submission as part of a job array
+        self.scheduler_config = None
+        self.batch_key = None
 
         self.job_template_name = job_config.get("job_template", self.default_template)
         if self.job_template_name is None:
@@ -99,10 +131,17 @@ class HPCJob(BaseJob):
         script_format.setdefault('launch_command',
                 self.executor.execution_context.launch_command(script_format, override_launcher))
 
+        # jobs with the same scheduler directives (but for their name and outputs) can be
+        # submitted together as a job array
+        if self.executor.execution_context.supports_batch_submission() and override_scheduler is None:
+            self.scheduler_config = script_format
+            self.batch_key = self.executor.execution_context.scheduler_params(
+                dict(script_format, job_name="", job_output_file="", job_error_file=""))
+
+        # rendered at once, to write the script in a single go
         template = self.template_env.get_template(self.job_template_name)
-        stream = template.stream(script_format)
         with open(self.submit_script, 'w') as f:
-            stream.dump(f)
+            f.write(template.render(script_format))
 
         os.chmod(self.submit_script, stat.S_IRWXU | stat.S_IROTH | stat.S_IXOTH | stat.S_IRGRP | stat.S_IXGRP)
 
@@ -119,3 +158,61 @@ class HPCJob(BaseJob):
         config['job_error_file'] = self.error_file
         return self.executor.execution_context.submit_command(
             config, self.submit_script, depend_job_ids)
+
+    def get_batch_key(self):
+        """
+        Jobs with the same key can be submitted together (None if the job cannot be batched)
+        """
+        return self.batch_key
+
+    def create_batch(self, jobs):
+        """
+        Group jobs (with the same batch key as this one) for a single submission
+        """
+        return HPCJobBatch(jobs)
+
+
+class HPCJobBatch(object):
+    """
+    Independent HPC jobs of the same shape, submitted at once as a job array
+    """
+
+    def __init__(self, jobs):
+
+        self.jobs = jobs
+        self.id = "batch-{}".format(jobs[0].id)
+        self.execution_context = jobs[0].executor.execution_context
+
+        self.submit_script = jobs[0].batch_submit_script
+
+        config = jobs[0].scheduler_config.copy()
+        config.update({
+            'job_name': 'kron-batch-{}'.format(jobs[0].id),
+            'job_output_file': "{}.{}.output".format(self.submit_script, self.execution_context.array_index_pattern),
+            'job_error_file': "{}.{}.error".format(self.submit_script, self.execution_context.array_index_pattern)
+        })
+        self.config = config
+
+        with open(self.submit_script, 'w') as f:
+            f.write(self.execution_context.batch_script(
+                config, [(j.submit_script, j.output_file, j.error_file) for j in jobs]))
+
+        os.chmod(self.submit_script, stat.S_IRWXU | stat.S_IROTH | stat.S_IXOTH | stat.S_IRGRP | stat.S_IXGRP)
+
+        self.job_outputs = None
+
+    def get_submission_arguments(self, depend_job_ids):
+        assert not depend_job_ids
+        return self.execution_context.batch_submit_command(self.config, self.submit_script, len(self.jobs))
+
+    def submission_callback(self, output):
+        """
+        Hand over the id of each job to the job
+        """
+        job_ids = self.execution_context.batch_job_ids(output, len(self.jobs))
+        if len(job_ids) != len(self.jobs):
+            raise ValueError("Submission of {} jobs returned {} job ids".format(len(self.jobs), len(job_ids)))
+
+        self.job_outputs = [jid.encode("utf-8") for jid in job_ids]
+        for job, job_output in zip(self.jobs, self.job_outputs):
+            job.submission_callback(job_output)
@@ -0,0 +1,118 @@
+# (C) Copyright 1996-2018 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+import os
+import pickle
+
+
+class KResultsCache(object):
+    """
+    Persistent cache of the parsed results of the jobs of a run (one binary file in the run
+    directory). The entry of each job is keyed on the size and modification time of its files,
+    so that jobs whose results changed are read again.
+    """
+
+    cache_file_name = ".kresults-cache.pkl"
+    cache_version = 2
+
+    def __init__(self, sim_path):
+
+        self.path = os.path.join(sim_path, self.cache_file_name)
+
+        # job dir (relative to the run path) -> (key, data)
+        self.entries = {}
+
+        self.modified = False
+
+    @staticmethod
+    def file_key(dir_entry):
+        """
+        Key of a file (size and modification time)
+        :param dir_entry: os.DirEntry of the file (or None if the file is missing)
+        :return:
+        """
+
+        if dir_entry is None:
+            return None
+
+        st = dir_entry.stat()
+        return st.st_size, st.st_mtime_ns
+
+    def load(self):
+        """
+        Load the cache file (a missing or unreadable cache is ignored)
+        :return:
+        """
+
+        try:
+            with open(self.path, "rb") as f:
+                cached = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return
+
+        if isinstance(cached, dict) and cached.get("version") == self.cache_version:
+            self.entries = cached["entries"]
+
+    def get(self, job_dir, key):
+        """
+        Cached data of a job
+        :param job_dir: job dir (relative to the run path)
+        :param key: current key of the job files
+        :return: cached data, or None if not cached or out of date
+        """
+
+        entry = self.entries.get(job_dir)
+        if entry is None or key is None or entry[0] != key:
+            return None
+
+        return entry[1]
+
+    def put(self, job_dir, key, data):
+        """
+        Cache the data of a job
+        :param job_dir: job dir (relative to the run path)
+        :param key: key of the job files
+        :param data: data to cache
+        :return:
+        """
+
+        if key is not None:
+            self.entries[job_dir] = (key, data)
+            self.modified = True
+
+    def prune(self, job_dirs):
+        """
+        Remove the entries of the jobs not in the given list
+        :param job_dirs: job dirs (relative to the run path)
+        :return:
+        """
+
+        for job_dir in set(self.entries).difference(job_dirs):
+            del self.entries[job_dir]
+            self.modified = True
+
+    def save(self):
+        """
+        Write the cache file if it has been modified (the results are still usable if it cannot be written)
+        :return:
+        """
+
+        if not self.modified:
+            return
+
+        tmp_path = self.path + ".tmp.{}".format(os.getpid())
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump({"version": self.cache_version, "entries": self.entries}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+            self.modified = False
+        except OSError as e:
+            print("Warning: could not write the results cache {}: {}".format(self.path, e))
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -8,15 +8,159 @@
 
 import json
 import math
+import multiprocessing
 import os
+import re
 import sys
 from collections import OrderedDict
 
+import numpy as np
+
 from kronos_executor.io_formats.definitions import kresults_stats_info, kresults_ts_names_map
+from kronos_executor.io_formats.results_archive import ResultsArchive
+from kronos_executor.io_formats.results_format import ResultsFormat
+from kronos_executor.io_formats.format_data_handlers.kresults_cache import KResultsCache
 from kronos_executor.io_formats.format_data_handlers.kresults_decorator import KResultsDecorator
-from kronos_executor.tools import add_value_to_sublist
+from kronos_executor.tools import add_counts_to_bins, add_values_to_bins
 from kronos_executor.definitions import signal_types
-from kronos_executor.io_formats.format_data_handlers.kresults_job import KResultsJob
+from kronos_executor.io_formats.format_data_handlers.kresults_job import KResultsJob, stats_sum_fields
+
+
+def pack_job_results(json_data, metadata, time_series):
+    """
+    Compact form of the results of a job, with the rank series as numpy arrays (much faster to pickle,
+    to pass them between processes and to cache them)
+    :return: (KResults data, job metadata, time series) tuple
+    """
+
+    packed_json = dict(json_data)
+    packed_json["ranks"] = [dict(rank, time_series={k: np.asarray(v) for k, v in rank["time_series"].items()})
+                            if "time_series" in rank else rank
+                            for rank in json_data["ranks"]]
+
+    return packed_json, metadata, time_series
+
+
+def unpack_job_results(json_data, metadata, time_series):
+    """
+    Results of a job from their compact form
+    :return: (KResults data, job metadata, time series) tuple
+    """
+
+    unpacked_json = dict(json_data)
+    unpacked_json["ranks"] = [dict(rank, time_series={k: v.tolist() for k, v in rank["time_series"].items()})
+                              if "time_series" in rank else rank
+                              for rank in json_data["ranks"]]
+
+    return unpacked_json, metadata, time_series
+
+
+def read_job(job_dir, stats_file_name):
+    """
+    Read the results of a job
+    :param job_dir: job dir
+    :param stats_file_name: name of the KResults file
+    :return: KResultsJob, job metadata
+    """
+
+    # Read decorator data from input file
+    with open(os.path.join(job_dir, 'input.json'), 'r') as f:
+        metadata = json.load(f)["metadata"]
+
+    job = KResultsJob.from_kresults_file(os.path.join(job_dir, stats_file_name),
+                                         decorator=KResultsDecorator(**metadata))
+
+    return job, metadata
+
+
+def read_job_results(job_dir, stats_file_name):
+    """
+    Read the results of a job (in a reader process)
+    :param job_dir: job dir
+    :param stats_file_name: name of the KResults file
+    :return: packed (KResults data, job metadata, time series) tuple
+    """
+
+    job, metadata = read_job(job_dir, stats_file_name)
+
+    return pack_job_results(job.json_data, metadata, job.time_series)
+
+
+def read_job_metrics_sums(job_dir, stats_file_name):
+    """
+    Read the sums of the metrics of a job (in a reader process)
+    :param job_dir: job dir
+    :param stats_file_name: name of the KResults file
+    :return: list of the sums of the metrics in signal_types (per-process metrics are divided by
+             the number of processes)
+    """
+
+    job, _ = read_job(job_dir, stats_file_name)
+
+    _metric_perproc_map = {v[0]: v[2] for v in kresults_ts_names_map.values()}
+    job_sums = job.calc_metrics_sums()
+
+    return [(job_sums[k] if not _metric_perproc_map[k] else job_sums[k]/float(job.n_cpu)) if k in job_sums else 0
+            for k in signal_types]
+
+
+def read_job_results_or_none(job_dir, stats_file_name):
+    """
+    Read the results of a job (in a reader process), if they can be read
+    :param job_dir: job dir
+    :param stats_file_name: name of the KResults file
+    :return: packed (KResults data, job metadata, time series) tuple, or None
+    """
+
+    try:
+        return read_job_results(job_dir, stats_file_name)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def read_archive_job_results(shard_filename, job_dirs, stats_file_name):
+    """
+    Read the results of some jobs from a shard of a results archive (in a reader process)
+    :param shard_filename: shard of the archive
+    :param job_dirs: job dirs (relative to the run path)
+    :param stats_file_name: name of the KResults file
+    :return: list of (job dir, packed (KResults data, job metadata, time series) tuple)
+    """
+
+    metadata = {}
+    json_data = {}
+    file_paths = [os.path.join(job_dir, file_name)
+                  for job_dir in job_dirs for file_name in ("input.json", stats_file_name)]
+    for file_path, f in ResultsArchive.iter_shard_files(shard_filename, file_paths):
+        job_dir, file_name = os.path.split(file_path)
+        if file_name == stats_file_name:
+            json_data[job_dir] = ResultsFormat.from_json_data(json.loads(f.read())).output_dict()
+        else:
+            metadata[job_dir] = json.loads(f.read())["metadata"]
+
+    jobs_data = []
+    for job_dir in job_dirs:
+        job = KResultsJob(json_data[job_dir], decorator_data=KResultsDecorator(**metadata[job_dir]))
+        jobs_data.append((job_dir, pack_job_results(job.json_data, metadata[job_dir], job.time_series)))
+
+    return jobs_data
+
+
+def _starmap(fn, args_list, n_workers=None, chunksize=None):
+    """
+    Apply a reader function to a list of argument tuples, using a pool of reader processes
+    :param fn: function (module-level, so that it can be pickled)
+    :param args_list: list of argument tuples
+    :param n_workers: number of reader processes (default: number of CPUs)
+    :param chunksize: number of calls per task (default: a quarter of the calls per process)
+    :return: list of results (in order)
+    """
+    n_workers = min(n_workers or os.cpu_count() or 1, max(len(args_list), 1))
+    if n_workers > 1:
+        with multiprocessing.Pool(n_workers) as pool:
+            return pool.starmap(fn, args_list, chunksize=chunksize or max(1, len(args_list) // (4 * n_workers)))
+    else:
+        return [fn(*args) for args in args_list]
 
 
 class KResultsData(object):
@@ -41,29 +185,55 @@ class KResultsData(object):
         # n CPU per node used for this sim
         self.n_procs_node = n_procs_node
 
+        # class regex -> jobs in the class (boolean array)
+        self._class_masks = {}
+
+        # sums of the stats of each job (one row per job)
+        self._job_stats_sums = np.zeros((0, len(stats_sum_fields)))
+
+        # (n jobs, time bins, class regex) -> global series of a class
+        self._global_series = {}
+
+        # job dirs already read (relative to the run path), and results cache (when following the run)
+        self._job_dirs = set()
+        self._cache = None
+
     @staticmethod
-    def iter_job_dirs(sim_path, leaf_only=False):
+    def scan_job_dirs(sim_path):
+        """
+        Walk the job dirs of a run (sorted by job ID, parents before their sub-jobs)
+        :param sim_path: run path
+        :return: iterator of (job dir, is_leaf, files) tuples, where files maps the names of the files
+                 in the job dir to their os.DirEntry
+        """
+
         def _traverse(path, first=True):
-            job_dirs = sorted(
-                [x for x in os.listdir(path) if os.path.isdir(os.path.join(path, x)) and "job-" in x],
-                key=(lambda x: int(x.split("-")[-1])))
+            job_dirs = []
+            files = {}
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        if "job-" in entry.name:
+                            job_dirs.append(entry.name)
+                    elif not first:
+                        files[entry.name] = entry
+
+            job_dirs.sort(key=(lambda x: int(x.split("-")[-1])))
 
-            if not first and (not job_dirs or not leaf_only):
-                yield path
+            if not first:
+                yield path, not job_dirs, files
 
             for job_dir in job_dirs:
                 yield from _traverse(os.path.join(path, job_dir), first=False)
+
         return _traverse(sim_path)
 
     @classmethod
-    def check_n_successful_jobs(cls, sim_path):
-
-        # check that the run path contains the job sub-folders
-        job_dirs = cls.iter_job_dirs(sim_path, leaf_only=True)
+    def iter_job_dirs(cls, sim_path, leaf_only=False):
+        return (job_dir for job_dir, is_leaf, _ in cls.scan_job_dirs(sim_path) if is_leaf or not leaf_only)
 
-        # check if there are jobs that didn't write the "statistics.kresults" file (or .krf for back-compatibility)
-        failing_jobs = [job_dir for job_dir in job_dirs
-                        if not os.path.isfile(os.path.join(job_dir, cls.res_file_root+"."+cls.res_file_ext))]
+    @classmethod
+    def check_failing_jobs(cls, failing_jobs):
 
         if failing_jobs:
             print("ERROR: The following jobs have failed (jobs for which " \
@@ -73,148 +243,337 @@ class KResultsData(object):
             sys.exit(1)
 
     @classmethod
-    def read_from_sim_paths(cls, sim_path, sim_name, n_procs_node=None, permissive=False):
+    def check_n_successful_jobs(cls, sim_path):
 
-        # check n of successful jobs
-        if not permissive:
-            cls.check_n_successful_jobs(sim_path)
+        # check if there are jobs that didn't write the "statistics.kresults" file
+        stats_file_name = cls.res_file_root+"."+cls.res_file_ext
+        cls.check_failing_jobs([job_dir for job_dir, is_leaf, files in cls.scan_job_dirs(sim_path)
+                                if is_leaf and stats_file_name not in files])
+
+    @classmethod
+    def scan_result_dirs(cls, sim_path, skip=()):
+        """
+        Job dirs of a run that contain results
+        :param sim_path: run path
+        :param skip: (optional) job dirs to skip (relative to the run path)
+        :return: (list of (job dir relative to the run path, key of the job files), list of the
+                 leaf job dirs without results)
+        """
+
+        stats_file_name = cls.res_file_root+"."+cls.res_file_ext
+
+        job_dirs = []
+        failing_jobs = []
+        for job_dir, is_leaf, files in cls.scan_job_dirs(sim_path):
+            if stats_file_name in files:
+                rel_job_dir = os.path.relpath(job_dir, start=sim_path)
+                if rel_job_dir not in skip:
+                    key = (KResultsCache.file_key(files[stats_file_name]),
+                           KResultsCache.file_key(files.get("input.json")))
+                    job_dirs.append((rel_job_dir, key))
+            elif is_leaf:
+                failing_jobs.append(job_dir)
+
+        return job_dirs, failing_jobs
+
+    @classmethod
+    def read_job_dirs(cls, sim_path, job_dirs, cache, n_workers=None, skip_unreadable=False):
+        """
+        Read the results of some jobs of a run (in parallel), through the results cache
+        :param sim_path: run path
+        :param job_dirs: list of (job dir relative to the run path, key of the job files)
+        :param cache: results cache of the run (updated with the jobs read)
+        :param n_workers: number of reader processes (default: number of CPUs)
+        :param skip_unreadable: skip the jobs whose results cannot be read (e.g. still being written)
+        :return: list of (job dir, KResultsJob) of the jobs read
+        """
 
-        jobs_data = []
-        for job_dir in cls.iter_job_dirs(sim_path):
-            job_dir_rel = os.path.relpath(job_dir, start=sim_path)
-            print("reading data from {}..".format(job_dir_rel))
+        stats_file_name = cls.res_file_root+"."+cls.res_file_ext
+        reader = read_job_results_or_none if skip_unreadable else read_job_results
 
-            job_dir_files = os.listdir(job_dir)
-            kresults_file = [f for f in job_dir_files if f.endswith(cls.res_file_ext)]
+        jobs_data = [cache.get(job_dir, key) for job_dir, key in job_dirs]
+        to_read = [(i_job, job_dir, key) for i_job, ((job_dir, key), data) in enumerate(zip(job_dirs, jobs_data))
+                   if data is None]
 
-            if kresults_file:
-                input_file_path = os.path.join(job_dir, 'input.json')
-                stats_file_path = os.path.join(job_dir, cls.res_file_root+"."+cls.res_file_ext)
+        print("reading data from {} job folders ({} cached)..".format(len(job_dirs), len(job_dirs) - len(to_read)))
 
-                # Read decorator data from input file
-                with open(input_file_path, 'r') as f:
-                    json_data_input = json.load(f)
-                decorator = KResultsDecorator(**json_data_input["metadata"])
+        if to_read:
+            read_args = [(os.path.join(sim_path, job_dir), stats_file_name) for _, job_dir, _ in to_read]
 
-                # Append the profiled job to the "jobs_data" structure
-                jobs_data.append(KResultsJob.from_kresults_file(stats_file_path, decorator=decorator))
+            read_data = _starmap(reader, read_args, n_workers)
+
+            for (i_job, job_dir, key), data in zip(to_read, read_data):
+                jobs_data[i_job] = data
+                if data is not None:
+                    cache.put(job_dir, key, data)
+
+        jobs = []
+        for (job_dir, _), data in zip(job_dirs, jobs_data):
+            if data is not None:
+                json_data, metadata, time_series = unpack_job_results(*data)
+                jobs.append((job_dir, KResultsJob(json_data, decorator_data=KResultsDecorator(**metadata),
+                                                  time_series=time_series)))
+
+        return jobs
+
+    @classmethod
+    def read_from_sim_paths(cls, sim_path, sim_name, n_procs_node=None, permissive=False,
+                            n_workers=None, use_cache=True):
+        """
+        Read the results of all the jobs of a run
+        :param sim_path: run path
+        :param sim_name: simulation name
+        :param n_procs_node: number of CPUs per node
+        :param permissive: ignore the jobs without statistics
+        :param n_workers: number of reader processes (default: number of CPUs)
+        :param use_cache: use (and update) the results cache of the run
+        :return:
+        """
+
+        # results collected in an archive
+        manifest_filename = ResultsArchive.find_manifest(sim_path)
+        if manifest_filename:
+            return cls.read_from_archive(manifest_filename, sim_name, n_procs_node=n_procs_node,
+                                         permissive=permissive, n_workers=n_workers)
+
+        # job dirs containing results (and their file keys)
+        job_dirs, failing_jobs = cls.scan_result_dirs(sim_path)
+
+        # check n of successful jobs
+        if not permissive:
+            cls.check_failing_jobs(failing_jobs)
 
         # and check that the collection was successful..
-        if not jobs_data:
+        if not job_dirs:
             print("Specified path does not contain any job folder (<job-ID>..)!")
             sys.exit(1)
 
-        return cls(jobs=jobs_data, sim_name=sim_name, sim_path=sim_path, n_procs_node=n_procs_node)
+        cache = KResultsCache(sim_path)
+        if use_cache:
+            cache.load()
+            cache.prune([job_dir for job_dir, _ in job_dirs])
 
-    def runtime(self):
+        sim_data = cls(jobs=[], sim_name=sim_name, sim_path=sim_path, n_procs_node=n_procs_node)
+        sim_data.add_jobs(cls.read_job_dirs(sim_path, job_dirs, cache, n_workers=n_workers))
+
+        if use_cache:
+            cache.save()
+
+        return sim_data
+
+    @classmethod
+    def read_metrics_sums(cls, sim_path, permissive=False, n_workers=None):
         """
-        Return the dt of the whole simulation
-        :return:
+        Sums of the metrics of each job of a run. The KResults files are reduced in parallel (only
+        the sums are passed back to the calling process, the time series are not kept).
+        :param sim_path: run path
+        :param permissive: ignore the jobs without statistics
+        :param n_workers: number of reader processes (default: number of CPUs)
+        :return: list of job dirs (relative to the run path), array of the sums (one row per job,
+                 one column per metric in signal_types, per-process metrics are divided by the
+                 number of processes)
         """
-        return self.tmax_epochs - self.tmin_epochs
 
-    @property
-    def tmax_epochs(self):
-        return max([j.t_start + j.duration for j in self.jobs])
+        stats_file_name = cls.res_file_root+"."+cls.res_file_ext
 
-    @property
-    def tmin_epochs(self):
-        return min([j.t_start for j in self.jobs])
+        job_dirs, failing_jobs = cls.scan_result_dirs(sim_path)
 
-    def class_stats(self, job_classes):
+        if not permissive:
+            cls.check_failing_jobs(failing_jobs)
+
+        print("reducing data from {} job folders..".format(len(job_dirs)))
+
+        read_args = [(os.path.join(sim_path, job_dir), stats_file_name) for job_dir, _ in job_dirs]
+
+        jobs_sums = _starmap(read_job_metrics_sums, read_args, n_workers)
+
+        jobs_sums = np.array(jobs_sums, dtype=float).reshape(len(job_dirs), len(signal_types))
+
+        return [job_dir for job_dir, _ in job_dirs], jobs_sums
+
+    @classmethod
+    def read_from_archive(cls, manifest_filename, sim_name, n_procs_node=None, permissive=False, n_workers=None):
         """
-        Calculate a class_stats of a simulations
+        Read the results of all the jobs of a run from a results archive (without extracting it,
+        the shards of the archive are read in parallel)
+        :param manifest_filename: manifest of the archive
+        :param sim_name: simulation name
+        :param n_procs_node: number of CPUs per node
+        :param permissive: ignore the jobs without statistics
+        :param n_workers: number of reader processes (default: number of CPUs)
         :return:
         """
 
-        per_class_stats = {}
-        for job in self.jobs:
-            job_owner_classes = job.get_class_name(job_classes)
+        stats_file_name = cls.res_file_root+"."+cls.res_file_ext
 
-            # add this job to any class that the job belongs to..
-            for class_name in job_owner_classes:
-                per_class_stats.setdefault(class_name, []).append(job.get_stats())
+        archive = ResultsArchive(manifest_filename)
 
-        return per_class_stats
+        job_dirs = [job_dir for job_dir, _ in archive.job_dirs
+                    if os.path.join(job_dir, stats_file_name) in archive.files]
 
-    def class_stats_sums(self, job_classes):
+        # check n of successful jobs
+        if not permissive:
+            cls.check_failing_jobs([job_dir for job_dir, is_leaf in archive.job_dirs
+                                    if is_leaf and os.path.join(job_dir, stats_file_name) not in archive.files])
+
+        if not job_dirs:
+            print("Specified archive does not contain any job folder (<job-ID>..)!")
+            sys.exit(1)
+
+        print("reading data from {} job folders in {} archive shards..".format(len(job_dirs), len(archive.shards)))
+
+        shard_job_dirs = archive.shard_files([os.path.join(job_dir, stats_file_name) for job_dir in job_dirs])
+        read_args = [(archive.shards[i_shard], [os.path.dirname(file_path) for file_path in file_paths],
+                      stats_file_name) for i_shard, file_paths in sorted(shard_job_dirs.items())]
+
+        read_data = _starmap(read_archive_job_results, read_args, n_workers, chunksize=1)
+
+        jobs_data = dict(job_data for shard_data in read_data for job_data in shard_data)
+
+        jobs = []
+        for job_dir in job_dirs:
+            json_data, metadata, time_series = unpack_job_results(*jobs_data[job_dir])
+            jobs.append((job_dir, KResultsJob(json_data, decorator_data=KResultsDecorator(**metadata),
+                                              time_series=time_series)))
+
+        sim_data = cls(jobs=[], sim_name=sim_name, sim_path=manifest_filename, n_procs_node=n_procs_node)
+        sim_data.add_jobs(jobs)
+
+        return sim_data
+
+    def read_new_jobs(self, n_workers=None, use_cache=True):
         """
-        Calculate sums of class_stats of a simulations
+        Read the results of the jobs of the run that have completed since the last read (for
+        following a running simulation). Jobs without results yet, or whose results cannot be read
+        yet, are picked up by a later call.
+        :param n_workers: number of reader processes (default: number of CPUs)
+        :param use_cache: use (and update) the results cache of the run
+        :return: number of new jobs
+        """
+
+        # the run may not have started yet
+        if not os.path.isdir(self.path):
+            return 0
+
+        job_dirs, _ = self.scan_result_dirs(self.path, skip=self._job_dirs)
+        if not job_dirs:
+            return 0
+
+        # the cache is loaded once, and kept across the reads
+        if self._cache is None:
+            self._cache = KResultsCache(self.path)
+            if use_cache:
+                self._cache.load()
+
+        new_jobs = self.read_job_dirs(self.path, job_dirs, self._cache, n_workers=n_workers, skip_unreadable=True)
+        self.add_jobs(new_jobs)
+
+        if use_cache and new_jobs:
+            self._cache.save()
+
+        return len(new_jobs)
+
+    def add_jobs(self, jobs):
+        """
+        Add jobs to the simulation (the aggregated data of the jobs already in is kept)
+        :param jobs: list of (job dir relative to the run path, KResultsJob)
         :return:
         """
 
-        # --------------------------- initialisation ---------------------------
+        for job_dir, job in jobs:
+            self._job_dirs.add(job_dir)
+            self.jobs.append(job)
 
-        # init class stats sum structure
-        per_class_stats_sums = {}
+    def runtime(self):
+        """
+        Return the dt of the whole simulation
+        :return:
+        """
+        return self.tmax_epochs - self.tmin_epochs
 
-        # add a key that contains metric rates from all the classes
-        _all_class_stats_dict = {stat_metric: {field: 0.0 for field in kresults_stats_info[stat_metric]["to_sum"]}
-                                 for stat_metric in kresults_stats_info.keys()}
-        # ----------------------------------------------------------------------
+    @property
+    def tmax_epochs(self):
+        return max([j.t_start + j.duration for j in self.jobs])
 
-        # calculate all the stats for each job class (per_class_stats is a list of lists - one list per job..)
-        per_class_stats = self.class_stats(job_classes)
+    @property
+    def tmin_epochs(self):
+        return min([j.t_start for j in self.jobs])
 
-        # loop over statistics per class
-        for class_name, stats_list in per_class_stats.items():
+    def job_class_mask(self, class_regex=None):
+        """
+        Jobs that belong to a class (calculated once per class)
+        :param class_regex: regex of the class (all the jobs if not set)
+        :return: boolean array over the jobs
+        """
 
-            # initialize all the requested sums..
-            _class_stats_dict = {stat_metric: {field: 0.0 for field in kresults_stats_info[stat_metric]["to_sum"]}
-                                 for stat_metric in kresults_stats_info.keys()}
+        mask = self._class_masks.get(class_regex, np.zeros(0, dtype=bool))
 
-            # loop over stats (per job) and make the sums
-            for job_stats in stats_list:
-                for stat_entry in job_stats:
-                    for stat_metric in stat_entry.keys():
-                        if stat_metric not in kresults_stats_info:
-                            print(f"Warning: skipping unknown metric {stat_metric!r}")
-                            continue
+        # only the jobs added since the last call are matched
+        if len(mask) < len(self.jobs):
+            new_jobs = self.jobs[len(mask):]
+            if not class_regex:
+                new_mask = np.ones(len(new_jobs), dtype=bool)
+            else:
+                pattern = re.compile(class_regex)
+                new_mask = np.array([bool(job.name) and pattern.match(job.label) is not None for job in new_jobs],
+                                    dtype=bool)
 
-                        for field in kresults_stats_info[stat_metric]["to_sum"]:
+            mask = np.concatenate((mask, new_mask))
+            self._class_masks[class_regex] = mask
 
-                            if field in kresults_stats_info[stat_metric].get("per_process", []):
-                                n_procs = len(job_stats)
-                                val = float(stat_entry[stat_metric][field])/float(n_procs)
-                            else:
-                                val = float(stat_entry[stat_metric][field])
+        return mask
 
-                            # add the summable metrics to class stats
-                            _class_stats_dict[stat_metric][field] += val
+    def class_membership(self, job_classes):
+        """
+        Jobs in each class (a job can be in multiple classes, and the jobs that are in none
+        of them are in the "generic_class")
+        :param job_classes: class name -> class regex
+        :return: class name -> boolean array over the jobs, for the non-empty classes (in order of
+                 first appearance in the jobs)
+        """
 
-                            # add the summable metrics to all-class stats
-                            _all_class_stats_dict[stat_metric][field] += val
+        masks = OrderedDict((class_name, self.job_class_mask(class_regex))
+                            for class_name, class_regex in job_classes.items())
 
-            # Filter the fields for which aggregated time is still 0 (no operations have been summed up)
-            for stat_metric in list(_class_stats_dict.keys()):
-                if _class_stats_dict[stat_metric]["elapsed"] == 0.0:
-                    _class_stats_dict.pop(stat_metric)
+        # If no specific classes are found, a "generic_class"
+        generic_mask = np.ones(len(self.jobs), dtype=bool)
+        for mask in masks.values():
+            generic_mask &= ~mask
+        masks["generic_class"] = generic_mask
 
-            # also calculate the rates (according to the fields defined in kresults_stats_info)
-            for stat_metric in _class_stats_dict.keys():
+        non_empty = [(int(np.argmax(mask)), i_class, class_name)
+                     for i_class, (class_name, mask) in enumerate(masks.items()) if mask.any()]
 
-                # numerator and denominator for rate calculation
-                num, den = kresults_stats_info[stat_metric]["def_rate"]
+        return OrderedDict((class_name, masks[class_name]) for _, _, class_name in sorted(non_empty))
 
-                # conversion factor
-                fc = kresults_stats_info[stat_metric]["conv"]
+    def class_stats(self, job_classes):
+        """
+        Calculate a class_stats of a simulations
+        :return:
+        """
 
-                # get the rate
-                rate = fc * _class_stats_dict[stat_metric][num] / _class_stats_dict[stat_metric][den]
+        return {class_name: [job.get_stats() for job, in_class in zip(self.jobs, mask) if in_class]
+                for class_name, mask in self.class_membership(job_classes).items()}
 
-                _class_stats_dict[stat_metric]["rate"] = rate
+    @staticmethod
+    def _stats_sums_dict(stats_sums):
+        """
+        Class stats from the sums of the stats fields
+        :param stats_sums: array of the sums of the fields in stats_sum_fields
+        :return:
+        """
 
-            # collect and store per-class stats
-            per_class_stats_sums[class_name] = _class_stats_dict
+        _class_stats_dict = {stat_metric: {} for stat_metric in kresults_stats_info.keys()}
+        for (stat_metric, field), val in zip(stats_sum_fields, stats_sums.tolist()):
+            _class_stats_dict[stat_metric][field] = val
 
-        # ------- clean-up the all-class data -------
         # Filter the fields for which aggregated time is still 0 (no operations have been summed up)
-        for stat_metric in list(_all_class_stats_dict.keys()):
-            if _all_class_stats_dict[stat_metric]["elapsed"] == 0.0:
-                _all_class_stats_dict.pop(stat_metric)
+        for stat_metric in list(_class_stats_dict.keys()):
+            if _class_stats_dict[stat_metric]["elapsed"] == 0.0:
+                _class_stats_dict.pop(stat_metric)
 
         # also calculate the rates (according to the fields defined in kresults_stats_info)
-        for stat_metric in _all_class_stats_dict.keys():
+        for stat_metric in _class_stats_dict.keys():
 
             # numerator and denominator for rate calculation
             num, den = kresults_stats_info[stat_metric]["def_rate"]
@@ -223,12 +582,41 @@ class KResultsData(object):
             fc = kresults_stats_info[stat_metric]["conv"]
 
             # get the rate
-            rate = fc * _all_class_stats_dict[stat_metric][num] / _all_class_stats_dict[stat_metric][den]
+            rate = fc * _class_stats_dict[stat_metric][num] / _class_stats_dict[stat_metric][den]
+
+            _class_stats_dict[stat_metric]["rate"] = rate
+
+        return _class_stats_dict
+
+    def class_stats_sums(self, job_classes):
+        """
+        Calculate sums of class_stats of a simulations
+        :return:
+        """
+
+        # sums of the stats of each job (one row per job, only the jobs added since the last call are summed)
+        if len(self._job_stats_sums) < len(self.jobs):
+            new_jobs = self.jobs[len(self._job_stats_sums):]
+            self._job_stats_sums = np.concatenate((
+                self._job_stats_sums,
+                np.array([job.stats_sums() for job in new_jobs]).reshape(len(new_jobs), len(stats_sum_fields))))
 
-            _all_class_stats_dict[stat_metric]["rate"] = rate
+        job_stats_sums = self._job_stats_sums
+
+        per_class_stats_sums = {}
+
+        # sums of all the classes (a job counts once for each class it belongs to)
+        _all_class_stats_sums = np.zeros(len(stats_sum_fields))
+
+        for class_name, mask in self.class_membership(job_classes).items():
+            _class_stats_sums = job_stats_sums[mask].sum(axis=0)
+            _all_class_stats_sums += _class_stats_sums
+
+            # collect and store per-class stats
+            per_class_stats_sums[class_name] = self._stats_sums_dict(_class_stats_sums)
 
         # collect and store the all-class stats
-        per_class_stats_sums["all_classes"] = _all_class_stats_dict
+        per_class_stats_sums["all_classes"] = self._stats_sums_dict(_all_class_stats_sums)
 
         return per_class_stats_sums
 
@@ -257,30 +645,36 @@ class KResultsData(object):
             running_jpn.update({"nodes": [0]*len(times)})
 
         found = 0
-        for job in self.jobs:
+        first = []
+        last = []
+        n_cpus = []
+        for job, in_class in zip(self.jobs, self.job_class_mask(job_class_regex)):
 
-            if job.is_in_class(job_class_regex):
+            if in_class:
 
                 found += 1
-                first = int(math.ceil((job.t_start - t0_epoch_wl - times[0]) / bin_width))
-                last = int(math.floor((job.t_end - t0_epoch_wl - times[0]) / bin_width))
+                job_first = int(math.ceil((job.t_start - t0_epoch_wl - times[0]) / bin_width))
+                job_last = int(math.floor((job.t_end - t0_epoch_wl - times[0]) / bin_width))
 
                 # last index should always be >= first+1
-                last = last if last > first else first + 1
+                first.append(job_first)
+                last.append(job_last if job_last > job_first else job_first + 1)
+                n_cpus.append(job.n_cpu)
 
-                # #jobs
-                running_jpn["jobs"] = add_value_to_sublist(running_jpn["jobs"], first, last, 1)
+        # #jobs
+        running_jpn["jobs"] = add_counts_to_bins(len(times), first, last, 1).tolist()
 
-                # #procs
-                running_jpn["procs"] = add_value_to_sublist(running_jpn["procs"], first, last, job.n_cpu)
+        # #procs
+        running_jpn["procs"] = add_counts_to_bins(len(times), first, last, n_cpus).tolist()
 
-                if self.n_procs_node:
+        if self.n_procs_node:
 
-                    # #nodes
-                    n_nodes = job.n_cpu//int(self.n_procs_node) if not job.n_cpu % int(self.n_procs_node) else \
-                        job.n_cpu//int(self.n_procs_node)+1
+            # #nodes
+            n_procs_node = int(self.n_procs_node)
+            n_nodes = [n_cpu//n_procs_node if not n_cpu % n_procs_node else n_cpu//n_procs_node+1
+                       for n_cpu in n_cpus]
 
-                    running_jpn["nodes"] = add_value_to_sublist(running_jpn["nodes"], first, last, n_nodes)
+            running_jpn["nodes"] = add_counts_to_bins(len(times), first, last, n_nodes).tolist()
 
         return found, times, running_jpn
 
@@ -299,40 +693,50 @@ class KResultsData(object):
 
         for ts_name in signal_types:
 
-            _values = [0]*len(times)
-            _elapsed = [0]*len(times)
-            _processes = [0]*len(times)
+            first = []
+            last = []
+            values = []
+            elapsed = []
 
-            for jj, job in enumerate(self.jobs):
+            for job, in_class in zip(self.jobs, self.job_class_mask(job_class_regex)):
 
                 if job.label:
-                    if job.is_in_class(job_class_regex):
+                    if in_class:
 
                         found += 1
 
                         if job.time_series.get(ts_name):
 
                             # job_ts_timestamps includes the t_0 of each interval
-                            job_ts_timestamps = [0] + job.time_series[ts_name]["times"]
+                            job_ts_timestamps = np.concatenate(([0], job.time_series[ts_name]["times"]))
                             t_start = job.t_start
 
-                            for tt in range(1, len(job_ts_timestamps)):
-
-                                first = int(math.floor((job_ts_timestamps[tt-1] + t_start-tmin_epochs) / bin_width))
-                                last = int(math.ceil((job_ts_timestamps[tt] + t_start-tmin_epochs) / bin_width))
-
-                                # make sure that last is always > first
-                                last = last if last > first else first + 1
-
-                                # make sure that n_span_bin is >= 1
-                                n_span_bin = max(1, last-first)
-
-                                # counter to get the value corresponding to the time interval
-                                value_count = tt-1
-
-                                _values = add_value_to_sublist(_values, first, last, job.time_series[ts_name]["values"][value_count]/float(n_span_bin))
-                                _elapsed = add_value_to_sublist(_elapsed, first, last, job.time_series[ts_name]["elapsed"][value_count]/float(n_span_bin))
-                                _processes = add_value_to_sublist(_processes, first, last, 1)
+                            job_first = np.floor((job_ts_timestamps[:-1] + t_start-tmin_epochs) / bin_width)
+                            job_last = np.ceil((job_ts_timestamps[1:] + t_start-tmin_epochs) / bin_width)
+
+                            # make sure that last is always > first (so that n_span_bin is >= 1)
+                            job_last = np.where(job_last > job_first, job_last, job_first + 1)
+
+                            first.append(job_first.astype(np.int64))
+                            last.append(job_last.astype(np.int64))
+                            values.append(job.time_series[ts_name]["values"])
+                            elapsed.append(job.time_series[ts_name]["elapsed"])
+
+            if first:
+                first = np.concatenate(first)
+                last = np.concatenate(last)
+                n_span_bin = (last - first).astype(float)
+
+                # values are added to each bin in the same order as interval-by-interval
+                _values = add_values_to_bins(np.zeros(len(times)), first, last,
+                                             np.concatenate(values) / n_span_bin).tolist()
+                _elapsed = add_values_to_bins(np.zeros(len(times)), first, last,
+                                              np.concatenate(elapsed) / n_span_bin).tolist()
+                _processes = add_counts_to_bins(len(times), first, last, 1).tolist()
+            else:
+                _values = [0]*len(times)
+                _elapsed = [0]*len(times)
+                _processes = [0]*len(times)
 
             global_time_series[ts_name] = {"times": times,
                                            "values": _values,
@@ -341,6 +745,30 @@ class KResultsData(object):
 
         return found, global_time_series
 
+    def global_series(self, times, job_class_regex=None):
+        """
+        Global time series and running series of a class (calculated once for the current jobs and
+        a given times vector, the data returned is shared and must not be modified)
+        :param times:
+        :param job_class_regex:
+        :return: (found, time series, found running, running series) as returned by
+                 create_global_time_series and create_global_running_series
+        """
+
+        key = (len(self.jobs), tuple(times), job_class_regex)
+        if key not in self._global_series:
+
+            # the series of a previous set of jobs are not needed anymore
+            for old_key in [k for k in self._global_series if k[0] != len(self.jobs)]:
+                del self._global_series[old_key]
+
+            found, time_series = self.create_global_time_series(times, job_class_regex=job_class_regex)
+            found_running, _, running_series = self.create_global_running_series(times,
+                                                                                 job_class_regex=job_class_regex)
+            self._global_series[key] = found, time_series, found_running, running_series
+
+        return self._global_series[key]
+
     def calc_metrics_sums(self):
 
         _sums = {k: 0 for k in signal_types.keys()}
@@ -361,25 +789,23 @@ class KResultsData(object):
         :return:
         """
 
-        job_classes_dict = {}
-        for job in self.jobs:
-
-            classes_job_belongs_to = job.get_class_name(class_list)
+        job_classes_dict = self.class_membership(class_list)
 
-            # print job-class info only if
-            if show_jobs_flag:
+        # print job-class info only if
+        if show_jobs_flag:
+            class_names = [class_name for class_name in list(class_list) + ["generic_class"]
+                           if class_name in job_classes_dict]
+            for i_job, job in enumerate(self.jobs):
                 print("job name: {}".format(job.label))
-                print("-----> belongs to classes: {}".format(classes_job_belongs_to))
-
-            for job_class_name in classes_job_belongs_to:
-                job_classes_dict.setdefault(job_class_name, []).append(job)
+                print("-----> belongs to classes: {}".format(
+                    [class_name for class_name in class_names if job_classes_dict[class_name][i_job]]))
 
         print("============ SIM: {} ===============".format(self.name))
 
         total_jobs_in_classes = 0
         for k,v in job_classes_dict.items():
-            print("CLASS: {}, contains {} jobs".format(k, len(v)))
-            total_jobs_in_classes += len(v)
+            print("CLASS: {}, contains {} jobs".format(k, int(v.sum())))
+            total_jobs_in_classes += int(v.sum())
 
         print("total n jobs {}".format(len(self.jobs)))
         print("total n in classes {}".format(total_jobs_in_classes))
@@ -448,16 +874,7 @@ class KResultsDataSet(object):
         for class_name, class_regex in class_dict.items():
 
             print("checking job class {}".format(class_name))
-            found_in_all_sims = True
-            for sim in self.sims:
-                found_in_sim = False
-                for job in sim.jobs:
-                    if job.is_in_class(class_regex):
-                        found_in_sim = True
-                if not found_in_sim:
-                    found_in_all_sims = False
-
-            if found_in_all_sims:
+            if all(sim.job_class_mask(class_regex).any() for sim in self.sims):
                 class_common_dict[class_name] = class_regex
 
         return class_common_dict
@@ -8,19 +8,30 @@
 import re
 from datetime import datetime
 
+import numpy as np
+
+from kronos_executor.io_formats.results_binary_format import ResultsBinaryFormat
 from kronos_executor.io_formats.results_format import ResultsFormat
-from kronos_executor.io_formats.definitions import kresults_ts_names_map
+from kronos_executor.io_formats.definitions import kresults_stats_info, kresults_ts_names_map
 
 from kronos_executor.tools import cumsum
 
 
+# summable stats fields, as (metric, field) pairs
+stats_sum_fields = [(metric, field) for metric, info in kresults_stats_info.items() for field in info["to_sum"]]
+
+# metric -> [(index in stats_sum_fields, field)]
+_stats_sum_index = {metric: [(i_field, f) for i_field, (m, f) in enumerate(stats_sum_fields) if m == metric]
+                    for metric in kresults_stats_info}
+
+
 class KResultsJob(object):
     """
     This class defines a job that is run and self-profiled by Kronos.
     It mainly defines wrapping methods on top of the KResults data..
     """
 
-    def __init__(self, _json_data, decorator_data=None):
+    def __init__(self, _json_data, decorator_data=None, time_series=None, binary_data=None):
 
         # JSON data of the KResults file
         self._json_data = _json_data
@@ -28,58 +39,108 @@ class KResultsJob(object):
         # Decorating data (if available)
         self.decorating_data = decorator_data
 
-        # Calculate time series of this job
-        self.time_series = self.calc_time_series()
+        # Binary KResults data (if available), for the per-rank time series
+        self._binary_data = binary_data
+
+        # Time series of this job (calculated on first use, unless already calculated, e.g. cached)
+        self._time_series = time_series
+
+        # derived quantities (calculated on first use)
+        self._metrics_sums = None
+        self._stats_sums = None
+        self._duration = None
+        self._t_end = None
+
+    @property
+    def json_data(self):
+        """
+        KResults data (without the per-rank time series if read from the binary format)
+        :return:
+        """
+        return self._json_data
+
+    @property
+    def time_series(self):
+        if self._time_series is None:
+            self._time_series = self.calc_time_series()
+        return self._time_series
+
+    def _iter_rank_time_series(self):
+        """
+        Time series of each rank
+        :return: iterator of dicts metric -> values
+        """
+
+        if self._binary_data is not None:
+            return (self._binary_data.rank_time_series(i_rank) for i_rank in range(self._binary_data.n_ranks))
+
+        return (rank_data.get("time_series", {}) for rank_data in self._json_data["ranks"])
+
+    @staticmethod
+    def _nonzero_samples(delta_t, ts_vals):
+        """
+        Samples of a series with non-zero value and duration
+        :param delta_t: durations of the samples
+        :param ts_vals: values of the samples
+        :return: (t_end, value, duration) arrays
+        """
+
+        n_samples = min(len(delta_t), len(ts_vals))
+        delta_t = np.asarray(delta_t[:n_samples], dtype=float)
+        ts_vals = np.asarray(ts_vals[:n_samples])
+        tends = cumsum(delta_t)
+
+        mask = (ts_vals != 0) & (delta_t != 0)
+        return tends[mask], ts_vals[mask], delta_t[mask]
 
     def calc_time_series(self):
+        """
+        Time series of each metric (one array each of times, values, ratios and elapsed
+        times, sorted by ascending time)
+        :return:
+        """
 
         _series = {}
         if "global" in self._json_data and "time_series" in self._json_data["global"]:
             global_time_series = self._json_data["global"]["time_series"]
 
-            delta_t = global_time_series['durations']
-            tends = cumsum(delta_t)
-
             for ts_name, ts_vals in global_time_series.items():
                 if ts_name != "durations":
-                    ts_all = [(t, v, v / dt, dt) for t, dt, v in zip(tends, delta_t, ts_vals) if (v != 0 and dt != 0)]
-                    _series[ts_name] = ts_all
+                    _series[ts_name] = self._nonzero_samples(global_time_series['durations'], ts_vals)
 
         _series_tvr = {}
         if "ranks" in self._json_data:
-            # group time series from kresults data..
-            for rr,rank_data in enumerate(self._json_data["ranks"]):
-
-                delta_t = rank_data["time_series"]['durations']
-                tends = cumsum(delta_t)
-
-                for ts_name, ts_vals in rank_data["time_series"].items():
 
+            # group time series from kresults data..
+            rank_samples = {}
+            for rank_time_series in self._iter_rank_time_series():
+                for ts_name, ts_vals in rank_time_series.items():
                     if ts_name != "durations":
-                        ts_all = [(t, v, v / dt, dt) for t, dt, v in zip(tends, delta_t, ts_vals) if (v != 0 and dt != 0)]
-                        _series_tvr.setdefault(ts_name, []).extend(ts_all)
+                        rank_samples.setdefault(ts_name, []).append(
+                            self._nonzero_samples(rank_time_series['durations'], ts_vals))
 
-            # sort the time-series with ascending time..
-            for ts in _series_tvr.values():
-                ts.sort(key=lambda _x: _x[0])
+            # ..and sort them with ascending time (stable, so that ties stay in rank order)
+            for ts_name, samples in rank_samples.items():
+                ts_t, ts_v, ts_e = (np.concatenate(x) for x in zip(*samples))
+                order = np.argsort(ts_t, kind="stable")
+                _series_tvr[ts_name] = ts_t[order], ts_v[order], ts_e[order]
 
         # Per-rank time series override the global ones
         _series.update(_series_tvr)
 
         # Append any time series data that is present
         time_series = {}
-        for name, values in _series.items():
+        for name, (ts_t, ts_v, ts_e) in _series.items():
             if name not in kresults_ts_names_map:
                 print(f"Warning: skipping unknown metric {name!r}")
                 continue
 
-            if values:
-                ts_t, ts_v, ts_r, ts_e = zip(*values)
+            if len(ts_t):
                 time_series[kresults_ts_names_map[name][0]] = {
-                    'times': list(ts_t),
-                    'values': [v * kresults_ts_names_map[name][1] for v in list(ts_v)],
-                    'ratios': [v * kresults_ts_names_map[name][1] for v in list(ts_r)],
-                    'elapsed': list(ts_e),
+                    'times': ts_t,
+                    'values': ts_v * kresults_ts_names_map[name][1],
+                    'ratios': (ts_v / ts_e) * kresults_ts_names_map[name][1],
+                    'elapsed': ts_e,
                 }
 
         return time_series
@@ -89,18 +150,33 @@ class KResultsJob(object):
         REturn metrics sums
         :return:
         """
-        _series = self.calc_time_series()
-        return {k: sum(v["values"]) for k, v in _series.items()}
+        if self._metrics_sums is None:
+            self._metrics_sums = {k: v["values"].sum().item() for k, v in self.time_series.items()}
+        return dict(self._metrics_sums)
 
     @classmethod
     def from_kresults_file(cls, kresults_filename, decorator=None):
         """
-        instantiate a KResultsJob object from name of KResults file
+        instantiate a KResultsJob object from name of KResults file (the binary companion of
+        the file is read instead, if up to date)
         :param kresults_filename:
         :param decorator:
         :return:
         """
 
+        if kresults_filename.endswith(ResultsBinaryFormat.file_ext):
+            binary_filename = kresults_filename
+        else:
+            binary_filename = ResultsBinaryFormat.find_companion(kresults_filename)
+
+        if binary_filename:
+            binary_data = ResultsBinaryFormat(binary_filename)
+            return cls(
+                ResultsFormat.from_json_data(binary_data.header_data()).output_dict(),
+                decorator_data=decorator,
+                binary_data=binary_data
+            )
+
         return cls(
             ResultsFormat.from_filename(kresults_filename, validate_json=False).output_dict(),
             decorator_data=decorator
@@ -116,6 +192,39 @@ class KResultsJob(object):
         # List of stats fields for each process
         return [rank["stats"] for rank in self._json_data["ranks"]]
 
+    def stats_sums(self):
+        """
+        Sums over the processes of the summable stats fields (per-process fields are
+        divided by the number of processes)
+        :return: array of the sums of the fields in stats_sum_fields
+        """
+
+        if self._stats_sums is None:
+
+            job_stats = self.get_stats()
+
+            # per-process stats matrix
+            stats_matrix = np.zeros((len(job_stats), len(stats_sum_fields)))
+            unknown_metrics = set()
+            for i_proc, stat_entry in enumerate(job_stats):
+                for stat_metric, stat_fields in stat_entry.items():
+                    if stat_metric not in _stats_sum_index:
+                        unknown_metrics.add(stat_metric)
+                        continue
+
+                    for i_field, field in _stats_sum_index[stat_metric]:
+                        stats_matrix[i_proc, i_field] = stat_fields[field]
+
+            for stat_metric in sorted(unknown_metrics):
+                print(f"Warning: skipping unknown metric {stat_metric!r}")
+
+            per_process = np.array([field in kresults_stats_info[metric].get("per_process", [])
+                                    for metric, field in stats_sum_fields])
+
+            self._stats_sums = np.where(per_process, stats_matrix / float(len(job_stats)), stats_matrix).sum(axis=0)
+
+        return self._stats_sums
+
     def profiled_metrics(self):
         """
         Return the statistics as in the KResults data
@@ -162,22 +271,23 @@ class KResultsJob(object):
 
     @property
     def duration(self):
-        return max([v for ts in self.time_series.values() for v in ts["times"]])
+        if self._duration is None:
+            self._duration = max(ts["times"].max().item() for ts in self.time_series.values())
+        return self._duration
 
     @property
     def t_end(self):
 
         # t_end is defined as the creation timestamp of KResults
-        _ts = None
-        if self._json_data.get("created"):
+        if self._t_end is None and self._json_data.get("created"):
 
             if isinstance(self._json_data["created"], datetime):
                 created_datetime = self._json_data["created"]
             else:
                 created_datetime = datetime.strptime(self._json_data["created"], '%Y-%m-%dT%H:%M:%S+00:00')
 
-            _ts = created_datetime.timestamp()
-        return _ts
+            self._t_end = created_datetime.timestamp()
+        return self._t_end
 
     def is_in_class(self, class_regex=None):
         """
@@ -5,8 +5,11 @@
 # In applying this licence, ECMWF does not waive the privileges and immunities 
 # granted to it by virtue of its status as an intergovernmental organisation nor
 # does it submit to any jurisdiction.
+import os
 import re
 
+import numpy as np
+
 from kronos_executor.app_kernels import available_kernels
 from kronos_executor.io_formats.format_data_handlers.kschedule_kernel_work import KernelWorkDistribution
 from kronos_executor.io_formats.schedule_format import ScheduleFormat
@@ -69,6 +72,36 @@ class KScheduleData(ScheduleFormat):
 
         return _series[metric_name]
 
+    @classmethod
+    def per_job_matrix(cls, jobs, metric_names=None):
+        """
+        Totals of the metrics of each job, for all the metrics in one pass over the kernels
+        :param jobs: list of jobs
+        :param metric_names: (optional) metrics (default: all the time signals)
+        :return: array (one row per job, one column per metric)
+        """
+
+        metric_names = list(metric_names or time_signal_names)
+        i_metrics = {metric_name: i_metric for i_metric, metric_name in enumerate(metric_names)}
+
+        # kernel name -> (parameter, column, type) of the kernel parameters in the matrix
+        kernel_columns = {ker_name: [(kernel_param, i_metrics[kernel_param], signal_types[kernel_param]["type"])
+                                     for kernel_param in kernel_params if kernel_param in i_metrics]
+                          for ker_name, kernel_params in cls.kernel_name_keys_map.items()}
+
+        matrix = np.zeros((len(jobs), len(metric_names)))
+        for i_job, synth_app in enumerate(jobs):
+
+            job_totals = [0] * len(metric_names)
+            for frame in synth_app.get("frames", []):
+                for ker in frame:
+                    for kernel_param, i_metric, param_type in kernel_columns[ker["name"]]:
+                        job_totals[i_metric] += param_type(ker[kernel_param])
+
+            matrix[i_job] = job_totals
+
+        return matrix
+
     @classmethod
     def per_process_series(cls, jobs, metric_name):
 
@@ -125,3 +158,21 @@ class KScheduleData(ScheduleFormat):
                     yield job
         return list(_traverse(self.synapp_data))
 
+    def leaf_job_dirs(self):
+        """
+        Leaf jobs, with the dirs in which the executor runs them (repeated jobs are listed once
+        per repetition)
+        :return: list of (job dir relative to the run path, job)
+        """
+        def _traverse(jobs, path):
+            job_num = 0
+            for job in jobs:
+                for _ in range(job.get("repeat", 1)):
+                    job_dir = os.path.join(path, "job-{}".format(job_num))
+                    job_num += 1
+                    if "jobs" in job:
+                        yield from _traverse(job["jobs"], job_dir)
+                    else:
+                        yield job_dir, job
+        return list(_traverse(self.synapp_data, ""))
+
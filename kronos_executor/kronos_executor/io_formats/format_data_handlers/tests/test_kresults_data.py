@@ -7,12 +7,63 @@
 # granted to it by virtue of its status as an intergovernmental organisation nor
 # does it submit to any jurisdiction.
 
+import json
+import math
+import os
+import random
+import shutil
+import tempfile
 import unittest
+from unittest import mock
 
+from kronos_executor.definitions import signal_types
 from kronos_executor.io_formats.format_data_handlers.tests.local_test_utils import create_kresults
-from kronos_executor.io_formats.format_data_handlers.kresults_data import KResultsData
+from kronos_executor.io_formats.format_data_handlers import kresults_data
+from kronos_executor.io_formats.format_data_handlers.kresults_data import KResultsData, KResultsDataSet
 from kronos_executor.io_formats.format_data_handlers.kresults_decorator import KResultsDecorator
 from kronos_executor.io_formats.format_data_handlers.kresults_job import KResultsJob
+from kronos_executor.tools import add_value_to_sublist
+
+
+def reference_time_series(sim_data, times):
+    """
+    Global time series calculated interval by interval
+    """
+
+    bin_width = times[1] - times[0]
+    series = {}
+    for ts_name in signal_types:
+        values, elapsed, processes = [0]*len(times), [0]*len(times), [0]*len(times)
+        for job in sim_data.jobs:
+            if job.time_series.get(ts_name):
+                timestamps = [0] + job.time_series[ts_name]["times"].tolist()
+                for tt in range(1, len(timestamps)):
+                    first = int(math.floor((timestamps[tt-1] + job.t_start-sim_data.tmin_epochs) / bin_width))
+                    last = int(math.ceil((timestamps[tt] + job.t_start-sim_data.tmin_epochs) / bin_width))
+                    last = last if last > first else first + 1
+                    values = add_value_to_sublist(
+                        values, first, last, job.time_series[ts_name]["values"][tt-1]/float(last-first))
+                    elapsed = add_value_to_sublist(
+                        elapsed, first, last, job.time_series[ts_name]["elapsed"][tt-1]/float(last-first))
+                    processes = add_value_to_sublist(processes, first, last, 1)
+        series[ts_name] = {"times": times, "values": values, "elapsed": elapsed, "processes": processes}
+
+    return series
+
+
+def write_job_results(job_dir, flops, creation_date):
+    """
+    Write the input and results files of a job
+    """
+    os.makedirs(job_dir)
+    with open(os.path.join(job_dir, "input.json"), "w") as f:
+        json.dump({"metadata": {"workload_name": "workload_1",
+                                "job_name": os.path.basename(job_dir)}}, f)
+
+    time_series = [{"flops": [flops, 0, flops], "bytes_read": [0, 0, 1], "n_read": [0, 0, 1],
+                    "bytes_write": [0, 0, 1], "n_write": [0, 0, 1], "durations": [1.0, 1.0, 2.0]}]
+    with open(os.path.join(job_dir, "statistics.kresults"), "w") as f:
+        json.dump(create_kresults(time_series, creation_date=creation_date), f)
 
 
 class SimDataTest(unittest.TestCase):
@@ -136,6 +187,206 @@ class SimDataTest(unittest.TestCase):
         # check of the binned values (see above)
         self.assertEqual([v for v in series_dict["flops"]["values"]], [777, 333, 222])
 
+    def test_global_series_reference(self):
+        """
+        The global series are identical to the ones calculated interval by interval
+        """
+
+        rng = random.Random(42)
+
+        jobs = []
+        for i_job in range(10):
+            time_series = []
+            for i_proc in range(rng.randint(1, 3)):
+                n_intervals = rng.randint(1, 20)
+                time_series.append({
+                    "flops": [rng.choice([0, rng.random() * 1.0e9]) for _ in range(n_intervals)],
+                    "bytes_read": [rng.choice([0, rng.random() * 1.0e6]) for _ in range(n_intervals - 1)] + [1],
+                    "n_read": [rng.randint(0, 5) for _ in range(n_intervals - 1)] + [1],
+                    "bytes_write": [rng.choice([0, rng.random() * 1.0e6]) for _ in range(n_intervals - 1)] + [1],
+                    "n_write": [rng.randint(0, 5) for _ in range(n_intervals - 1)] + [1],
+                    "durations": [rng.random() * 3.0 for _ in range(n_intervals)]
+                })
+
+            kresults_json_data = create_kresults(
+                time_series, creation_date="2017-07-31T01:{:02d}:{:02d}+00:00".format(28 + i_job // 6, 6 * (i_job % 6)))
+            decor_data = KResultsDecorator(workload_name="workload_1", job_name="test_job_{}".format(i_job))
+            jobs.append(KResultsJob(kresults_json_data, decorator_data=decor_data))
+
+        sim_data = KResultsData(jobs=jobs, sim_name="dummy_sim", n_procs_node=2)
+
+        n_bins = 50
+        bin_width = sim_data.runtime() / (n_bins - 1)
+        times = [i * bin_width for i in range(n_bins)]
+
+        found, series_dict = sim_data.create_global_time_series(times)
+        self.assertEqual(found, len(jobs) * len(signal_types))
+        self.assertEqual(series_dict, reference_time_series(sim_data, times))
+
+        # running series
+        found, _, running = sim_data.create_global_running_series(times)
+        self.assertEqual(found, len(jobs))
+
+        ref_jobs, ref_procs, ref_nodes = [0]*n_bins, [0]*n_bins, [0]*n_bins
+        for job in jobs:
+            first = int(math.ceil((job.t_start - sim_data.tmin_epochs) / bin_width))
+            last = max(int(math.floor((job.t_end - sim_data.tmin_epochs) / bin_width)), first + 1)
+            ref_jobs = add_value_to_sublist(ref_jobs, first, last, 1)
+            ref_procs = add_value_to_sublist(ref_procs, first, last, job.n_cpu)
+            ref_nodes = add_value_to_sublist(ref_nodes, first, last, (job.n_cpu + 1) // 2)
+
+        self.assertEqual(running, {"jobs": ref_jobs, "procs": ref_procs, "nodes": ref_nodes})
+
+    def test_read_from_sim_paths(self):
+        """
+        Parallel reading of the job folders, and results cache
+        """
+
+        sim_path = tempfile.mkdtemp()
+        try:
+            # job-1 is a composite job (its results are in its sub-jobs)
+            write_job_results(os.path.join(sim_path, "job-0"), 100, "2017-07-31T01:28:42+00:00")
+            write_job_results(os.path.join(sim_path, "job-1", "job-0"), 200, "2017-07-31T01:28:44+00:00")
+            write_job_results(os.path.join(sim_path, "job-1", "job-1"), 300, "2017-07-31T01:28:46+00:00")
+            write_job_results(os.path.join(sim_path, "job-2"), 400, "2017-07-31T01:28:48+00:00")
+
+            sim_data = KResultsData.read_from_sim_paths(sim_path, "sim", n_workers=2)
+            self.assertEqual([j.name for j in sim_data.jobs], ["job-0", "job-0", "job-1", "job-2"])
+            self.assertEqual([j.time_series["flops"]["values"][0] for j in sim_data.jobs], [100, 200, 300, 400])
+            self.assertEqual(sim_data.runtime(), 10)
+
+            # all the jobs are now read from the cache
+            with mock.patch.object(kresults_data, "read_job_results", side_effect=AssertionError):
+                cached_data = KResultsData.read_from_sim_paths(sim_path, "sim", n_workers=1)
+            for job, cached_job in zip(sim_data.jobs, cached_data.jobs):
+                self.assertEqual(cached_job.time_series.keys(), job.time_series.keys())
+                for ts_name, series in job.time_series.items():
+                    for k, v in series.items():
+                        self.assertEqual(cached_job.time_series[ts_name][k].tolist(), v.tolist())
+
+            # updated results are read again
+            shutil.rmtree(os.path.join(sim_path, "job-2"))
+            write_job_results(os.path.join(sim_path, "job-2"), 500, "2017-07-31T01:28:48+00:00")
+            stats_file = os.path.join(sim_path, "job-2", "statistics.kresults")
+            os.utime(stats_file, ns=(0, os.stat(stats_file).st_mtime_ns + 10**9))
+
+            sim_data = KResultsData.read_from_sim_paths(sim_path, "sim", n_workers=1)
+            self.assertEqual([j.time_series["flops"]["values"][0] for j in sim_data.jobs], [100, 200, 300, 500])
+
+            # jobs without results
+            os.makedirs(os.path.join(sim_path, "job-3"))
+            self.assertRaises(SystemExit, lambda: KResultsData.read_from_sim_paths(sim_path, "sim"))
+            self.assertEqual(len(KResultsData.read_from_sim_paths(sim_path, "sim", permissive=True).jobs), 4)
+
+        finally:
+            shutil.rmtree(sim_path)
+
+    def test_read_metrics_sums(self):
+
+        sim_path = tempfile.mkdtemp()
+        try:
+            write_job_results(os.path.join(sim_path, "job-0"), 100, "2017-07-31T01:28:42+00:00")
+            write_job_results(os.path.join(sim_path, "job-1", "job-0"), 200, "2017-07-31T01:28:44+00:00")
+            write_job_results(os.path.join(sim_path, "job-1", "job-1"), 300, "2017-07-31T01:28:46+00:00")
+
+            job_dirs, jobs_sums = KResultsData.read_metrics_sums(sim_path, n_workers=2)
+            self.assertEqual(job_dirs, ["job-0", "job-1/job-0", "job-1/job-1"])
+
+            # same sums as those of the whole run
+            sim_data = KResultsData.read_from_sim_paths(sim_path, "sim", use_cache=False)
+            self.assertEqual(dict(zip(signal_types.keys(), jobs_sums.sum(axis=0).tolist())),
+                             sim_data.calc_metrics_sums())
+            self.assertEqual(jobs_sums[:, list(signal_types.keys()).index("flops")].tolist(), [200, 400, 600])
+
+        finally:
+            shutil.rmtree(sim_path)
+
+    def test_read_new_jobs(self):
+        """
+        Incremental reading of a running simulation
+        """
+
+        sim_path = tempfile.mkdtemp()
+        try:
+            sim_data = KResultsData(jobs=[], sim_name="sim", sim_path=os.path.join(sim_path, "run"))
+            self.assertEqual(sim_data.read_new_jobs(), 0)
+
+            write_job_results(os.path.join(sim_path, "run", "job-0"), 100, "2017-07-31T01:28:42+00:00")
+            os.makedirs(os.path.join(sim_path, "run", "job-1"))
+            self.assertEqual(sim_data.read_new_jobs(n_workers=1), 1)
+            self.assertEqual(sim_data.job_class_mask("workload_1").tolist(), [True])
+            self.assertEqual(sim_data.calc_metrics_sums()["flops"], 200)
+
+            # results being written are read once complete, and the jobs already read are not read again
+            with open(os.path.join(sim_path, "run", "job-1", "statistics.kresults"), "w") as f:
+                f.write('{"ranks": [')
+            with mock.patch.object(kresults_data, "read_job_results", side_effect=kresults_data.read_job_results) as m:
+                self.assertEqual(sim_data.read_new_jobs(n_workers=1), 0)
+            self.assertEqual(m.call_count, 1)
+
+            shutil.rmtree(os.path.join(sim_path, "run", "job-1"))
+            write_job_results(os.path.join(sim_path, "run", "job-1"), 300, "2017-07-31T01:28:44+00:00")
+            write_job_results(os.path.join(sim_path, "run", "job-2"), 500, "2017-07-31T01:28:46+00:00")
+            self.assertEqual(sim_data.read_new_jobs(n_workers=1), 2)
+            self.assertEqual(sim_data.read_new_jobs(n_workers=1), 0)
+
+            # the aggregated data is updated with the new jobs
+            self.assertEqual([j.time_series["flops"]["values"][0] for j in sim_data.jobs], [100, 300, 500])
+            self.assertEqual(sim_data.job_class_mask("workload_1").tolist(), [True] * 3)
+            self.assertEqual(sim_data.calc_metrics_sums()["flops"], 1800)
+            self.assertEqual(sim_data.runtime(), 8)
+
+            full_data = KResultsData.read_from_sim_paths(os.path.join(sim_path, "run"), "sim", use_cache=False)
+            times = list(range(9))
+            self.assertEqual(sim_data.create_global_time_series(times), full_data.create_global_time_series(times))
+
+        finally:
+            shutil.rmtree(sim_path)
+
+    def test_class_stats_sums(self):
+
+        def stats_job(workload_name, rank_stats):
+            kresults_json_data = {"created": "2017-07-31T01:28:42+00:00",
+                                  "ranks": [{"stats": st, "time_series": {"durations": [1.0], "flops": [1]}}
+                                            for st in rank_stats]}
+            decor_data = KResultsDecorator(workload_name=workload_name, job_name="job")
+            return KResultsJob(kresults_json_data, decorator_data=decor_data)
+
+        cpu = {"cpu": {"count": 2.0e9, "elapsed": 2.0}}
+        mpi = {"mpi-pairwise": {"count": 10, "elapsed": 1.0, "bytes": 1024.0**3}}
+
+        jobs = [stats_job("wl_a/parallel", [cpu, dict(cpu, **mpi)]),
+                stats_job("wl_b/serial", [cpu]),
+                stats_job("other", [dict(cpu, unknown_metric={})])]
+
+        sim_data = KResultsData(jobs=jobs, sim_name="dummy_sim")
+        job_classes = {"a": "wl_a/.*", "parallel": ".*/parallel", "none": "no_match"}
+
+        stats_sums = sim_data.class_stats_sums(job_classes)
+        self.assertEqual(list(stats_sums.keys()), ["a", "parallel", "generic_class", "all_classes"])
+
+        # the MPI bytes and count are per-process
+        self.assertEqual(stats_sums["a"], {
+            "cpu": {"count": 4.0e9, "elapsed": 4.0, "rate": 1.0},
+            "mpi-pairwise": {"count": 5.0, "elapsed": 1.0, "bytes": 1024.0**3 / 2, "rate": 0.5}
+        })
+        self.assertEqual(stats_sums["generic_class"], {"cpu": {"count": 4.0e9, "elapsed": 4.0, "rate": 1.0}})
+
+        # a job counts once for each class it belongs to
+        self.assertEqual(stats_sums["all_classes"]["cpu"]["count"], 12.0e9)
+        self.assertEqual(stats_sums["all_classes"]["mpi-pairwise"]["count"], 10.0)
+
+        # jobs added after the stats have been calculated
+        incremental_sim = KResultsData(jobs=[], sim_name="dummy_sim")
+        for i_job, job in enumerate(jobs):
+            incremental_sim.add_jobs([("job-{}".format(i_job), job)])
+            incremental_stats_sums = incremental_sim.class_stats_sums(job_classes)
+        self.assertEqual(incremental_stats_sums, stats_sums)
+
+        other_sim = KResultsData(jobs=jobs[1:], sim_name="other_sim")
+        sim_set = KResultsDataSet([sim_data, other_sim])
+        self.assertEqual(sim_set.retrieve_common_job_classes({"a": "wl_a/.*", "b": "wl_b/.*"}), {"b": "wl_b/.*"})
+
     # def test_class_stats_sums_function(self):
     #
     #     time_series_2proc = [
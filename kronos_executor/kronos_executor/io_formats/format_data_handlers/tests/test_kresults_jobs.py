@@ -194,21 +194,21 @@ class KResultsJobsTest(unittest.TestCase):
         job0 = KResultsJob(self.kresult_job_0)
 
         _ts = job0.calc_time_series()
-        self.assertEqual(_ts["flops"]["times"], [25.75281])
-        self.assertEqual(_ts["kb_write"]["times"], [25.75281 + 0.007616043])
-        self.assertEqual(_ts["n_write"]["times"], [25.75281 + 0.007616043])
+        self.assertEqual(_ts["flops"]["times"].tolist(), [25.75281])
+        self.assertEqual(_ts["kb_write"]["times"].tolist(), [25.75281 + 0.007616043])
+        self.assertEqual(_ts["n_write"]["times"].tolist(), [25.75281 + 0.007616043])
 
-        self.assertEqual(_ts["flops"]["values"], [10000000000])
-        self.assertEqual(_ts["kb_write"]["values"], [2560000/1024.0])
-        self.assertEqual(_ts["n_write"]["values"], [10])
+        self.assertEqual(_ts["flops"]["values"].tolist(), [10000000000])
+        self.assertEqual(_ts["kb_write"]["values"].tolist(), [2560000/1024.0])
+        self.assertEqual(_ts["n_write"]["values"].tolist(), [10])
 
-        self.assertEqual(_ts["flops"]["ratios"], [10000000000/25.75281])
-        self.assertEqual(_ts["kb_write"]["ratios"], [2560000/1024.0/0.007616043])
-        self.assertEqual(_ts["n_write"]["ratios"], [10/0.007616043])
+        self.assertEqual(_ts["flops"]["ratios"].tolist(), [10000000000/25.75281])
+        self.assertEqual(_ts["kb_write"]["ratios"].tolist(), [2560000/1024.0/0.007616043])
+        self.assertEqual(_ts["n_write"]["ratios"].tolist(), [10/0.007616043])
 
-        self.assertEqual(_ts["flops"]["elapsed"], [25.75281])
-        self.assertEqual(_ts["kb_write"]["elapsed"], [0.007616043])
-        self.assertEqual(_ts["n_write"]["elapsed"], [0.007616043])
+        self.assertEqual(_ts["flops"]["elapsed"].tolist(), [25.75281])
+        self.assertEqual(_ts["kb_write"]["elapsed"].tolist(), [0.007616043])
+        self.assertEqual(_ts["n_write"]["elapsed"].tolist(), [0.007616043])
 
     def test_parallel_job_time_series(self):
 
@@ -216,10 +216,10 @@ class KResultsJobsTest(unittest.TestCase):
         job1 = KResultsJob(self.kresult_job_1)
 
         _ts = job1.calc_time_series()
-        self.assertEqual(_ts["flops"]["times"], [0.01*10, 0.01*10+0.01*20, 0.03*333, 0.03*333+0.03*666])
-        self.assertEqual(_ts["flops"]["values"], [10, 20, 333, 666])
-        self.assertEqual(_ts["flops"]["ratios"], [10/(0.01*10), 20/(0.01*20), 333/(0.03*333), 666/(0.03*666)])
-        self.assertEqual(_ts["flops"]["elapsed"], [0.01*10, 0.01*20, 0.03*333, 0.03*666])
+        self.assertEqual(_ts["flops"]["times"].tolist(), [0.01*10, 0.01*10+0.01*20, 0.03*333, 0.03*333+0.03*666])
+        self.assertEqual(_ts["flops"]["values"].tolist(), [10, 20, 333, 666])
+        self.assertEqual(_ts["flops"]["ratios"].tolist(), [10/(0.01*10), 20/(0.01*20), 333/(0.03*333), 666/(0.03*666)])
+        self.assertEqual(_ts["flops"]["elapsed"].tolist(), [0.01*10, 0.01*20, 0.03*333, 0.03*666])
 
     def test_kresults_basics(self):
         """
@@ -269,14 +269,14 @@ class KResultsJobsTest(unittest.TestCase):
         time_series = kresults_data.calc_time_series()
 
         # check flops time series (time stamps)
-        self.assertEqual(time_series["flops"]["times"], [1.0, 2.0, 4.0, 9.0])
+        self.assertEqual(time_series["flops"]["times"].tolist(), [1.0, 2.0, 4.0, 9.0])
 
         # check flops time series (values)
-        self.assertEqual(time_series["flops"]["values"], [222, 111, 111, 222])
+        self.assertEqual(time_series["flops"]["values"].tolist(), [222, 111, 111, 222])
 
         # check flops time series (elapsed)
-        self.assertEqual(time_series["flops"]["elapsed"], [1.0, 1.0, 1.0, 6.0])
+        self.assertEqual(time_series["flops"]["elapsed"].tolist(), [1.0, 1.0, 1.0, 6.0])
 
         # check flops time series (ratios)
-        self.assertEqual(time_series["flops"]["ratios"], [222/1.0, 111/1.0, 111/1.0, 222/6.0])
+        self.assertEqual(time_series["flops"]["ratios"].tolist(), [222/1.0, 111/1.0, 111/1.0, 222/6.0])
 
@@ -160,6 +160,27 @@ class KScheduleDataTest(unittest.TestCase):
         jobs = KScheduleData.from_file(StringIO(json.dumps(valid_ks))).jobs
         self.assertRaises(RuntimeError, lambda: KScheduleData.per_call_series(jobs, "flops"))
 
+    def test_per_job_matrix(self):
+
+        jobs = KScheduleData.from_file(StringIO(json.dumps(self.valid_kschedule))).jobs
+        metric_names = ["flops", "kb_write", "kb_read", "kb_pairwise", "n_collective"]
+
+        # same totals as the per-job series, for all the metrics at once
+        matrix = KScheduleData.per_job_matrix(jobs, metric_names)
+        self.assertEqual(matrix.shape, (2, len(metric_names)))
+        for i_metric, metric_name in enumerate(metric_names):
+            self.assertEqual(matrix[:, i_metric].tolist(), KScheduleData.per_job_series(jobs, metric_name))
+
+        # jobs without frames (external jobs) have no metrics
+        self.assertEqual(KScheduleData.per_job_matrix([{"metadata": {}}]).tolist(), [[0.0] * 10])
+
+    def test_leaf_job_dirs(self):
+
+        job = {"frames": [], "metadata": {"job_name": "job", "workload_name": "wl"}}
+        kschedule = KScheduleData(sa_data_json=[dict(job, repeat=2), {"jobs": [job, dict(job, repeat=2)]}, job])
+        self.assertEqual([job_dir for job_dir, _ in kschedule.leaf_job_dirs()],
+                         ["job-0", "job-1", "job-2/job-0", "job-2/job-1", "job-2/job-2", "job-3"])
+
     def test_io_write_series(self):
 
         # Check the io_formats series (per job)
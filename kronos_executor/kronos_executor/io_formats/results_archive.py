@@ -0,0 +1,274 @@
+# (C) Copyright 1996-2018 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+import json
+import multiprocessing
+import os
+import pathlib
+import tarfile
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _scan_job_tree(run_path, job_dir, collect_files, exclude_files):
+    """
+    Scan a job dir and its sub-jobs (in a scanning thread)
+    :param run_path: run path
+    :param job_dir: job dir (relative to the run path)
+    :param collect_files: patterns of the files to collect
+    :param exclude_files: patterns of the files not to collect
+    :return: list of (job dir, is_leaf), list of (file path relative to the run path, size)
+    """
+
+    sub_jobs = []
+    files = []
+    with os.scandir(os.path.join(run_path, job_dir)) as it:
+        for entry in it:
+            if entry.is_dir():
+                if entry.name.startswith("job-"):
+                    sub_jobs.append(entry.name)
+                continue
+
+            file_path = pathlib.PurePath(job_dir, entry.name)
+            if not any(file_path.match(f_name_coll) for f_name_coll in collect_files):
+                continue
+            if any(file_path.match(f_name_excl) for f_name_excl in exclude_files):
+                continue
+            files.append((str(file_path), entry.stat().st_size))
+
+    files.sort()
+
+    job_dirs = [(job_dir, not sub_jobs)]
+    for sub_job in sorted(sub_jobs, key=ResultsArchive.job_dir_sort_key):
+        sub_job_dirs, sub_job_files = _scan_job_tree(run_path, os.path.join(job_dir, sub_job),
+                                                     collect_files, exclude_files)
+        job_dirs.extend(sub_job_dirs)
+        files.extend(sub_job_files)
+
+    return job_dirs, files
+
+
+def _write_shard(shard_filename, run_path, files, arc_root, compresslevel):
+    """
+    Write a shard of the archive (in a writer process)
+    :param shard_filename:
+    :param run_path: run path
+    :param files: files to add (relative to the run path)
+    :param arc_root: root of the files in the archive
+    :param compresslevel: gzip compression level
+    :return: size of the shard
+    """
+
+    with tarfile.open(shard_filename, "w:gz", compresslevel=compresslevel) as tar_file:
+        for file_path in files:
+            tar_file.add(os.path.join(run_path, file_path), arcname=os.path.join(arc_root, file_path))
+
+    return os.path.getsize(shard_filename)
+
+
+class ResultsArchive(object):
+    """
+    Archive of the output files of a Kronos run: one or more gzipped tarballs ("shards") and a JSON
+    manifest, which lists the job dirs of the run and where each file is. All the files of a job dir
+    are in the same shard, and the shards can be read independently (and without extracting them).
+    """
+
+    manifest_version = 1
+    manifest_magic = "KRONOS-RESULTS-ARCHIVE-MAGIC"
+    manifest_ext = ".manifest.json"
+
+    # root of the run files in the tarballs
+    arc_root = "run_data"
+
+    def __init__(self, manifest_filename):
+
+        self.filename = manifest_filename
+
+        with open(manifest_filename, "r") as f:
+            manifest = json.load(f)
+
+        if manifest.get("tag") != self.manifest_magic or manifest.get("version") != self.manifest_version:
+            raise ValueError("{} is not a results archive manifest (version {})".format(
+                manifest_filename, self.manifest_version))
+
+        # shards (paths relative to the manifest)
+        self.shards = [os.path.join(os.path.dirname(manifest_filename), shard) for shard in manifest["shards"]]
+
+        # job dirs (relative to the run path) and whether they are leaf jobs
+        self.job_dirs = [(job_dir, is_leaf) for job_dir, is_leaf in manifest["job_dirs"]]
+
+        # file path (relative to the run path) -> (shard index, size)
+        self.files = {file_path: (shard, size) for file_path, shard, size in manifest["files"]}
+
+    @staticmethod
+    def job_dir_sort_key(job_dir_name):
+        return int(job_dir_name.split("-")[-1])
+
+    @classmethod
+    def manifest_filename(cls, tarball_path):
+        """
+        Name of the manifest of an archive
+        :param tarball_path: path of the archive, as passed to collect
+        :return:
+        """
+        return str(tarball_path) + cls.manifest_ext
+
+    @classmethod
+    def find_manifest(cls, path):
+        """
+        Manifest of an archive, given the path of its manifest or of the archive
+        :param path:
+        :return: manifest file name, or None if path is not an archive with a manifest
+        """
+
+        path = str(path)
+        if path.endswith(cls.manifest_ext) and os.path.isfile(path):
+            return path
+
+        # (the tarball itself does not exist if the archive is sharded)
+        if not os.path.isdir(path) and os.path.isfile(cls.manifest_filename(path)):
+            return cls.manifest_filename(path)
+
+        return None
+
+    @staticmethod
+    def shard_filenames(tarball_path, n_shards):
+        """
+        Names of the shards of an archive (a single shard is the tarball itself)
+        :param tarball_path:
+        :param n_shards:
+        :return:
+        """
+
+        tarball_path = str(tarball_path)
+        if n_shards == 1:
+            return [tarball_path]
+
+        stem, ext = tarball_path, ""
+        for tar_ext in (".tar.gz", ".tgz"):
+            if tarball_path.endswith(tar_ext):
+                stem, ext = tarball_path[:-len(tar_ext)], tar_ext
+                break
+
+        return ["{}-{:03d}{}".format(stem, i_shard, ext) for i_shard in range(n_shards)]
+
+    @staticmethod
+    def scan_run(run_path, collect_files, exclude_files, n_workers=None):
+        """
+        Find the files of the job dirs of a run to collect (the top-level job dirs are
+        scanned concurrently)
+        :param run_path: run path
+        :param collect_files: patterns of the files to collect
+        :param exclude_files: patterns of the files not to collect
+        :param n_workers: number of scanning threads
+        :return: list of (job dir, is_leaf), list of lists of (file path, size) (one per top-level job)
+        """
+
+        with os.scandir(run_path) as it:
+            top_job_dirs = sorted((entry.name for entry in it if entry.is_dir() and entry.name.startswith("job-")),
+                                  key=ResultsArchive.job_dir_sort_key)
+
+        with ThreadPoolExecutor(max_workers=n_workers or 32) as executor:
+            scanned = list(executor.map(lambda job_dir: _scan_job_tree(run_path, job_dir, collect_files,
+                                                                       exclude_files), top_job_dirs))
+
+        job_dirs = [job_dir for job_tree_dirs, _ in scanned for job_dir in job_tree_dirs]
+        job_files = [job_tree_files for _, job_tree_files in scanned]
+
+        return job_dirs, job_files
+
+    @classmethod
+    def collect(cls, tarball_path, run_path, run_files, collect_files, exclude_files, n_shards=1,
+                n_workers=None, compresslevel=9):
+        """
+        Collect the output files of a run in an archive
+        :param tarball_path: path of the archive
+        :param run_path: run path
+        :param run_files: files of the top-level run dir to collect (relative to the run path)
+        :param collect_files: patterns of the files to collect in the job dirs
+        :param exclude_files: patterns of the files not to collect
+        :param n_shards: number of tarballs (written concurrently)
+        :param n_workers: number of scanning threads
+        :param compresslevel: gzip compression level
+        :return: manifest file name
+        """
+
+        run_path = str(run_path)
+        job_dirs, job_files = cls.scan_run(run_path, collect_files, exclude_files, n_workers=n_workers)
+        print("collecting {} files from {} job folders".format(sum(len(files) for files in job_files),
+                                                              len(job_dirs)))
+
+        # contiguous groups of top-level jobs of similar sizes
+        job_sizes = [sum(size for _, size in files) for files in job_files]
+        total_size = float(sum(job_sizes)) or 1.0
+        shard_files = [[] for _ in range(n_shards)]
+        shard_files[0].extend((file_path, os.path.getsize(os.path.join(run_path, file_path)))
+                              for file_path in run_files)
+
+        cumulated_size = 0
+        for files, size in zip(job_files, job_sizes):
+            i_shard = min(int((cumulated_size + 0.5 * size) / total_size * n_shards), n_shards - 1)
+            shard_files[i_shard].extend(files)
+            cumulated_size += size
+
+        shard_filenames = cls.shard_filenames(tarball_path, n_shards)
+        write_args = [(shard_filename, run_path, [file_path for file_path, _ in files], cls.arc_root, compresslevel)
+                      for shard_filename, files in zip(shard_filenames, shard_files)]
+
+        if n_shards > 1:
+            with multiprocessing.Pool(n_shards) as pool:
+                shard_sizes = pool.starmap(_write_shard, write_args, chunksize=1)
+        else:
+            shard_sizes = [_write_shard(*write_args[0])]
+
+        for shard_filename, files, shard_size in zip(shard_filenames, shard_files, shard_sizes):
+            print("written {} ({} files, {} bytes)".format(shard_filename, len(files), shard_size))
+
+        manifest = {
+            "tag": cls.manifest_magic,
+            "version": cls.manifest_version,
+            "shards": [os.path.basename(shard_filename) for shard_filename in shard_filenames],
+            "job_dirs": job_dirs,
+            "files": [(file_path, i_shard, size) for i_shard, files in enumerate(shard_files)
+                      for file_path, size in files]
+        }
+
+        manifest_filename = cls.manifest_filename(tarball_path)
+        with open(manifest_filename, "w") as f:
+            json.dump(manifest, f)
+
+        return manifest_filename
+
+    def shard_files(self, file_paths):
+        """
+        Shards containing some files
+        :param file_paths: file paths (relative to the run path)
+        :return: shard index -> list of file paths in the shard (files not in the archive are skipped)
+        """
+
+        shard_files = {}
+        for file_path in file_paths:
+            if file_path in self.files:
+                shard_files.setdefault(self.files[file_path][0], []).append(file_path)
+
+        return shard_files
+
+    @classmethod
+    def iter_shard_files(cls, shard_filename, file_paths):
+        """
+        Read some files of a shard, in one sequential pass over the (compressed) shard
+        :param shard_filename:
+        :param file_paths: file paths (relative to the run path)
+        :return: iterator of (file path, file object), each file object is only valid until the next one
+        """
+
+        arc_names = {os.path.join(cls.arc_root, file_path): file_path for file_path in file_paths}
+        with tarfile.open(shard_filename, "r|gz") as tar_file:
+            for member in tar_file:
+                file_path = arc_names.get(member.name)
+                if file_path is not None and member.isfile():
+                    yield file_path, tar_file.extractfile(member)
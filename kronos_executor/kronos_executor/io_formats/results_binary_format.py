@@ -0,0 +1,242 @@
+# (C) Copyright 1996-2018 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+import json
+import os
+
+import numpy as np
+
+
+class ResultsBinaryFormat(object):
+    """
+    Binary columnar companion of a KResults file (NPZ archive).
+
+    All the data except the per-rank time series (metadata, stats, global data) is kept in a JSON
+    header. The time series of each metric are stored as one array, with the series of all the ranks
+    one after the other (and the offset of each rank in a separate array), so that a metric can be read
+    without reading (nor parsing) the others. The conversion from/to JSON is lossless: for series
+    mixing integers and floats, a mask records which values are integers.
+    """
+
+    format_version = 1
+    format_magic = "KRONOS-KRESULTS-BINARY-MAGIC"
+    file_ext = ".npz"
+
+    def __init__(self, filename):
+
+        self.filename = filename
+
+        header = self._load("header")["header"]
+        header = json.loads(header.tobytes().decode("utf-8"))
+
+        if header.get("tag") != self.format_magic or header.get("version") != self.format_version:
+            raise ValueError("{} is not a binary KResults file (version {})".format(filename, self.format_version))
+
+        # KResults data, with the names of the time series instead of the series
+        self.header = header["data"]
+
+        # metric -> (values, offsets) of the rank time series
+        self._rank_columns = {}
+
+    @classmethod
+    def companion_filename(cls, kresults_filename):
+        """
+        Name of the binary companion of a KResults file
+        :param kresults_filename:
+        :return:
+        """
+        return kresults_filename + cls.file_ext
+
+    @classmethod
+    def find_companion(cls, kresults_filename):
+        """
+        Binary companion of a KResults file, if it exists and is up to date
+        :param kresults_filename:
+        :return: file name, or None
+        """
+
+        companion = cls.companion_filename(kresults_filename)
+        try:
+            if os.stat(companion).st_mtime_ns < os.stat(kresults_filename).st_mtime_ns:
+                return None
+        except FileNotFoundError:
+            return companion if os.path.exists(companion) else None
+
+        return companion
+
+    def _load(self, *keys):
+        """
+        Read some arrays of the file (the file is not kept open)
+        :param keys: (optional) keys of the arrays (default: all of them)
+        :return: key -> array
+        """
+        with np.load(self.filename, allow_pickle=False) as npz:
+            return {k: npz[k] for k in (keys or npz.files) if k in npz.files}
+
+    @staticmethod
+    def _pack_series(series_list):
+        """
+        Concatenated series (integers if all the values are integers)
+        :param series_list: list of lists of numbers
+        :return: key -> array ("values", and "int_mask" for series mixing integers and floats)
+        """
+
+        is_int = [isinstance(v, int) and not isinstance(v, bool) for series in series_list for v in series]
+        values = [v for series in series_list for v in series]
+
+        if all(is_int):
+            return {"values": np.array(values, dtype=np.int64)}
+
+        packed = {"values": np.array(values, dtype=np.float64)}
+        if any(is_int):
+            packed["int_mask"] = np.array(is_int, dtype=bool)
+
+        return packed
+
+    @staticmethod
+    def _unpack_series(values, int_mask=None):
+        """
+        List of numbers from a packed series
+        :param values:
+        :param int_mask:
+        :return:
+        """
+
+        values = values.tolist()
+        if int_mask is not None:
+            values = [int(v) if is_int else v for v, is_int in zip(values, int_mask.tolist())]
+
+        return values
+
+    @classmethod
+    def write_json_data(cls, data, filename):
+        """
+        Write the binary form of KResults data
+        :param data: KResults data (as loaded from the JSON file)
+        :param filename:
+        :return:
+        """
+
+        arrays = {}
+
+        # rank time series
+        ranks = data.get("ranks", [])
+        rank_headers = []
+        metrics = []
+        for rank_data in ranks:
+            rank_headers.append({k: (list(v.keys()) if k == "time_series" else v) for k, v in rank_data.items()})
+            metrics.extend(m for m in rank_data.get("time_series", {}) if m not in metrics)
+
+        for metric in metrics:
+            series_list = [rank_data.get("time_series", {}).get(metric, []) for rank_data in ranks]
+            for k, v in cls._pack_series(series_list).items():
+                arrays["ranks.{}.{}".format(metric, k)] = v
+            arrays["ranks.{}.offsets".format(metric)] = np.cumsum([0] + [len(s) for s in series_list])
+
+        header_data = dict(data)
+        if "ranks" in data:
+            header_data["ranks"] = rank_headers
+
+        header = {"tag": cls.format_magic, "version": cls.format_version, "data": header_data}
+        arrays["header"] = np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8)
+
+        tmp_filename = filename + ".tmp"
+        with open(tmp_filename, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_filename, filename)
+
+    @property
+    def n_ranks(self):
+        return len(self.header.get("ranks", []))
+
+    def header_data(self):
+        """
+        KResults data without the time series
+        :return:
+        """
+
+        data = dict(self.header)
+        if "ranks" in data:
+            data["ranks"] = [{k: v for k, v in rank.items() if k != "time_series"} for rank in data["ranks"]]
+
+        return data
+
+    def rank_column(self, metric):
+        """
+        Time series of a metric for all the ranks (read once)
+        :param metric:
+        :return: (values, offsets) arrays, the series of rank i is values[offsets[i]:offsets[i+1]]
+        """
+
+        if metric not in self._rank_columns:
+            keys = ["ranks.{}.{}".format(metric, k) for k in ("values", "offsets")]
+            arrays = self._load(*keys)
+            if len(arrays) < 2:
+                raise KeyError("Metric {} not found in {}".format(metric, self.filename))
+            self._rank_columns[metric] = arrays[keys[0]], arrays[keys[1]]
+
+        return self._rank_columns[metric]
+
+    def rank_metrics(self, rank):
+        """
+        Names of the time series of a rank
+        :param rank: rank index
+        :return:
+        """
+        return self.header["ranks"][rank].get("time_series", [])
+
+    def rank_series(self, rank, metric):
+        """
+        Time series of a metric for one rank
+        :param rank: rank index
+        :param metric:
+        :return: array
+        """
+        values, offsets = self.rank_column(metric)
+        return values[offsets[rank]:offsets[rank+1]]
+
+    def rank_time_series(self, rank):
+        """
+        All the time series of one rank
+        :param rank: rank index
+        :return: metric -> array
+        """
+        return {metric: self.rank_series(rank, metric) for metric in self.rank_metrics(rank)}
+
+    def json_data(self):
+        """
+        Full KResults data, identical to the one loaded from the JSON file
+        :return:
+        """
+
+        arrays = self._load()
+
+        data = dict(self.header)
+
+        if "ranks" not in data:
+            return data
+
+        ranks = []
+        for i_rank, rank_header in enumerate(self.header["ranks"]):
+            rank_data = {}
+            for k, v in rank_header.items():
+                if k == "time_series":
+                    rank_data[k] = {}
+                    for metric in v:
+                        values = arrays["ranks.{}.values".format(metric)]
+                        int_mask = arrays.get("ranks.{}.int_mask".format(metric))
+                        offsets = arrays["ranks.{}.offsets".format(metric)]
+                        i_start, i_end = offsets[i_rank], offsets[i_rank+1]
+                        rank_data[k][metric] = self._unpack_series(
+                            values[i_start:i_end], int_mask[i_start:i_end] if int_mask is not None else None)
+                else:
+                    rank_data[k] = v
+            ranks.append(rank_data)
+        data["ranks"] = ranks
+
+        return data
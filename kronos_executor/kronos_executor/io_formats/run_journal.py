@@ -0,0 +1,199 @@
+# (C) Copyright 1996-2018 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+import json
+import time
+
+import numpy as np
+
+
+class RunJournalWriter(object):
+    """
+    Writer of the timing journal of a run, one JSON record per line (written alongside the
+    executor log). The records are:
+
+      - {"ev": "job", "job": <id>, "deps": [<ids of the jobs it depends on>], "name": <name>}
+      - {"ev": "ready" | "submitted" | "complete", "job": <id>, "t": <timestamp>}
+
+    where "ready" is the time the dependencies of the job were satisfied, "submitted" the time its
+    submission completed and "complete" the time its completion event was received.
+    """
+
+    def __init__(self, filename, sim_token=None):
+
+        self.filename = filename
+        self._file = open(filename, "w")
+        self._write({"tag": RunJournal.journal_magic, "version": RunJournal.journal_version,
+                     "token": str(sim_token) if sim_token is not None else None, "t": time.time()})
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, separators=(",", ":")))
+        self._file.write("\n")
+
+    def jobs(self, jobs, dependencies):
+        """
+        Record the jobs of the run
+        :param jobs: list of (job id, name)
+        :param dependencies: job id -> ids of the jobs it depends on
+        :return:
+        """
+        for jid, name in jobs:
+            self._write({"ev": "job", "job": jid, "deps": sorted(dependencies.get(jid, ())), "name": name})
+
+    def event(self, ev, jid, timestamp=None):
+        """
+        Record an event of a job
+        :param ev: "ready", "submitted" or "complete"
+        :param jid: job id
+        :param timestamp: (optional) time of the event (default: now)
+        :return:
+        """
+        self._write({"ev": ev, "job": jid, "t": timestamp if timestamp is not None else time.time()})
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class RunJournal(object):
+    """
+    Timing journal of a run, indexed by job: the times of the events of all the jobs are held
+    in arrays (NaN for the events not recorded), row i of which belongs to job job_ids[i].
+    """
+
+    journal_version = 1
+    journal_magic = "KRONOS-RUN-JOURNAL-MAGIC"
+    journal_filename = "kronos-journal.jsonl"
+
+    event_types = ("ready", "submitted", "complete")
+
+    def __init__(self, filename):
+
+        self.filename = filename
+
+        with open(filename, "r") as f:
+            try:
+                header = json.loads(f.readline())
+            except ValueError:
+                header = None
+
+            if not isinstance(header, dict) or header.get("tag") != self.journal_magic or \
+                    header.get("version") != self.journal_version:
+                raise ValueError("{} is not a run journal (version {})".format(filename, self.journal_version))
+
+            records = [json.loads(line) for line in f if line.endswith("\n")]
+
+        self.sim_token = header.get("token")
+        self.t_start = header["t"]
+
+        # job id -> row
+        self.index = {}
+        self.job_ids = []
+        self.names = []
+        deps = []
+        for rec in records:
+            if rec["ev"] == "job" and rec["job"] not in self.index:
+                self.index[rec["job"]] = len(self.job_ids)
+                self.job_ids.append(rec["job"])
+                self.names.append(rec.get("name"))
+                deps.append(rec.get("deps", []))
+
+        # dependency edges, as (producer row, consumer row) arrays
+        edges = [(self.index[p], row) for row, job_deps in enumerate(deps) for p in job_deps if p in self.index]
+        self.producers = np.array([p for p, _ in edges], dtype=np.int64)
+        self.consumers = np.array([c for _, c in edges], dtype=np.int64)
+
+        # event type -> times of the first occurrence for each job
+        self.times = {ev: np.full(len(self.job_ids), np.nan) for ev in self.event_types}
+        for rec in reversed(records):
+            row = self.index.get(rec["job"])
+            if row is not None and rec["ev"] in self.times:
+                self.times[rec["ev"]][row] = rec["t"]
+
+    @classmethod
+    def is_journal(cls, filename):
+        """
+        Whether a file is a run journal (checks the header only)
+        :param filename:
+        :return:
+        """
+        try:
+            with open(filename, "r") as f:
+                header = json.loads(f.readline())
+        except (OSError, ValueError, UnicodeDecodeError):
+            return False
+
+        return isinstance(header, dict) and header.get("tag") == cls.journal_magic
+
+    def __len__(self):
+        return len(self.job_ids)
+
+    def job_times(self, jid):
+        """
+        Times of the events of a job
+        :param jid: job id
+        :return: event type -> time (NaN if not recorded)
+        """
+        row = self.index[jid]
+        return {ev: self.times[ev][row] for ev in self.event_types}
+
+    def last_dependency_times(self):
+        """
+        Time of the completion of the last job each job depends on
+        :return: array (NaN for the jobs not depending on other jobs)
+        """
+        t_last = np.full(len(self.job_ids), -np.inf)
+        np.maximum.at(t_last, self.consumers, self.times["complete"][self.producers])
+        t_last[np.isneginf(t_last)] = np.nan
+        return t_last
+
+    def queue_waits(self):
+        """
+        Time each job waited in the submission queue of the executor (from the time its
+        dependencies were satisfied to the completion of its submission)
+        :return: array
+        """
+        return self.times["submitted"] - self.times["ready"]
+
+    def submission_lags(self):
+        """
+        Time from the completion of the last job each job depends on (or from the time its
+        dependencies were satisfied, if it does not depend on other jobs) to its submission
+        :return: array
+        """
+        t_last = self.last_dependency_times()
+        t_from = np.where(np.isnan(t_last), self.times["ready"], t_last)
+        return self.times["submitted"] - t_from
+
+    def critical_path(self):
+        """
+        Chain of jobs ending with the last job to complete, where each job is preceded by the
+        last job it depends on to complete
+        :return: list of rows (first job first)
+        """
+
+        t_complete = self.times["complete"]
+        if not len(self.job_ids) or np.all(np.isnan(t_complete)):
+            return []
+
+        # last producer to complete, for each consumer (the last one of each group after sorting)
+        critical_producer = np.full(len(self.job_ids), -1, dtype=np.int64)
+        if len(self.producers):
+            t_prod = np.nan_to_num(t_complete[self.producers], nan=-np.inf)
+            order = np.lexsort((t_prod, self.consumers))
+            last_in_group = np.ones(len(order), dtype=bool)
+            last_in_group[:-1] = self.consumers[order][1:] != self.consumers[order][:-1]
+            critical_producer[self.consumers[order][last_in_group]] = self.producers[order][last_in_group]
+
+        path = [int(np.nanargmax(t_complete))]
+        while critical_producer[path[-1]] >= 0:
+            path.append(int(critical_producer[path[-1]]))
+
+        return path[::-1]
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+
+from kronos_executor.io_formats.format_data_handlers.kresults_data import KResultsData
+from kronos_executor.io_formats.results_archive import ResultsArchive
+
+
+class ResultsArchiveTest(unittest.TestCase):
+
+    collect_files = ["input.json", "statistics.kresults", "output*"]
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.run_path = os.path.join(self.tmpdir, "run")
+        os.makedirs(self.run_path)
+
+        with open(os.path.join(self.run_path, "schedule.kschedule"), "w") as f:
+            f.write("{}")
+
+        # job-1 is a composite job (its results are in its sub-jobs)
+        for i_job, job_dir in enumerate(["job-0", "job-1/job-0", "job-1/job-1", "job-2", "job-10"]):
+            self.write_job(os.path.join(self.run_path, job_dir), i_job)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    @staticmethod
+    def write_job(job_dir, i_job):
+        os.makedirs(job_dir)
+        with open(os.path.join(job_dir, "input.json"), "w") as f:
+            json.dump({"metadata": {"workload_name": "workload_1", "job_name": os.path.basename(job_dir)}}, f)
+
+        kresults_data = {
+            "version": 2,
+            "tag": "KRONOS-KRESULTS-MAGIC",
+            "created": "2017-07-31T01:28:4{}+00:00".format(i_job),
+            "uid": 1234,
+            "ranks": [{"stats": {"cpu": {"count": 10 * i_job, "elapsed": 1.0}},
+                       "time_series": {"durations": [1.0, 2.0], "flops": [i_job + 1, 2 * i_job + 1]}}]
+        }
+        with open(os.path.join(job_dir, "statistics.kresults"), "w") as f:
+            json.dump(kresults_data, f)
+
+        for file_name in ["output", "not_collected"]:
+            with open(os.path.join(job_dir, file_name), "w") as f:
+                f.write("job {}".format(i_job))
+
+    def test_collect(self):
+
+        tarball = os.path.join(self.tmpdir, "results.tar.gz")
+        manifest_file = ResultsArchive.collect(tarball, self.run_path, ["schedule.kschedule"],
+                                               self.collect_files, ["job-2/output"], n_shards=2)
+        self.assertEqual(manifest_file, tarball + ".manifest.json")
+        self.assertEqual(ResultsArchive.find_manifest(tarball), manifest_file)
+        self.assertIsNone(ResultsArchive.find_manifest(self.run_path))
+
+        archive = ResultsArchive(manifest_file)
+        self.assertEqual(archive.shards, [os.path.join(self.tmpdir, "results-{:03d}.tar.gz".format(i))
+                                          for i in range(2)])
+        self.assertEqual(archive.job_dirs, [("job-0", True), ("job-1", False), ("job-1/job-0", True),
+                                            ("job-1/job-1", True), ("job-2", True), ("job-10", True)])
+
+        # all the files of a job are in the same shard
+        archived_files = []
+        for i_shard, shard in enumerate(archive.shards):
+            with tarfile.open(shard, "r:gz") as tar_file:
+                for name in tar_file.getnames():
+                    file_path = os.path.relpath(name, ResultsArchive.arc_root)
+                    self.assertEqual(archive.files[file_path][0], i_shard)
+                    archived_files.append(file_path)
+
+        self.assertEqual(sorted(archived_files), sorted(archive.files.keys()))
+        self.assertEqual(len(archived_files), 1 + 5 * 3 - 1)
+        self.assertNotIn("job-2/output", archived_files)
+        self.assertNotIn("job-0/not_collected", archived_files)
+        self.assertEqual(archive.files["schedule.kschedule"], (0, 2))
+
+    def test_read_from_archive(self):
+
+        tarball = os.path.join(self.tmpdir, "results.tar.gz")
+        ResultsArchive.collect(tarball, self.run_path, ["schedule.kschedule"], self.collect_files, [], n_shards=3)
+
+        sim_data = KResultsData.read_from_sim_paths(self.run_path, "sim", n_workers=1, use_cache=False)
+        archived_sim_data = KResultsData.read_from_sim_paths(tarball, "sim", n_workers=2)
+
+        self.assertEqual([j.name for j in archived_sim_data.jobs], ["job-0", "job-0", "job-1", "job-2", "job-10"])
+        self.assertEqual([j.json_data for j in archived_sim_data.jobs], [j.json_data for j in sim_data.jobs])
+        self.assertEqual(archived_sim_data.class_stats_sums({}), sim_data.class_stats_sums({}))
+
+        times = list(range(12))
+        self.assertEqual(archived_sim_data.create_global_time_series(times),
+                         sim_data.create_global_time_series(times))
+
+        # jobs without results
+        os.makedirs(os.path.join(self.run_path, "job-3"))
+        tarball = os.path.join(self.tmpdir, "failing.tar.gz")
+        ResultsArchive.collect(tarball, self.run_path, [], self.collect_files, [])
+        self.assertRaises(SystemExit, lambda: KResultsData.read_from_sim_paths(tarball, "sim"))
+        self.assertEqual(len(KResultsData.read_from_sim_paths(tarball, "sim", permissive=True).jobs), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
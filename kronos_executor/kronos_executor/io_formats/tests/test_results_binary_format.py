@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from kronos_executor.io_formats.format_data_handlers.kresults_job import KResultsJob
+from kronos_executor.io_formats.results_binary_format import ResultsBinaryFormat
+
+
+class ResultsBinaryFormatTest(unittest.TestCase):
+
+    kresults_data = {
+        "version": 2,
+        "tag": "KRONOS-KRESULTS-MAGIC",
+        "created": "2017-07-31T01:28:42+00:00",
+        "uid": 1234,
+        "kronosVersion": "0.8.2",
+        "ranks": [
+            {
+                "host": "node-0",
+                "pid": 1000,
+                "rank": 0,
+                "stats": {"cpu": {"count": 30, "elapsed": 3.0, "averageElapsed": 0.1,
+                                  "sumSquaredElapsed": 0.3, "stddevElapsed": 0.0}},
+                "time_series": {"durations": [1.0, 2.0], "flops": [10, 20], "bytes_read": [0, 1.5]}
+            },
+            {
+                "host": "node-1",
+                "pid": 1001,
+                "rank": 1,
+                "stats": {},
+                "time_series": {"durations": [0.5, 0.5, 0.5], "flops": [1, 2, 3]}
+            },
+            {
+                "host": "node-1",
+                "pid": 1002,
+                "rank": 2,
+                "stats": {}
+            }
+        ],
+        "global": {"stats": {"total": 1.0}, "time_series": {"durations": [3.0], "flops": [36]}}
+    }
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.kresults_file = os.path.join(self.tmpdir, "statistics.kresults")
+        with open(self.kresults_file, 'w') as f:
+            json.dump(self.kresults_data, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_lossless(self):
+
+        binary_file = ResultsBinaryFormat.companion_filename(self.kresults_file)
+        ResultsBinaryFormat.write_json_data(self.kresults_data, binary_file)
+
+        binary_data = ResultsBinaryFormat(binary_file)
+        self.assertEqual(json.dumps(binary_data.json_data()), json.dumps(self.kresults_data))
+
+        # per-rank access
+        self.assertEqual(binary_data.n_ranks, 3)
+        self.assertEqual(binary_data.rank_metrics(1), ["durations", "flops"])
+        self.assertEqual(binary_data.rank_series(1, "flops").tolist(), [1, 2, 3])
+        self.assertEqual(binary_data.rank_series(2, "flops").tolist(), [])
+        self.assertRaises(KeyError, lambda: binary_data.rank_column("n_write"))
+
+    def test_kresults_job(self):
+
+        json_job = KResultsJob.from_kresults_file(self.kresults_file)
+
+        ResultsBinaryFormat.write_json_data(self.kresults_data, ResultsBinaryFormat.companion_filename(self.kresults_file))
+        binary_job = KResultsJob.from_kresults_file(self.kresults_file)
+        self.assertIsNotNone(binary_job._binary_data)
+
+        self.assertEqual(binary_job.n_cpu, json_job.n_cpu)
+        self.assertEqual(binary_job.t_end, json_job.t_end)
+        self.assertEqual(binary_job.get_stats(), json_job.get_stats())
+        self.assertEqual(binary_job.time_series.keys(), json_job.time_series.keys())
+        for ts_name, series in json_job.time_series.items():
+            for k, v in series.items():
+                self.assertEqual(binary_job.time_series[ts_name][k].tolist(), v.tolist())
+
+        # out of date companion files are ignored
+        stat = os.stat(self.kresults_file)
+        os.utime(self.kresults_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertIsNone(KResultsJob.from_kresults_file(self.kresults_file)._binary_data)
+
+
+if __name__ == "__main__":
+    unittest.main()
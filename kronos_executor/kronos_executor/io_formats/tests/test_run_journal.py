@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+import math
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from kronos_executor.io_formats.run_journal import RunJournal, RunJournalWriter
+
+
+class RunJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, RunJournal.journal_filename)
+
+        # 0 -> 2, 1 -> 2, 2 -> 3 (job 4 is never submitted)
+        writer = RunJournalWriter(self.filename, sim_token="abc")
+        writer.jobs([(str(i), "wl_{}".format(i)) for i in range(5)], {"2": {"0", "1"}, "3": {"2"}})
+
+        self.t_0 = 1000.0
+        for ev, jid, t in [("ready", "0", 1.0), ("ready", "1", 1.0), ("ready", "4", 1.0),
+                           ("submitted", "0", 1.5), ("submitted", "1", 2.0),
+                           ("complete", "0", 5.0), ("complete", "1", 7.0),
+                           ("ready", "2", 7.25), ("submitted", "2", 8.0),
+                           ("complete", "2", 10.0), ("complete", "2", 11.0),
+                           ("ready", "3", 10.5), ("submitted", "3", 11.0), ("complete", "3", 12.0)]:
+            writer.event(ev, jid, self.t_0 + t)
+        writer.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_read(self):
+
+        self.assertTrue(RunJournal.is_journal(self.filename))
+
+        journal = RunJournal(self.filename)
+        self.assertEqual(len(journal), 5)
+        self.assertEqual(journal.sim_token, "abc")
+        self.assertEqual(journal.job_ids, ["0", "1", "2", "3", "4"])
+        self.assertEqual(journal.names[journal.index["3"]], "wl_3")
+        self.assertEqual(sorted(zip(journal.producers.tolist(), journal.consumers.tolist())),
+                         [(0, 2), (1, 2), (2, 3)])
+
+        # only the first occurrence of an event counts
+        times = journal.job_times("2")
+        self.assertEqual([times[ev] - self.t_0 for ev in RunJournal.event_types], [7.25, 8.0, 10.0])
+
+        times = journal.job_times("4")
+        self.assertEqual(times["ready"] - self.t_0, 1.0)
+        self.assertTrue(math.isnan(times["submitted"]))
+
+        # not a journal
+        with open(os.path.join(self.tmpdir, "log"), "w") as f:
+            f.write("2018-01-01 00:00:00,000; INFO; Config: {}\n")
+        self.assertFalse(RunJournal.is_journal(os.path.join(self.tmpdir, "log")))
+        self.assertRaises(ValueError, RunJournal, os.path.join(self.tmpdir, "log"))
+
+    def test_timings(self):
+
+        journal = RunJournal(self.filename)
+
+        np.testing.assert_allclose(journal.queue_waits(), [0.5, 1.0, 0.75, 0.5, np.nan])
+        np.testing.assert_allclose(journal.last_dependency_times() - self.t_0, [np.nan, np.nan, 7.0, 10.0, np.nan])
+
+        # from the last dependency to complete, or from the release for the root jobs
+        np.testing.assert_allclose(journal.submission_lags(), [0.5, 1.0, 1.0, 1.0, np.nan])
+
+        self.assertEqual([journal.job_ids[row] for row in journal.critical_path()], ["1", "2", "3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
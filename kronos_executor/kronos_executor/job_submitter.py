@@ -1,9 +1,15 @@
 
+import collections
 import datetime
+import functools
 import itertools
 import logging
+import math
 import multiprocessing
+import queue
 import subprocess
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -22,55 +28,268 @@ def _submit_job(jid, cmdline):
     """Submit the job with the given id and command line
     :param jid: job id
     :param cmdline: command line (list of str)
-    :return: submission timestamp (datetime), job id, command output (bytes)
+    :return: submission timestamp (datetime), job id, command output (bytes),
+             duration of the submission command (s)
     :raise: JobException in case the submission fails"""
     try:
+        t_start = time.monotonic()
         output = subprocess.check_output(cmdline)
         t_finish = datetime.datetime.now()
-        return t_finish, jid, output
+        return t_finish, jid, output, time.monotonic() - t_start
     except Exception as e:
         raise JobException(jid, e)
 
 
+class LatencyHistogram:
+    """Histogram of latencies, in power-of-2 bins of milliseconds
+    (bin i counts the latencies in [2^(i-1), 2^i) ms, bin 0 those below 1 ms)"""
+
+    def __init__(self):
+        self.counts = []
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, latency):
+        """Add a latency (s)"""
+        ibin = max(0, int(math.floor(math.log2(latency * 1000.0))) + 1) if latency > 0.001 else 0
+        if ibin >= len(self.counts):
+            self.counts.extend([0] * (ibin + 1 - len(self.counts)))
+        self.counts[ibin] += 1
+        self.n += 1
+        self.total += latency
+        self.max = max(self.max, latency)
+
+    def percentile(self, pct):
+        """Upper bound of the bin containing the given percentile (s)"""
+        if not self.n:
+            return 0.0
+        threshold = pct / 100.0 * self.n
+        cumulative = 0
+        for ibin, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= threshold:
+                return min(2 ** ibin / 1000.0, self.max)
+        return self.max
+
+    def summary(self):
+        """Summary lines (list of str)"""
+        if not self.n:
+            return ["count: 0"]
+
+        lines = ["count: {}, mean: {:.3f} s, p50 <= {:.3f} s, p90 <= {:.3f} s, p99 <= {:.3f} s, max: {:.3f} s".format(
+            self.n, self.total / self.n, self.percentile(50), self.percentile(90), self.percentile(99), self.max)]
+        for ibin, count in enumerate(self.counts):
+            if count:
+                lines.append("{:>10} ms: {:8d}".format("< {}".format(2 ** ibin), count))
+        return lines
+
+
+_Submission = collections.namedtuple("_Submission", ["job", "cmdline", "attempt", "t_queued", "batch_jobs"])
+
+
 class JobSubmitter:
     """Submit jobs in parallel
-    :param n_submitters: number of submitter processes"""
 
-    def __init__(self, n_submitters):
+    Jobs are queued by `submit_async` and handed over to the submitter processes as slots
+    become available, and the completed submissions are collected with `poll`.
+
+    :param n_submitters: number of submitter processes
+    :param window: (optional) max number of submissions in progress at once (default: 2 * n_submitters)
+    :param rate_limit: (optional) max number of submissions per second
+    :param retries: (optional) number of times a failed submission is retried
+    :param retry_delay: (optional) delay before the first retry (s), doubled at each retry
+    :param batch_size: (optional) max number of independent jobs of the same shape submitted at once
+                       (for jobs providing `get_batch_key` and `create_batch`)"""
+
+    def __init__(self, n_submitters, window=None, rate_limit=None, retries=0, retry_delay=1.0, batch_size=1):
         self._submitters = multiprocessing.Pool(n_submitters)
 
+        self.window = window or 2 * n_submitters
+        self.rate_limit = rate_limit
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.batch_size = batch_size
+
+        # latency of the submission commands, and from the submission request to its completion
+        self.command_latency = LatencyHistogram()
+        self.total_latency = LatencyHistogram()
+
+        # the completion callbacks run in a thread of the pool
+        self._lock = threading.Lock()
+        self._pending = collections.deque()
+        self._retry_timers = set()
+        self._n_in_flight = 0
+        self._t_next_submission = 0.0
+        self._completed = queue.Queue()
+        self._n_outstanding = 0
+
     def submit(self, jobs, deps=None):
-        """Submit the given jobs
+        """Submit the given jobs and wait for the submissions to complete
         Upon successful submission, the job's `submission_callback` method is
         called in a separate thread with the output of the submission command.
         :param jobs: list of Job objects to submit
         :param deps: (optional) dependencies for each job
         :return: list of (timestamp, job id, output) tuples"""
+        job_ids = set(job.id for job in jobs)
+        self.submit_async(jobs, deps)
+
+        results = {}
+        while job_ids.difference(results):
+            for res in self.poll(timeout=self.get_wait_time()):
+                results[res[1]] = res
+
+        return [results[job.id] for job in jobs]
+
+    def submit_async(self, jobs, deps=None):
+        """Queue the given jobs for submission, without waiting
+        Upon successful submission, the job's `submission_callback` method is
+        called in a separate thread with the output of the submission command.
+        :param jobs: list of Job objects to submit
+        :param deps: (optional) dependencies for each job"""
         if deps is None:
             deps = itertools.repeat([])
-        futures = []
-        for job, jdeps in zip(jobs, deps):
-            job_args = (job.id, job.get_submission_arguments(jdeps))
-            futures.append(
-                self._submitters.apply_async(
-                    _submit_job, job_args,
-                    callback=self._wrap_callback(job)))
+        submissions = [(job, jdeps, None) for job, jdeps in zip(jobs, deps)]
+        if self.batch_size > 1:
+            submissions = self._make_batches(submissions)
+
+        t_queued = time.monotonic()
+        with self._lock:
+            for job, jdeps, batch_jobs in submissions:
+                self._pending.append(_Submission(job, job.get_submission_arguments(jdeps), 0, t_queued, batch_jobs))
+                self._n_outstanding += len(batch_jobs) if batch_jobs else 1
+            self._dispatch()
+
+    def poll(self, timeout=0.0):
+        """Collect the completed submissions
+        :param timeout: max time to wait for a submission to complete (s), None to wait indefinitely
+        :return: list of (timestamp, job id, output) tuples
+        :raise: JobException if a submission failed (after all the retries)"""
+        with self._lock:
+            self._dispatch()
+
+        completed = []
+        try:
+            completed.append(self._completed.get(timeout=timeout) if timeout != 0.0
+                             else self._completed.get_nowait())
+            while True:
+                completed.append(self._completed.get_nowait())
+        except queue.Empty:
+            pass
 
         results = []
-        for future in futures:
-            tt, jid, output = future.get()
-            t_ep = tt.timestamp()
-            logger.info("[Proc Time: {} (ep: {})] ---> Submitted job: {}".format(tt, t_ep, jid))
-            results.append((tt, jid, output))
+        for res, exc in completed:
+            if exc is not None:
+                raise exc
+
+            for tt, jid, output in res:
+                self._n_outstanding -= 1
+                t_ep = tt.timestamp()
+                logger.info("[Proc Time: {} (ep: {})] ---> Submitted job: {}".format(tt, t_ep, jid))
+                results.append((tt, jid, output))
 
         return results
 
+    def n_outstanding(self):
+        """Number of queued submissions not collected yet"""
+        return self._n_outstanding
+
+    def get_wait_time(self):
+        """Time until the next submission delayed by the rate limit is due
+        :return: time (s), or None if no submission is delayed"""
+        with self._lock:
+            if not self._pending or self._n_in_flight >= self.window:
+                return None
+            return max(0.0, self._t_next_submission - time.monotonic())
+
     def close(self):
+        with self._lock:
+            for timer in self._retry_timers:
+                timer.cancel()
+        for name, histogram in [("command", self.command_latency), ("total (including queueing)", self.total_latency)]:
+            logger.info("Submission latency, {}:".format(name))
+            for line in histogram.summary():
+                logger.info("    " + line)
         self._submitters.close()
         self._submitters.join()
 
-    def _wrap_callback(self, job):
-        def callback(res):
-            t_finish, jid, output = res
-            job.submission_callback(output)
-        return callback
+    def _make_batches(self, submissions):
+        """Group the independent jobs with the same batch key
+        :param submissions: list of (job, dependencies, None) tuples
+        :return: list of (job or batch, dependencies, batched jobs or None) tuples"""
+        batched = []
+        groups = collections.OrderedDict()
+        for job, jdeps, _ in submissions:
+            key = job.get_batch_key() if hasattr(job, "get_batch_key") and not jdeps else None
+            if key is None:
+                batched.append((job, jdeps, None))
+            else:
+                groups.setdefault(key, []).append(job)
+
+        for group in groups.values():
+            for i in range(0, len(group), self.batch_size):
+                chunk = group[i:i+self.batch_size]
+                if len(chunk) == 1:
+                    batched.append((chunk[0], [], None))
+                else:
+                    batched.append((chunk[0].create_batch(chunk), [], chunk))
+
+        return batched
+
+    def _dispatch(self):
+        """Hand over the queued submissions to the submitters (to be called with the lock held)"""
+        now = time.monotonic()
+        while self._pending and self._n_in_flight < self.window:
+
+            if self.rate_limit:
+                if now < self._t_next_submission:
+                    break
+                self._t_next_submission = max(now, self._t_next_submission) + 1.0 / self.rate_limit
+
+            sub = self._pending.popleft()
+            self._n_in_flight += 1
+            self._submitters.apply_async(
+                _submit_job, (sub.job.id, sub.cmdline),
+                callback=functools.partial(self._on_success, sub),
+                error_callback=functools.partial(self._on_error, sub))
+
+    def _on_success(self, sub, res):
+        t_finish, jid, output, t_command = res
+        exc = None
+        try:
+            sub.job.submission_callback(output)
+        except Exception as e:
+            exc = JobException(jid, e)
+
+        with self._lock:
+            self._n_in_flight -= 1
+            self.command_latency.add(t_command)
+            self.total_latency.add(time.monotonic() - sub.t_queued)
+            if sub.batch_jobs:
+                # job batch: one result per job
+                res = [(t_finish, job.id, job_output) for job, job_output in
+                       zip(sub.batch_jobs, sub.job.job_outputs or [])]
+            else:
+                res = [(t_finish, jid, output)]
+            self._completed.put((res, exc))
+            self._dispatch()
+
+    def _on_error(self, sub, exc):
+        with self._lock:
+            self._n_in_flight -= 1
+            if sub.attempt < self.retries:
+                delay = self.retry_delay * 2 ** sub.attempt
+                logger.warning("Submission of {} failed, retrying in {} s".format(exc, delay))
+                timer = threading.Timer(delay, self._retry, (sub._replace(attempt=sub.attempt + 1),))
+                timer.daemon = True
+                self._retry_timers.add(timer)
+                timer.start()
+            else:
+                self._completed.put((None, exc))
+            self._dispatch()
+
+    def _retry(self, sub):
+        with self._lock:
+            self._retry_timers.discard(threading.current_thread())
+            self._pending.appendleft(sub)
+            self._dispatch()
@@ -15,6 +15,12 @@ event_types = {
     "Failed": EventFailed,
 }
 
+# characters that may terminate a message
+_message_terminators = {
+    bytes: b"\0\r\n\t ",
+    str: "\0\r\n\t ",
+}
+
 logger = logging.getLogger(__name__)
 
 
@@ -70,8 +76,10 @@ class EventFactory(object):
             return None
 
         # try to decode the string into a json..
+        # NB: messages are typically terminated by a newline (kronos-notify) or by
+        # a NUL character (synthetic apps), strip them so that one decoding is enough
         try:
-            event_json = json.loads(event_string)
+            event_json = json.loads(event_string.rstrip(_message_terminators[type(event_string)]))
         except ValueError:
             try:
                 event_json = json.loads(event_string[:-1])
@@ -79,6 +87,12 @@ class EventFactory(object):
                 logger.warning("Event decoding FAILED => message discarded {}".format(event_string))
                 return None
 
+        # fast path: well-formed event of a known type
+        if isinstance(event_json, dict):
+            event_class = event_types.get(event_json.get("type"))
+            if event_class is not None:
+                return event_class(event_json, validate_event=validate_event)
+
         if isinstance(event_json, str):
             logger.warning("Event decoding FAILED => message discarded {}".format(event_string))
             return None
@@ -5,10 +5,13 @@
 # In applying this licence, ECMWF does not waive the privileges and immunities 
 # granted to it by virtue of its status as an intergovernmental organisation nor
 # does it submit to any jurisdiction.
+import asyncio
+import collections
 import queue
 import logging
 import multiprocessing
 import socket
+import time
 from datetime import datetime
 
 from kronos_executor.kronos_events import EventFactory
@@ -23,8 +26,9 @@ class EventDispatcher(object):
     """
 
     buffer_size = 4096
+    listen_backlog = 1024
 
-    def __init__(self, queue, server_host='localhost', server_port=7363, sim_token=None):
+    def __init__(self, queue, server_host='localhost', server_port=7363, sim_token=None, max_stored_events=None):
 
         """
         Setup the socket and bind it to the appropriate port
@@ -38,7 +42,7 @@ class EventDispatcher(object):
 
         # bind it to port and set it to listen status
         self.sock.bind(self.server_address)
-        self.sock.listen(1024)
+        self.sock.listen(self.listen_backlog)
         self.terminate = False
 
         # Unique simulation hash
@@ -49,7 +53,8 @@ class EventDispatcher(object):
         self.listener_proc = multiprocessing.Process(target=self._listen_for_messages)
 
         # log of all events with timings taken upon msg reception
-        self.timed_events = []
+        # (only the most recent max_stored_events are kept, if set)
+        self.timed_events = collections.deque(maxlen=max_stored_events)
 
     def __str__(self):
         return "KRONOS-DISPATCHER: host:{}, port:{} ".format(self.server_host, self.server_port)
@@ -98,21 +103,30 @@ class EventDispatcher(object):
     def get_next_message(self):
         return self.listener_queue.get()
 
-    def get_events_batch(self, batch_size=1):
+    def get_events_batch(self, batch_size=1, timeout=0.0):
         """
         Get a batch of events
         :param batch_size:
+        :param timeout: max time (in seconds) to wait for the first event of the batch (0: do not wait)
         :return:
         """
 
         _batch = []
 
+        deadline = time.monotonic() + timeout
+
         queue_empty_reached = False
         try:
             while len(_batch) < batch_size:
 
+                # wait (up to the deadline) only until an event is available
+                wait_time = deadline - time.monotonic() if not _batch else 0.0
+
                 # get msg and timestamp from the queue
-                (msg, msg_timestamp) = self.listener_queue.get(block=False)
+                if wait_time > 0:
+                    (msg, msg_timestamp) = self.listener_queue.get(block=True, timeout=wait_time)
+                else:
+                    (msg, msg_timestamp) = self.listener_queue.get(block=False)
 
                 kronos_event = EventFactory.from_string(msg, validate_event=False)
 
@@ -121,6 +135,7 @@ class EventDispatcher(object):
                     # Dispatch only legitimate messages (i.e. TOKEN present and correct)
                     if hasattr(kronos_event, "token"):
                         if str(kronos_event.token) == str(self.sim_token):
+                            kronos_event.reception_time = msg_timestamp
                             _batch.append(kronos_event)
                             self.timed_events.append((kronos_event, msg_timestamp))
                         else:
@@ -131,6 +146,7 @@ class EventDispatcher(object):
                         # TODO: ideally we would keep the check of the token at the top level only..
                         if hasattr(kronos_event, "info"):
                             if kronos_event.info.get("token", "") == str(self.sim_token):
+                                kronos_event.reception_time = msg_timestamp
                                 _batch.append(kronos_event)
                                 self.timed_events.append((kronos_event, msg_timestamp))
                             else:
@@ -146,3 +162,132 @@ class EventDispatcher(object):
 
     def stop(self):
         self.listener_proc.terminate()
+
+
+class EventStream(object):
+
+    """
+    Newline-delimited stream of events received on a (non-blocking) connection.
+    Whatever is left when the connection is closed is taken as the last event.
+    """
+
+    def __init__(self, connection, listener_queue, buffer_size, max_message_size):
+        self.connection = connection
+        self.listener_queue = listener_queue
+        self.buffer_size = buffer_size
+        self.max_message_size = max_message_size
+        self.buffer = b""
+
+    def read(self):
+        """
+        Read all the data available on the connection
+        :return: True if the connection has been closed
+        """
+
+        try:
+            while True:
+                data = self.connection.recv(self.buffer_size)
+
+                if not data:
+                    self._put(self.buffer)
+                    break
+
+                self.buffer += data
+                if b"\n" in data:
+                    *messages, self.buffer = self.buffer.split(b"\n")
+                    for msg in messages:
+                        self._put(msg)
+
+                if len(self.buffer) > self.max_message_size:
+                    logger.warning("Event message exceeds {} bytes => connection closed".format(self.max_message_size))
+                    break
+
+        except (BlockingIOError, InterruptedError):
+            return False
+
+        except ConnectionError as e:
+            logger.warning("Event connection aborted: {}".format(e))
+
+        self.connection.close()
+        return True
+
+    def _put(self, msg):
+
+        # store event and timestamp in the queue (skip blank lines)
+        if msg.strip():
+            self.listener_queue.put((msg, datetime.now().timestamp()), block=True)
+
+
+class AsyncEventDispatcher(EventDispatcher):
+
+    """
+    Event dispatcher that serves many concurrent connections through asyncio.
+    Each connection can carry a persistent stream of newline-delimited events
+    (a connection carrying a single event, terminated by closing it, is still accepted)
+    """
+
+    # maximum size of a single (newline-delimited) event message
+    max_message_size = 2 ** 20
+
+    def _listen_for_messages(self):
+        """
+        Runs the asyncio event server (in the listener process)
+        :return:
+        """
+        asyncio.run(self._serve())
+
+    async def _serve(self):
+        """
+        Serve all the incoming connections on the (already bound) socket
+        :return:
+        """
+
+        loop = asyncio.get_running_loop()
+
+        self.sock.setblocking(False)
+        loop.add_reader(self.sock.fileno(), self._accept_connections, loop)
+
+        # serve forever (until the listener process is terminated)
+        await loop.create_future()
+
+    def _accept_connections(self, loop):
+        """
+        Accept all the pending connections. Most connections carry a single short
+        event that is already fully available: these are read straight away and
+        only the connections still open are handed over to the event loop.
+        :param loop:
+        :return:
+        """
+
+        for _ in range(self.listen_backlog):
+
+            try:
+                connection, client_address = self.sock.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+
+            connection.setblocking(False)
+            stream = EventStream(connection, self.listener_queue, self.buffer_size, self.max_message_size)
+
+            if not stream.read():
+                loop.add_reader(connection.fileno(), self._read_connection, loop, stream)
+
+    @staticmethod
+    def _read_connection(loop, stream):
+        """
+        Read the data available on an open connection
+        :param loop:
+        :param stream:
+        :return:
+        """
+
+        fd = stream.connection.fileno()
+        if stream.read():
+            loop.remove_reader(fd)
+
+
+# type of dispatchers from config..
+dispatcher_types = {
+    "socket": EventDispatcher,
+    "asyncio": AsyncEventDispatcher
+}
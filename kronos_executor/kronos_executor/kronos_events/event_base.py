@@ -16,14 +16,14 @@ class EventBase(object):
     A Kronos event that can be triggered by jobs
     """
 
+    # only the top-level keys of a kronos event are kept (no per-instance dict)
+    __slots__ = ("type", "info", "token", "reception_time", "_hashed")
+
     # JSON schema of a kronos event
     schema_json = os.path.join(os.path.dirname(__file__), "schema.json")
 
     def __init__(self, message_json, validate_event=False):
 
-        # keeps the json internally
-        self.__message_json = message_json
-
         # check all the configurations
         if validate_event:
             self.validate_json(message_json)
@@ -33,19 +33,43 @@ class EventBase(object):
             message_json["info"]["job"] = str(message_json["info"]["job"])
 
         # keep the top-level keys as attributes
+        # (keys unknown to this event type are not part of the event schema, and are ignored)
         for k, v in message_json.items():
-            setattr(self, k, v)
+            try:
+                setattr(self, k, v)
+            except AttributeError:
+                pass
+
+        # time at which the event has been received by the dispatcher (if any)
+        self.reception_time = None
+
+        # the hashed version of the event is computed only once
+        # (if the event is incomplete, get_hashed will raise when called)
+        try:
+            self._hashed = self.compute_hashed()
+        except (KeyError, AttributeError):
+            self._hashed = None
+
+    def compute_hashed(self):
+        """
+        Hashed version of this event (to be implemented by each event type)
+        :return:
+        """
+        raise NotImplementedError
 
     def get_hashed(self):
         """
         Hashed version of this event
         :return:
         """
-        raise NotImplementedError
+
+        if self._hashed is None:
+            self._hashed = self.compute_hashed()
+
+        return self._hashed
 
     def __str__(self):
-        return "KRONOS-EVENT: type: {}; job: {}".format(self.__message_json["type"],
-                                                        self.__message_json["info"].get("job"))
+        return "KRONOS-EVENT: type: {}; job: {}".format(self.type, self.info.get("job"))
 
     def __bytes__(self):
         return str(self).encode('utf-8')
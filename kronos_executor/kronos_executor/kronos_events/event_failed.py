@@ -14,10 +14,12 @@ class EventFailed(EventBase):
     An event that indicates a job has failed
     """
 
+    __slots__ = ()
+
     def __init__(self, event_json, validate_event=False):
         super(EventFailed, self).__init__(event_json, validate_event=validate_event)
 
-    def get_hashed(self):
+    def compute_hashed(self):
         """
         Hashed version of this event
         :return:
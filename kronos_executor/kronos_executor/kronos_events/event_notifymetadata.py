@@ -13,10 +13,12 @@ class EventNotifyMetadata(EventBase):
     An event that communicates a metadata notification
     """
 
+    __slots__ = ("metadata",)
+
     def __init__(self, event_json, validate_event=False):
         super(EventNotifyMetadata, self).__init__(event_json, validate_event=validate_event)
 
-    def get_hashed(self):
+    def compute_hashed(self):
         """
         Hashed version of this event
         :return:
@@ -5,11 +5,11 @@
 # In applying this licence, ECMWF does not waive the privileges and immunities 
 # granted to it by virtue of its status as an intergovernmental organisation nor
 # does it submit to any jurisdiction.
+import collections
 import logging
 import multiprocessing
 
-import copy
-from kronos_executor.kronos_events.dispatcher import EventDispatcher
+from kronos_executor.kronos_events.dispatcher import dispatcher_types
 from kronos_executor.kronos_events import EventFactory
 
 logger = logging.getLogger(__name__)
@@ -22,22 +22,26 @@ class Manager(object):
      - It decides if a job is eligible for submission
     """
 
-    def __init__(self, server_host='localhost', server_port=7363, sim_token=None):
+    def __init__(self, server_host='localhost', server_port=7363, sim_token=None, dispatcher_mode="socket",
+                 max_stored_events=None):
 
         # queue to communicate events with the listener..
         queue = multiprocessing.Queue()
 
         # init the event dispatcher and manager
-        self.dispatcher = EventDispatcher(queue,
-                                          server_host=server_host,
-                                          server_port=server_port,
-                                          sim_token=sim_token)
+        self.dispatcher = dispatcher_types[dispatcher_mode](queue,
+                                                            server_host=server_host,
+                                                            server_port=server_port,
+                                                            sim_token=sim_token,
+                                                            max_stored_events=max_stored_events)
 
         # uses an event dispatcher underneath
         self.dispatcher.start()
 
         # list of events occurring during the simulation
         # categorised by event type (for efficiency)
+        # NB: only the most recent max_stored_events of each type are kept (if set)
+        self.max_stored_events = max_stored_events
         self.__events = {}
 
         # stores all the newly arrived events
@@ -55,7 +59,20 @@ class Manager(object):
         """
 
         for new_event in new_events:
-            self.__events.setdefault(new_event.type, []).append(new_event)
+            self._store_event(new_event)
+
+    def _store_event(self, event):
+        """
+        Store an event in the (bounded) history of its type
+        :param event:
+        :return:
+        """
+
+        events_of_type = self.__events.get(event.type)
+        if events_of_type is None:
+            events_of_type = self.__events[event.type] = collections.deque(maxlen=self.max_stored_events)
+
+        events_of_type.append(event)
 
     def get_events(self, type_filter=None):
         """
@@ -78,20 +95,26 @@ class Manager(object):
 
         return self._total_n_processed_events
 
-    def get_latest_events(self, batch_size=1):
+    def get_latest_events(self, batch_size=1, timeout=0.0):
         """
         Wait until a message arrives from the dispatcher
+        :param batch_size: max number of events retrieved from the dispatcher
+        :param timeout: max time (in seconds) to wait for a message (0: do not wait)
         :return:
         """
 
+        # do not wait if some events (e.g. timer events) are already pending
+        if self.latest_events:
+            timeout = 0.0
+
         # get latest event from the dispatcher
         queue_empty_reached, latest_dispatcher_events = \
-            self.dispatcher.get_events_batch(batch_size=batch_size)
+            self.dispatcher.get_events_batch(batch_size=batch_size, timeout=timeout)
 
         if queue_empty_reached:
             logger.debug("Empty queue reached!")
 
-        if latest_dispatcher_events:
+        if latest_dispatcher_events and logger.isEnabledFor(logging.INFO):
             info = "New events arrived [Total so far: {}]".format(self._total_n_processed_events)
             logger.info(info)
 
@@ -104,11 +127,10 @@ class Manager(object):
         # update total n of processed events so far..
         self._total_n_processed_events += len(latest_dispatcher_events)
 
-        # update the list of newly arrived events
-        self.latest_events.extend(latest_dispatcher_events)
-
         # return the newly arrived events and empty the internal list
-        all_latest_events = copy.deepcopy(self.latest_events)
+        # (the events are not modified afterwards, so they are handed over without copies)
+        all_latest_events = self.latest_events
+        all_latest_events.extend(latest_dispatcher_events)
         self.latest_events = []
 
         return all_latest_events
@@ -123,7 +145,7 @@ class Manager(object):
         time_event = EventFactory.from_timestamp(timestamp)
 
         # append this even to the internal database
-        self.__events.setdefault("Time", []).append(time_event)
+        self._store_event(time_event)
 
         # append this also to the newly arrived events
         self.latest_events.append(time_event)
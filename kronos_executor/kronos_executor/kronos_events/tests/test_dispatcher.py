@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+import json
+import multiprocessing
+import socket
+import threading
+import time
+import unittest
+
+from kronos_executor.kronos_events import EventComplete
+from kronos_executor.kronos_events.dispatcher import AsyncEventDispatcher
+
+
+def complete_message(job, token):
+    return json.dumps({
+        "info": {
+            "job": job,
+            "app": "kronos-synapp"
+        },
+        "type": "Complete",
+        "token": token
+    })
+
+
+class AsyncEventDispatcherTests(unittest.TestCase):
+
+    def setUp(self):
+
+        # let the system choose a free port
+        self.dispatcher = AsyncEventDispatcher(multiprocessing.Queue(),
+                                               server_host='localhost',
+                                               server_port=0,
+                                               sim_token="abcd")
+        self.server_address = self.dispatcher.sock.getsockname()
+        self.dispatcher.start()
+
+    def tearDown(self):
+        self.dispatcher.stop()
+        self.dispatcher.sock.close()
+
+    def get_events(self, n_events, timeout=10.0):
+        """
+        Collect events from the dispatcher until n_events have arrived (or timeout)
+        """
+
+        events = []
+        t_end = time.time() + timeout
+        while len(events) < n_events and time.time() < t_end:
+            _, batch = self.dispatcher.get_events_batch(batch_size=n_events)
+            events.extend(batch)
+            time.sleep(0.01)
+
+        return events
+
+    def test_multi_event_stream(self):
+
+        # several newline-delimited events on the same connection
+        with socket.create_connection(self.server_address) as sock:
+            sock.sendall("".join(complete_message(j, "abcd") + "\n" for j in range(3)).encode('ascii'))
+
+        # a single event without trailing newline (one message per connection)
+        with socket.create_connection(self.server_address) as sock:
+            sock.sendall(complete_message(3, "abcd").encode('ascii'))
+
+        # an event with the wrong token is discarded
+        with socket.create_connection(self.server_address) as sock:
+            sock.sendall((complete_message(4, "wrong") + "\n").encode('ascii'))
+
+        events = self.get_events(4)
+        self.assertEqual(len(events), 4)
+        self.assertTrue(all(isinstance(ev, EventComplete) for ev in events))
+        self.assertEqual(sorted(ev.info["job"] for ev in events), ["0", "1", "2", "3"])
+
+        # nothing else arrives
+        self.assertEqual(self.get_events(1, timeout=0.2), [])
+
+    def test_wait_for_events(self):
+
+        # nothing arrives: wait until timeout
+        t_start = time.time()
+        queue_empty_reached, events = self.dispatcher.get_events_batch(batch_size=10, timeout=0.2)
+        self.assertTrue(queue_empty_reached)
+        self.assertEqual(events, [])
+        self.assertGreaterEqual(time.time() - t_start, 0.2)
+
+        # an event arriving while waiting is returned straight away
+        def send_delayed():
+            time.sleep(0.1)
+            with socket.create_connection(self.server_address) as sock:
+                sock.sendall((complete_message(0, "abcd") + "\n").encode('ascii'))
+
+        sender = threading.Thread(target=send_delayed)
+        sender.start()
+
+        t_start = time.time()
+        _, events = self.dispatcher.get_events_batch(batch_size=10, timeout=10.0)
+        sender.join()
+
+        self.assertEqual(len(events), 1)
+        self.assertLess(time.time() - t_start, 5.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,7 +6,7 @@ import unittest
 # Ensure imports work both in installation, and git, environments
 from jsonschema import ValidationError
 
-from kronos_executor.kronos_events import EventComplete, EventTime, EventMetadataChange
+from kronos_executor.kronos_events import EventComplete, EventTime, EventMetadataChange, EventFactory
 
 
 class EventTests(unittest.TestCase):
@@ -170,6 +170,40 @@ class EventTests(unittest.TestCase):
         # test invalid
         self.assertRaises(ValidationError, lambda: EventMetadataChange(meta_json_invalid, validate_event=True))
 
+    def test_event_from_string(self):
+
+        msg = b'{"type": "Complete", "info": {"app": "kronos-synapp", "job": 12}, "token": "abcd"}'
+
+        # messages terminated by newline (kronos-notify) or NUL (synthetic apps)
+        for terminated_msg in [msg, msg + b"\n", msg + b"\0", msg.decode("ascii") + "\n"]:
+            event = EventFactory.from_string(terminated_msg)
+            self.assertIsInstance(event, EventComplete)
+            self.assertEqual(event.token, "abcd")
+            self.assertEqual(event.get_hashed(), (("type", "Complete"), ("app", "kronos-synapp"), ("job", "12")))
+
+        # an extra trailing character is still tolerated
+        self.assertIsInstance(EventFactory.from_string(msg + b"x"), EventComplete)
+
+        self.assertIsNone(EventFactory.from_string(b'{"info": {"job": 12}}'))
+        self.assertIsNone(EventFactory.from_string(b'"not-an-event"'))
+        self.assertIsNone(EventFactory.from_string(b'{"type": '))
+
+    def test_event_compact(self):
+
+        event = EventFactory.from_dictionary({"type": "Time", "info": {"timestamp": 3}})
+
+        # no per-instance dictionary, missing keys are not set
+        self.assertFalse(hasattr(event, "__dict__"))
+        self.assertFalse(hasattr(event, "token"))
+
+        # the hashed event is computed once
+        self.assertIs(event.get_hashed(), event.get_hashed())
+
+        # incomplete events only fail when the hashed event is requested
+        incomplete = EventFactory.from_dictionary({"type": "Complete", "info": {"job": 1}})
+        self.assertRaises(KeyError, incomplete.get_hashed)
+
+
 if __name__ == "__main__":
 
     unittest.main()
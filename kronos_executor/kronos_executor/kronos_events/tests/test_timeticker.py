@@ -35,6 +35,21 @@ class TimeTickerTests(unittest.TestCase):
         self.assertEqual(ticker.all_times, [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11])
         self.assertEqual(ticker.last_logged_second, 11)
 
+    def test_seconds_to_next_tick(self):
+
+        starttime = datetime.now()
+        ticker = TimeTicker(starttime)
+
+        # second 0 is due straight away
+        self.assertEqual(ticker.get_seconds_to_next_tick(starttime), 0.0)
+
+        ticker.get_elapsed_seconds(starttime+timedelta(seconds=2.25))
+        self.assertAlmostEqual(ticker.get_seconds_to_next_tick(starttime+timedelta(seconds=2.25)), 0.75)
+        self.assertAlmostEqual(ticker.get_seconds_to_next_tick(starttime+timedelta(seconds=2.9)), 0.1)
+
+        # overdue ticks do not give negative waiting times
+        self.assertEqual(ticker.get_seconds_to_next_tick(starttime+timedelta(seconds=4.5)), 0.0)
+
 
 if __name__ == "__main__":
 
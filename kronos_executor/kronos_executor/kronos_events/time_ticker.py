@@ -45,3 +45,14 @@ class TimeTicker(object):
 
         return elapsed_events_batch
 
+
+    def get_seconds_to_next_tick(self, time_now):
+        """
+        Returns the time (in seconds) until the next second to be logged elapses
+        :param time_now:
+        :return:
+        """
+
+        next_tick = self.last_logged_second + 1
+
+        return max(next_tick - (time_now - self.time_0).total_seconds(), 0.0)
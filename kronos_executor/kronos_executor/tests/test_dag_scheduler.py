@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+import unittest
+
+from kronos_executor.dag_scheduler import DAGScheduler, InvalidDependencies
+
+
+class MockJob(object):
+
+    def __init__(self, job_id, depends):
+        self.id = job_id
+        self.depends = depends
+
+
+def job_dependencies(job):
+    return [(d, d) for d in job.depends]
+
+
+class DAGSchedulerTests(unittest.TestCase):
+
+    def test_ready_jobs(self):
+
+        jobs = [MockJob("0", []),
+                MockJob("1", ["0"]),
+                MockJob("2", ["0", "1", "0"]),
+                MockJob("3", [])]
+
+        dag = DAGScheduler(jobs, job_dependencies)
+        self.assertEqual(dag.n_pending(), 4)
+
+        # root jobs first
+        self.assertEqual([j.id for j in dag.pop_ready()], ["0", "3"])
+        self.assertEqual(dag.pop_ready(), [])
+        self.assertEqual(dag.n_pending(), 2)
+
+        # unknown keys are ignored
+        self.assertEqual(dag.satisfy("99"), 0)
+
+        self.assertEqual(dag.satisfy("0"), 1)
+        self.assertEqual([j.id for j in dag.pop_ready()], ["1"])
+
+        # a dependency is only satisfied once
+        self.assertEqual(dag.satisfy("0"), 0)
+        self.assertEqual(dag.pop_ready(), [])
+
+        self.assertEqual(dag.satisfy("1"), 1)
+        self.assertEqual([j.id for j in dag.pop_ready()], ["2"])
+        self.assertEqual(dag.n_pending(), 0)
+
+    def test_external_dependencies(self):
+
+        # dependencies not satisfied by jobs of the schedule (e.g. timer events)
+        jobs = [MockJob("0", []), MockJob("1", ["time-10"])]
+        dag = DAGScheduler(jobs, lambda j: [(d, None) for d in j.depends])
+
+        self.assertEqual([j.id for j in dag.pop_ready()], ["0"])
+        dag.satisfy("time-10")
+        self.assertEqual([j.id for j in dag.pop_ready()], ["1"])
+
+    def test_invalid_dependencies(self):
+
+        # unknown job
+        jobs = [MockJob("0", []), MockJob("1", ["7"])]
+        self.assertRaises(InvalidDependencies, lambda: DAGScheduler(jobs, job_dependencies))
+
+        # cycles
+        jobs = [MockJob("0", []), MockJob("1", ["0", "3"]), MockJob("2", ["1"]), MockJob("3", ["2"])]
+        self.assertRaises(InvalidDependencies, lambda: DAGScheduler(jobs, job_dependencies))
+
+        jobs = [MockJob("0", ["0"])]
+        self.assertRaises(InvalidDependencies, lambda: DAGScheduler(jobs, job_dependencies))
+
+
+if __name__ == "__main__":
+    unittest.main()
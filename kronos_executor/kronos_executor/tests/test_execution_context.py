@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+import os
+import unittest
+
+from kronos_executor.execution_context import load_context
+
+
+contexts_path = [os.path.join(os.path.dirname(os.path.dirname(__file__)), "execution_contexts")]
+
+
+class ExecutionContextTests(unittest.TestCase):
+
+    def test_job_arrays(self):
+
+        job_config = {"job_name": "kron-batch-0", "num_procs": 4, "num_nodes": 1, "cpus_per_task": 1,
+                      "job_output_file": "out.%a", "job_error_file": "err.%a"}
+
+        context = load_context("slurm", contexts_path, {})
+        self.assertTrue(context.supports_batch_submission())
+
+        script = context.batch_script(job_config, [("job-0/submit", "job-0/out", "job-0/err"),
+                                                   ("job-1/submit", "job-1/out", "job-1/err")])
+        self.assertIn("#SBATCH --ntasks=4\n", script)
+        self.assertIn('case "$SLURM_ARRAY_TASK_ID" in\n', script)
+        self.assertIn("    1) exec job-1/submit >job-1/out 2>job-1/err ;;\n", script)
+
+        self.assertEqual(context.batch_submit_command(job_config, "batch", 2), ["sbatch", "--array=0-1", "batch"])
+        self.assertEqual(context.batch_job_ids(b"1234\n", 2), ["1234_0", "1234_1"])
+
+    def test_job_arrays_pbs_lsf(self):
+
+        context = load_context("pbs", contexts_path, {})
+        self.assertEqual(context.batch_submit_command({}, "batch", 3), ["qsub", "-J", "0-2", "batch"])
+        self.assertEqual(context.batch_job_ids(b"1234[].pbs\n", 2), ["1234[0].pbs", "1234[1].pbs"])
+
+        context = load_context("lsf", contexts_path, {})
+        script = context.batch_script({"job_name": "kron-batch-0", "num_procs": 1, "job_output_file": "out",
+                                       "job_error_file": "err"}, [("a", "a.out", "a.err"), ("b", "b.out", "b.err")])
+        self.assertIn("#BSUB -J kron-batch-0[1-2]\n", script)
+        self.assertIn("    2) exec b >b.out 2>b.err ;;\n", script)
+        self.assertEqual(context.batch_job_ids(b"1234\n", 2), ["1234[1]", "1234[2]"])
+
+    def test_job_arrays_trivial(self):
+
+        context = load_context("trivial", contexts_path, {})
+        self.assertTrue(context.supports_batch_submission())
+        self.assertEqual(context.batch_job_ids(b"101\n102\n", 2), ["101", "102"])
+
+
+if __name__ == "__main__":
+    unittest.main()
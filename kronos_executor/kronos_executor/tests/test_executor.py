@@ -84,6 +84,26 @@ class ExecutorTests(unittest.TestCase):
         self.assertIsInstance(jobs, types.GeneratorType)
         self.assertRaises(AssertionError, lambda: list(jobs))
 
+    def test_generate_jobs(self):
+        """
+        The job classes and templates are loaded once, and the jobs are generated in parallel
+        """
+        job_list = [{"job_class": "synapp", "num_procs": 2} for _ in range(10)]
+
+        config = dict(self.base_config, execution_context="trivial", n_setup_workers=4,
+                      file_read_multiplicity=1, file_read_size_min_pow=10, file_read_size_max_pow=10)
+        e = executor.Executor(config, ScheduleFormat(sa_data_json=job_list))
+        jobs = e.generate_job_internals()
+        e.job_submitter.close()
+
+        self.assertEqual([j.id for j in jobs], [str(i) for i in range(10)])
+        for j in jobs:
+            self.assertTrue(os.path.isfile(j.submit_script))
+            self.assertTrue(os.path.isfile(j.input_file))
+
+        self.assertEqual(list(e._job_classes.keys()), ["synapp"])
+        self.assertEqual(len(set(id(j.template_env) for j in jobs)), 1)
+
     def test_required_options(self):
         """
         Some of the options are required.
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+import os
+import shutil
+import unittest
+
+from kronos_executor.executor import Executor
+from kronos_executor.executor_events_par import ExecutorEventsPar
+from kronos_executor.io_formats.schedule_format import ScheduleFormat
+from kronos_executor.kronos_events import EventFactory
+
+from .testutils import scratch_tmpdir
+
+
+def complete_event(job, reception_time=None):
+    event = EventFactory.from_dictionary({"type": "Complete", "info": {"app": "kronos-synapp", "job": job}})
+    event.reception_time = reception_time
+    return event
+
+
+def failed_event(job):
+    return EventFactory.from_dictionary({"type": "Failed", "info": {"app": "kronos-synapp", "job": job}})
+
+
+class ExecutorEventsParTests(unittest.TestCase):
+
+    def setUp(self):
+        self.base_config = {
+            'procs_per_node': 1,
+            'job_dir': scratch_tmpdir(),
+            'read_cache': scratch_tmpdir(),
+            'job_dir_shared': scratch_tmpdir(),
+            'coordinator_binary': 'invalid-binary'
+        }
+
+        self.executor = ExecutorEventsPar(self.base_config, ScheduleFormat(sa_data_json=[]))
+
+    def tearDown(self):
+        for k in ['job_dir', 'read_cache', 'job_dir_shared']:
+            if os.path.exists(self.base_config[k]):
+                shutil.rmtree(self.base_config[k])
+
+    def test_update_outstanding_jobs(self):
+
+        self.executor.jobs = [type("Job", (object,), {"id": str(i)}) for i in range(4)]
+        self.executor.outstanding_jobs = {"0", "1", "2", "3"}
+        self.executor.timed_jobs = set()
+
+        # only the completion of (top-level) jobs is accounted for
+        self.executor.update_outstanding_jobs([complete_event(1), complete_event("2.1"), complete_event(7)])
+        self.assertEqual(self.executor.outstanding_jobs, {"0", "2", "3"})
+
+        # repeated completions are harmless
+        self.executor.update_outstanding_jobs([complete_event(1), complete_event(2)])
+        self.assertEqual(self.executor.outstanding_jobs, {"0", "3"})
+
+        self.assertRaises(Executor.SimulationFailed,
+                          lambda: self.executor.update_outstanding_jobs([failed_event(0)]))
+
+    def test_timed_completion_time(self):
+
+        self.executor.jobs = [type("Job", (object,), {"id": str(i)}) for i in range(3)]
+        self.executor.outstanding_jobs = {"0", "1", "2"}
+        self.executor.timed_jobs = {"0", "1"}
+
+        self.executor.update_outstanding_jobs([complete_event(1, 20.0), complete_event(2, 30.0)])
+        self.executor.update_outstanding_jobs([complete_event(0, 10.0)])
+
+        # only the completion of timed jobs counts
+        self.assertEqual(self.executor.last_timed_completion_time, 20.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
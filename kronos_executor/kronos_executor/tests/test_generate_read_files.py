@@ -3,6 +3,7 @@
 import os
 import shutil
 import unittest
+import zlib
 
 from kronos_executor import generate_read_files
 from kronos_executor.global_config import global_config
@@ -118,6 +119,46 @@ class ReadFileGenerationTests(unittest.TestCase):
             # Ensure that things are cleaned up properly, whatever happens
             shutil.rmtree(path)
 
+    def test_read_cache_manifest(self):
+        """
+        The generated files are incompressible, listed in the manifest, and checked against it
+        """
+        path = scratch_tmpdir()
+        global_config['read_file_multiplicity'] = 4
+        global_config['read_file_size_min'] = 3
+        global_config['read_file_size_max'] = 16
+
+        try:
+            total_bytes, _ = generate_read_files.generate_read_cache(path, n_workers=2, use_fallocate=True,
+                                                                     chunk_size=4096)
+            self.assertEqual(total_bytes, 4 * 2 ** 16)
+
+            manifest = generate_read_files.load_manifest(path)
+            self.assertEqual(sorted(manifest["files"].keys()), ["read-cache-{}".format(i) for i in range(4)])
+
+            contents = []
+            for i in range(4):
+                with open(os.path.join(path, "read-cache-{}".format(i)), 'rb') as f:
+                    contents.append(f.read())
+            self.assertEqual(len(set(contents)), 4)
+            self.assertGreater(len(zlib.compress(contents[0])), 0.99 * len(contents[0]))
+
+            self.assertTrue(generate_read_files.test_read_cache(path))
+            self.assertTrue(generate_read_files.verify_read_cache(path))
+
+            # a file modified after the generation (with the same size) is detected
+            fn = os.path.join(path, "read-cache-2")
+            st = os.stat(fn)
+            with open(fn, 'r+b') as f:
+                f.write(b'\0' * 16)
+            os.utime(fn, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000000))
+
+            self.assertFalse(generate_read_files.test_read_cache(path))
+            self.assertFalse(generate_read_files.verify_read_cache(path))
+
+        finally:
+            shutil.rmtree(path)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
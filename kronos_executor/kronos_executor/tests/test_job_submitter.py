@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+import os
+import shutil
+import time
+import unittest
+
+from kronos_executor.job_submitter import JobException, JobSubmitter, LatencyHistogram
+
+from .testutils import scratch_tmpdir
+
+
+class MockJob(object):
+
+    def __init__(self, job_id, cmdline):
+        self.id = job_id
+        self.cmdline = cmdline
+        self.output = None
+
+    def get_submission_arguments(self, depend_job_ids):
+        return self.cmdline + depend_job_ids
+
+    def submission_callback(self, output):
+        self.output = output
+
+
+class MockBatchableJob(MockJob):
+
+    def __init__(self, job_id, key):
+        super(MockBatchableJob, self).__init__(job_id, ["echo", job_id])
+        self.key = key
+
+    def get_batch_key(self):
+        return self.key
+
+    def create_batch(self, jobs):
+        return MockBatch(jobs)
+
+
+class MockBatch(object):
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.id = "batch-" + jobs[0].id
+        self.job_outputs = None
+
+    def get_submission_arguments(self, depend_job_ids):
+        return ["echo"] + ["id-" + j.id for j in self.jobs]
+
+    def submission_callback(self, output):
+        self.job_outputs = output.split()
+        for job, job_output in zip(self.jobs, self.job_outputs):
+            job.submission_callback(job_output)
+
+
+class JobSubmitterTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = scratch_tmpdir()
+        os.makedirs(self.tmpdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_submit(self):
+
+        submitter = JobSubmitter(2)
+        jobs = [MockJob(str(i), ["echo", "job-{}".format(i)]) for i in range(5)]
+
+        results = submitter.submit(jobs, deps=[["dep"]] * 5)
+        submitter.close()
+
+        self.assertEqual([jid for _, jid, _ in results], ["0", "1", "2", "3", "4"])
+        self.assertEqual([j.output for j in jobs], ["job-{} dep\n".format(i).encode() for i in range(5)])
+        self.assertEqual(submitter.n_outstanding(), 0)
+        self.assertEqual(submitter.command_latency.n, 5)
+
+    def test_streaming(self):
+
+        submitter = JobSubmitter(2)
+        submitter.submit_async([MockJob("slow", ["sleep", "1"]), MockJob("fast", ["true"])])
+
+        # the fast submission is not held up by the slow one
+        results = submitter.poll(timeout=0.5)
+        self.assertEqual([jid for _, jid, _ in results], ["fast"])
+        self.assertEqual(submitter.n_outstanding(), 1)
+
+        results = submitter.poll(timeout=5.0)
+        self.assertEqual([jid for _, jid, _ in results], ["slow"])
+        self.assertEqual(submitter.n_outstanding(), 0)
+        submitter.close()
+
+    def test_rate_limit(self):
+
+        submitter = JobSubmitter(4, rate_limit=20.0)
+        jobs = [MockJob(str(i), ["true"]) for i in range(5)]
+
+        t_start = time.monotonic()
+        submitter.submit(jobs)
+        submitter.close()
+
+        self.assertGreaterEqual(time.monotonic() - t_start, 0.2)
+
+    def test_retries(self):
+
+        # fails the first time only
+        marker = os.path.join(self.tmpdir, "marker")
+        cmdline = ["sh", "-c", "test -e {0} || (touch {0}; false)".format(marker)]
+
+        submitter = JobSubmitter(1, retries=2, retry_delay=0.01)
+        results = submitter.submit([MockJob("0", cmdline)])
+        self.assertEqual([jid for _, jid, _ in results], ["0"])
+
+        # fails every time
+        submitter.submit_async([MockJob("1", ["false"])])
+        self.assertRaises(JobException, lambda: [submitter.poll(timeout=0.1) for _ in range(20)])
+        submitter.close()
+
+    def test_batches(self):
+
+        submitter = JobSubmitter(2, batch_size=2)
+        jobs = [MockBatchableJob(str(i), i % 2) for i in range(5)] + [MockJob("single", ["echo", "single"])]
+
+        # jobs with dependencies are not batched
+        results = submitter.submit(jobs, deps=[[]] * 4 + [["dep"]] + [[]])
+        submitter.close()
+
+        self.assertEqual(sorted(jid for _, jid, _ in results), ["0", "1", "2", "3", "4", "single"])
+        self.assertEqual([j.output for j in jobs[:4]], [b"id-0", b"id-1", b"id-2", b"id-3"])
+        self.assertEqual(jobs[4].output, b"4 dep\n")
+        self.assertEqual(submitter.command_latency.n, 4)
+
+    def test_latency_histogram(self):
+
+        histogram = LatencyHistogram()
+        for latency in [0.0005, 0.0015, 0.003, 0.003, 0.1]:
+            histogram.add(latency)
+
+        self.assertEqual(histogram.counts, [1, 1, 2] + [0] * 4 + [1])
+        self.assertEqual(histogram.percentile(50), 0.004)
+        self.assertEqual(histogram.percentile(100), 0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -107,6 +107,75 @@ def add_value_to_sublist(_list, idx1, idx2, val):
     return _list
 
 
+def _check_bin_ranges(n_bins, first, last):
+    assert np.issubdtype(first.dtype, np.integer) and np.issubdtype(last.dtype, np.integer)
+    if len(first):
+        assert first.min() >= 0
+        assert last.max() <= n_bins
+        assert np.all(first <= last)
+
+
+def add_values_to_bins(bins, first, last, values, max_chunk=2**22):
+    """
+    Add each values[i] to bins[first[i]:last[i]], in place (vectorised equivalent of a sequence of
+    add_value_to_sublist calls: the values are added to each bin in the same order, hence the results
+    are identical)
+    :param bins: numpy array
+    :param first: first bin of each range
+    :param last: last bin (excluded) of each range
+    :param values: value added to each bin of each range (array or scalar)
+    :param max_chunk: max number of (range, bin) pairs expanded at once
+    :return: bins
+    """
+
+    first = np.asarray(first, dtype=np.int64)
+    last = np.asarray(last, dtype=np.int64)
+    values = np.broadcast_to(np.asarray(values, dtype=bins.dtype), first.shape)
+    _check_bin_ranges(len(bins), first, last)
+
+    lengths = last - first
+    ends = np.cumsum(lengths)
+
+    i_start = 0
+    while i_start < len(first):
+
+        # the ranges expanded at once (at least one)
+        chunk_start = ends[i_start] - lengths[i_start]
+        i_end = max(i_start + 1, int(np.searchsorted(ends, chunk_start + max_chunk, side="right")))
+
+        chunk_lengths = lengths[i_start:i_end]
+        offsets = np.repeat(ends[i_start:i_end] - chunk_lengths - chunk_start - first[i_start:i_end], chunk_lengths)
+        bin_indices = np.arange(ends[i_end-1] - chunk_start) - offsets
+
+        np.add.at(bins, bin_indices, np.repeat(values[i_start:i_end], chunk_lengths))
+        i_start = i_end
+
+    return bins
+
+
+def add_counts_to_bins(n_bins, first, last, values):
+    """
+    Bins where each values[i] is added to the bins in [first[i], last[i]) (difference array,
+    exact for integer values)
+    :param n_bins: number of bins
+    :param first: first bin of each range
+    :param last: last bin (excluded) of each range
+    :param values: value added to each bin of each range (array or scalar)
+    :return: numpy array
+    """
+
+    first = np.asarray(first, dtype=np.int64)
+    last = np.asarray(last, dtype=np.int64)
+    values = np.broadcast_to(np.asarray(values), first.shape)
+    _check_bin_ranges(n_bins, first, last)
+
+    diffs = np.zeros(n_bins + 1, dtype=values.dtype if len(values) else np.int64)
+    np.add.at(diffs, first, values)
+    np.subtract.at(diffs, last, values)
+
+    return np.cumsum(diffs[:-1])
+
+
 def cumsum(input_list):
     # return [sum(input_list[:ii+1]) for ii,i in enumerate(input_list)]
     return np.cumsum(input_list)
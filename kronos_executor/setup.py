@@ -54,6 +54,7 @@ setup(
         'kronos_executor': [
             'config_format/exe_config_schema.json',
             'execution_contexts/trivial_run.sh',
+            'execution_contexts/trivial_array_run.sh',
             'io_formats/profile_schema.json',
             'io_formats/results_schema.json',
             'io_formats/schedule_schema.json',
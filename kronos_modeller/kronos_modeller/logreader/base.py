@@ -29,6 +29,12 @@ class LogReader(object):
     recursive = False
     pool_readers = 10
 
+    # Version of the parsing (to be increased when it changes, so that the ingestion indices are rebuilt)
+    reader_version = 1
+
+    # Persistent index of the files already parsed (see IngestionIndex), if any
+    index = None
+
     # How may the job be labelled (for combining with other profiling data, automatically)
     available_label_methods = [
         None,
@@ -60,6 +66,12 @@ class LogReader(object):
     def __bytes__(self):
         return str(self).encode('utf-8')
 
+    def __getstate__(self):
+        # The reader is passed to the processing pool: the ingestion index stays in this process
+        state = self.__dict__.copy()
+        state.pop('index', None)
+        return state
+
     def logfiles(self):
         """
         If the specified path is an (existing) file, then just return that file. If it is a directory, then
@@ -138,14 +150,12 @@ class LogReader(object):
         sys.stdout.write("\r{:d} files processed - {:100s}".format(completed_count, str(p)))
         sys.stdout.flush()
 
-    def read_logs(self):
+    def parse_logs(self, filenames):
         """
-        Iterate through read_log for each job
-
-        --> Returns a generator of job objects, depending on the list of files to parse from self.logfiles()
+        Parse the log files, using a processing pool
+        :param filenames: iterable of log file names
+        :return: iterator of the lists of jobs read from each file (in order)
         """
-        print("Reading {} logs using {} workers".format(self.log_type_name, self.pool_readers))
-
         # n.b. There are constraints on what can be passed as arguments to this routine. The use of global data in
         #      the processing pool, and the use of static functions, is to (a) minimise the data being transferred
         #      between processes using the multiprocessing functionality, and (b) ensure that all of the transferred
@@ -157,12 +167,25 @@ class LogReader(object):
             processes=self.pool_readers,
             global_data=self) as pool:
 
-            list_of_job_lists = pool.imap(self.logfiles())
-
-            for job_list in list_of_job_lists:
-                for job in job_list:
-                    yield job
+            for job_list in pool.imap(filenames):
+                yield job_list
 
         sys.stdout.write("\n")
 
+    def read_logs(self):
+        """
+        Iterate through read_log for each job
+
+        --> Returns a generator of job objects, depending on the list of files to parse from self.logfiles()
+            (with an ingestion index, only the files that are new or have changed are parsed)
+        """
+        print("Reading {} logs using {} workers".format(self.log_type_name, self.pool_readers))
+
+        if self.index is None:
+            list_of_job_lists = self.parse_logs(self.logfiles())
+        else:
+            list_of_job_lists = self.index.update(self)
 
+        for job_list in list_of_job_lists:
+            for job in job_list:
+                yield job
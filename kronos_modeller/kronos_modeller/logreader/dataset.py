@@ -26,10 +26,90 @@ import errno
 import os
 
 from kronos_modeller.kronos_exceptions import ConfigurationError
+from kronos_modeller.logreader.ingestion_index import IngestionIndex
 
 logger = logging.getLogger(__name__)
 
 
+class ChunkedJobList(object):
+    """
+    List of ingested jobs stored on disk, in chunks: the file is a stream of pickles (a header, then
+    one list of jobs per chunk), so that jobs can be appended to it and read back one chunk at a time.
+    Only the file name is pickled with the object.
+    """
+
+    file_version = 1
+    file_magic = "KRONOS-CHUNKED-JOBS-MAGIC"
+
+    def __init__(self, filename):
+
+        self.filename = os.path.abspath(filename)
+
+        with open(self.filename, "rb") as f:
+            try:
+                header = pickle.load(f)
+            except (EOFError, pickle.UnpicklingError):
+                header = None
+
+        if not isinstance(header, dict) or header.get("tag") != self.file_magic or \
+                header.get("version") != self.file_version:
+            raise ConfigurationError("{} is not a chunked job list (version {})".format(filename, self.file_version))
+
+    @classmethod
+    def write(cls, filename, jobs, chunk_size=1000, append=False):
+        """
+        Write jobs to a chunked job list, as they are produced
+        :param filename:
+        :param jobs: iterable of jobs
+        :param chunk_size: N of jobs per chunk
+        :param append: append the jobs to an existing list
+        :return: ChunkedJobList
+        """
+
+        if append and os.path.exists(filename):
+            cls(filename)
+        else:
+            append = False
+
+        with open(filename, "ab" if append else "wb") as f:
+
+            if not append:
+                pickle.dump({"tag": cls.file_magic, "version": cls.file_version}, f)
+
+            chunk = []
+            for job in jobs:
+                chunk.append(job)
+                if len(chunk) >= chunk_size:
+                    pickle.dump(chunk, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    chunk = []
+
+            if chunk:
+                pickle.dump(chunk, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        return cls(filename)
+
+    def chunks(self):
+        """
+        Iterate over the chunks of jobs (only one chunk is loaded at a time)
+        :return: iterator of lists of jobs
+        """
+        with open(self.filename, "rb") as f:
+            pickle.load(f)
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+
+    def __iter__(self):
+        for chunk in self.chunks():
+            for job in chunk:
+                yield job
+
+    def __len__(self):
+        return sum(len(chunk) for chunk in self.chunks())
+
+
 class IngestedDataSet(object):
     """
     This is the base class. It contains only blank data, and a static factory routine
@@ -39,7 +119,8 @@ class IngestedDataSet(object):
 
     def __init__(self, joblist, ingest_path, ingest_config):
         # assert isinstance(joblist, list)
-        self.joblist = list(joblist)
+        # (chunked job lists are kept on disk, and read lazily)
+        self.joblist = joblist if isinstance(joblist, ChunkedJobList) else list(joblist)
         self.ingest_path = ingest_path
         self.ingest_config = ingest_config
 
@@ -117,7 +198,7 @@ class IngestedDataSet(object):
         If the logs are cached, then those should be read in instead.
         """
         abs_ingest_path = os.path.abspath(os.path.realpath(ingest_path))
-        cache_file = "cache.{}".format(base64.b64encode(abs_ingest_path))
+        cache_file = "cache.{}".format(base64.urlsafe_b64encode(abs_ingest_path.encode("utf-8")).decode("ascii"))
         dataset = None
 
         # Remove reparse from the dictionary, so it is never used to compare validity of cached files.
@@ -125,6 +206,14 @@ class IngestedDataSet(object):
         reparse = ingest_config.pop('reparse', False)
         cache = ingest_config.pop('cache', True)
 
+        # streaming mode: the jobs are written to a chunked job list as they are read
+        chunk_file = ingest_config.pop('chunk_file', None)
+        chunk_size = ingest_config.pop('chunk_size', 1000)
+
+        # incremental mode: only the log files not in the ingestion index (or changed since) are parsed
+        index_file = ingest_config.pop('index_file', None)
+        rebuild = ingest_config.pop('rebuild', False)
+
         if not reparse:
 
             try:
@@ -155,7 +244,15 @@ class IngestedDataSet(object):
 
             # Finally read the logs, if that is required
             lr = cls.log_reader_class(ingest_path, **ingest_config)
-            dataset = cls(lr.read_logs(), ingest_path, ingest_config)
+            if index_file:
+                lr.index = IngestionIndex(index_file, cls.log_reader_class.__name__, ingest_path, ingest_config,
+                                          rebuild=rebuild)
+
+            if chunk_file:
+                dataset = cls(ChunkedJobList.write(chunk_file, lr.read_logs(), chunk_size=chunk_size),
+                              ingest_path, ingest_config)
+            else:
+                dataset = cls(lr.read_logs(), ingest_path, ingest_config)
 
             # Pickle the object for later rapid loading.
             if cache:
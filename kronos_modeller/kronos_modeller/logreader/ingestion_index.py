@@ -0,0 +1,195 @@
+# (C) Copyright 1996-2018 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+"""
+A persistent index of the log files ingested by a log reader, so that repeated ingestions
+of the same path only parse the files that are new or have changed
+"""
+
+import logging
+import os
+import pickle
+
+from kronos_modeller.kronos_exceptions import ConfigurationError
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionIndex(object):
+    """
+    For each log file (by absolute path), the key (size, modification time, reader version) of the file
+    when it was parsed, and where the jobs read from it are in the job store.
+
+    The jobs of each log file (before any aggregation by the log reader) are appended to the job store
+    (<index>.jobs.<generation>) as one pickle, and the index records (path, key, offset, length) are
+    appended to the index file after it, as each log file is parsed. Neither is ever held in memory as
+    a whole. When most of the store is no longer used, both are rewritten as a new generation.
+
+    The index is only valid for the same log reader, ingestion path and configuration: otherwise it is
+    rebuilt from scratch.
+    """
+
+    index_version = 1
+    index_magic = "KRONOS-INGESTION-INDEX-MAGIC"
+
+    # Configuration that does not change the ingested jobs
+    ignored_config = ('pool_readers',)
+
+    def __init__(self, filename, reader_name, ingest_path, ingest_config, rebuild=False):
+
+        self.filename = filename
+        self.reader_name = reader_name
+        self.ingest_path = os.path.abspath(os.path.realpath(ingest_path))
+        self.ingest_config = {k: v for k, v in ingest_config.items() if k not in self.ignored_config}
+
+        # abs path -> (key, offset, length)
+        self.entries = {}
+        self.generation = 0
+
+        entries = self._load() if not rebuild and os.path.exists(filename) else None
+        if entries is None:
+            self._rewrite({})
+        else:
+            self.entries = entries
+
+    @property
+    def store_filename(self):
+        return "{}.jobs.{}".format(self.filename, self.generation)
+
+    def _header(self):
+        return {
+            "tag": self.index_magic,
+            "version": self.index_version,
+            "reader": self.reader_name,
+            "ingest_path": self.ingest_path,
+            "ingest_config": self.ingest_config,
+            "generation": self.generation
+        }
+
+    def _load(self):
+        """
+        Read the index records
+        :return: entries, or None if the index does not match the log reader
+        """
+        with open(self.filename, "rb") as f:
+            try:
+                header = pickle.load(f)
+            except (EOFError, pickle.UnpicklingError):
+                header = None
+
+            if not isinstance(header, dict) or header.get("tag") != self.index_magic:
+                raise ConfigurationError("{} is not an ingestion index".format(self.filename))
+
+            if header.get("version") == self.index_version:
+                self.generation = header["generation"]
+
+            if header.get("version") != self.index_version or header["reader"] != self.reader_name or \
+                    header["ingest_path"] != self.ingest_path or header["ingest_config"] != self.ingest_config:
+                logger.info("Ingestion index {} does not match the log reader configuration: rebuilding it".format(
+                    self.filename))
+                return None
+
+            # (the later records of a file replace the earlier ones)
+            entries = {}
+            end = f.tell()
+            while True:
+                try:
+                    abs_fn, key, offset, length = pickle.load(f)
+                except (EOFError, pickle.UnpicklingError):
+                    break
+                entries[abs_fn] = (key, offset, length)
+                end = f.tell()
+
+        # drop a record left incomplete (by an interrupted ingestion), so that new ones can be appended
+        if end < os.path.getsize(self.filename):
+            os.truncate(self.filename, end)
+
+        return entries
+
+    def _rewrite(self, entries):
+        """
+        Write a new generation of the index and of the job store, with the given entries only
+        :param entries: abs path -> (key, offset, length) (in the current store)
+        :return:
+        """
+        old_store_filename = self.store_filename
+        self.generation += 1
+
+        new_entries = {}
+        with open(self.store_filename, "wb") as dst:
+            if entries:
+                with open(old_store_filename, "rb") as src:
+                    for abs_fn, (key, offset, length) in entries.items():
+                        src.seek(offset)
+                        new_entries[abs_fn] = (key, dst.tell(), length)
+                        dst.write(src.read(length))
+
+        # the new generation is in use once the index is replaced
+        tmp_filename = "{}.tmp".format(self.filename)
+        with open(tmp_filename, "wb") as f:
+            pickle.dump(self._header(), f)
+            for abs_fn, entry in new_entries.items():
+                pickle.dump((abs_fn,) + entry, f)
+
+        os.replace(tmp_filename, self.filename)
+        self.entries = new_entries
+
+        if os.path.exists(old_store_filename):
+            os.remove(old_store_filename)
+
+    @staticmethod
+    def file_key(filename, reader_version):
+        st = os.stat(filename)
+        return st.st_size, st.st_mtime_ns, reader_version
+
+    def update(self, reader):
+        """
+        Iterate over the jobs read from the log files of a reader: the files that are new or have changed are
+        parsed (and recorded in the index) as the iteration proceeds, the others are read from the job store
+        :param reader: LogReader
+        :return: iterator of the lists of jobs read from each log file (in the order of reader.logfiles())
+        """
+        files = []
+        for fn in reader.logfiles():
+            abs_fn = os.path.abspath(fn)
+            key = self.file_key(fn, reader.reader_version)
+            entry = self.entries.get(abs_fn)
+            files.append((fn, abs_fn, key, entry is not None and entry[0] == key))
+
+        stale = [fn for fn, _, _, up_to_date in files if not up_to_date]
+        print("Ingestion index: {} of {} log files to parse".format(len(stale), len(files)))
+
+        # compact the store if most of it is not used (anymore)
+        live = {abs_fn: self.entries[abs_fn] for _, abs_fn, _, up_to_date in files if up_to_date}
+        if os.path.getsize(self.store_filename) > 2 * sum(length for _, _, length in live.values()):
+            self._rewrite(live)
+
+        job_lists = reader.parse_logs(stale)
+
+        with open(self.store_filename, "ab") as store_out, open(self.store_filename, "rb") as store_in, \
+                open(self.filename, "ab") as index_out:
+
+            for fn, abs_fn, key, up_to_date in files:
+
+                if up_to_date:
+                    store_in.seek(self.entries[abs_fn][1])
+                    yield pickle.load(store_in)
+
+                else:
+                    job_list = next(job_lists)
+
+                    offset = store_out.tell()
+                    pickle.dump(job_list, store_out, protocol=pickle.HIGHEST_PROTOCOL)
+                    store_out.flush()
+
+                    # (the record is only written once the jobs are in the store)
+                    self.entries[abs_fn] = (key, offset, store_out.tell() - offset)
+                    pickle.dump((abs_fn,) + self.entries[abs_fn], index_out)
+                    index_out.flush()
+
+                    yield job_list
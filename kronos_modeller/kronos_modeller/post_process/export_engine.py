@@ -0,0 +1,102 @@
+# (C) Copyright 1996-2018 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+
+from kronos_modeller.post_process.exporters import writer_map
+
+
+def render_frame(export_frame, export_format):
+    """
+    Export a frame (in a rendering process, the plots use the non-interactive backend
+    set in exportable_types)
+    :param export_frame: ExportableSignalFrame
+    :param export_format:
+    :return: rendering time (s)
+    """
+
+    t_start = time.perf_counter()
+    export_frame.export(export_format)
+    return time.perf_counter() - t_start
+
+
+class ExportEngine(object):
+    """
+    Runs all the exports of a set of simulations. The data of all the exports is calculated first
+    (the global series of each simulation and class are calculated once and shared by the exports),
+    then the frames are rendered in parallel.
+    """
+
+    def __init__(self, sim_set, n_workers=None):
+
+        self.sim_set = sim_set
+        self.n_workers = n_workers
+
+        # export name -> {"data": time to calculate the data, "render": rendering time (in all
+        # the processes), "frames": n of frames} (s)
+        self.timings = OrderedDict()
+        self.t_wall = 0.0
+
+    def export(self, exports, output_path, job_classes):
+        """
+        Run the exports
+        :param exports: list of export configurations
+        :param output_path:
+        :param job_classes:
+        :return:
+        """
+
+        t_wall = time.perf_counter()
+
+        frames = []
+        frame_exports = []
+        for i_export, export_config in enumerate(exports):
+
+            export_name = "{}[{}]".format(export_config["type"], export_config.get("tag", i_export))
+            n_frames = len(frames)
+
+            t_start = time.perf_counter()
+            data_writer = writer_map[export_config["type"]](sim_set=self.sim_set, frames=frames)
+            data_writer.export(export_config=export_config,
+                               output_path=output_path,
+                               job_classes=job_classes)
+
+            self.timings[export_name] = {"data": time.perf_counter() - t_start,
+                                         "render": 0.0,
+                                         "frames": len(frames) - n_frames}
+            frame_exports.extend([export_name] * (len(frames) - n_frames))
+
+        n_workers = min(self.n_workers or os.cpu_count() or 1, len(frames))
+        if n_workers > 1:
+            with multiprocessing.Pool(n_workers) as pool:
+                render_times = pool.starmap(render_frame, frames, chunksize=1)
+        else:
+            render_times = [render_frame(*frame) for frame in frames]
+
+        for export_name, render_time in zip(frame_exports, render_times):
+            self.timings[export_name]["render"] += render_time
+
+        self.t_wall = time.perf_counter() - t_wall
+
+    def timing_report(self):
+        """
+        Timing of the exports
+        :return: list of lines
+        """
+
+        lines = ["{:40s}{:>8s}{:>12s}{:>12s}".format("export", "frames", "data [s]", "render [s]")]
+        for export_name, timing in self.timings.items():
+            lines.append("{:40s}{:8d}{:12.3f}{:12.3f}".format(
+                export_name, timing["frames"], timing["data"], timing["render"]))
+
+        lines.append("total wall time: {:.3f} s".format(self.t_wall))
+
+        return lines
@@ -19,10 +19,13 @@ class ExporterBase(object):
     default_export_format = None
     optional_configs = []
 
-    def __init__(self, sim_set=None):
+    def __init__(self, sim_set=None, frames=None):
         self.sim_set = sim_set
         self.export_config = None
 
+        # if set, the frames are collected (as (frame, format) tuples) to be exported later
+        self.frames = frames
+
     def export(self, export_config, output_path, job_classes, **kwargs):
 
         self.export_config = export_config
@@ -51,3 +54,16 @@ class ExporterBase(object):
 
     def do_export(self, export_config, output_path, job_classes, **kwargs):
         raise NotImplementedError
+
+    def export_frame(self, export_frame, export_format):
+        """
+        Export a frame (or collect it, if the frames are exported later)
+        :param export_frame: ExportableSignalFrame
+        :param export_format:
+        :return:
+        """
+
+        if self.frames is not None:
+            self.frames.append((export_frame, export_format))
+        else:
+            export_frame.export(export_format)
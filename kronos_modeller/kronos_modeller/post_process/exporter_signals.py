@@ -58,8 +58,8 @@ class ExporterTimeSeries(ExporterBase):
         signals = {}
         for cl_name, cl_regex in itertools.chain(job_classes.items(), [("all-classes", None)]):
 
-            # time series of result metrics
-            found_jobs_in_class, series_dict = sim.create_global_time_series(times_plot, job_class_regex=cl_regex)
+            # time series of result metrics and running series (shared with the other exports)
+            found_jobs_in_class, series_dict, found_running, running_signals = sim.global_series(times_plot, cl_regex)
             series = {tsk: ResultProfiledSignal(tsk,
                                                 tsv["times"],
                                                 tsv["values"],
@@ -82,10 +82,9 @@ class ExporterTimeSeries(ExporterBase):
                                                                           signals[cl_name]["kb_read"])
 
             # add the running signals
-            found_jobs_in_class, times, running_signals = sim.create_global_running_series(times_plot, job_class_regex=cl_regex)
-            _signals = {k: ResultRunningSignal(k, times, values) for k, values in running_signals.items()}
+            _signals = {k: ResultRunningSignal(k, times_plot, values) for k, values in running_signals.items()}
 
-            if found_jobs_in_class:
+            if found_running:
                 signals[cl_name].update(_signals)
 
         # ------------------ assemble frame for export.. ------------------
@@ -130,4 +129,4 @@ class ExporterTimeSeries(ExporterBase):
                                              save_filename=output_file,
                                              stretch_plot=1.4
                                              )
-        export_frame.export(export_format)
+        self.export_frame(export_frame, export_format)
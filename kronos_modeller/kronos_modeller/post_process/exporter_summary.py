@@ -86,4 +86,4 @@ class ExporterSummaryRates(ExporterBase):
                                              save_filename=output_file
                                              )
 
-        export_frame.export(export_config["format"])
+        self.export_frame(export_frame, export_config["format"])
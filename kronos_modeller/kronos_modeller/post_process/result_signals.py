@@ -102,7 +102,7 @@ class ResultInstantRatesSignal(ResultSignal):
         e_vals = np.asarray(b_e)
         # p_vals = np.asarray(b_p)
 
-        rates = np.asarray([b / e if e else 0.0 for b, e in zip(b_vals, e_vals)])
+        rates = np.divide(b_vals, e_vals, out=np.zeros(len(b_vals)), where=(e_vals != 0))
 
         _values = rates
         _times = t_vals-t_vals[0]
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# (C) Copyright 1996-2018 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from kronos_modeller.kronos_exceptions import ConfigurationError
+from kronos_modeller.jobs import IngestedJob
+from kronos_modeller.logreader.dataset import ChunkedJobList, IngestedDataSet
+
+
+class FakeLogReader(object):
+
+    def __init__(self, path, n_jobs=0):
+        self.path = path
+        self.n_jobs = n_jobs
+
+    def read_logs(self):
+        for i in range(self.n_jobs):
+            yield IngestedJob(label="job_{}".format(i), ncpus=i)
+
+
+class FakeDataSet(IngestedDataSet):
+    log_reader_class = FakeLogReader
+
+
+class DataSetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "dataset.jobs")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_chunked_job_list(self):
+
+        jobs = (IngestedJob(label="job_{}".format(i), ncpus=i) for i in range(10))
+        joblist = ChunkedJobList.write(self.filename, jobs, chunk_size=4)
+
+        self.assertEqual([len(chunk) for chunk in joblist.chunks()], [4, 4, 2])
+        self.assertEqual(len(joblist), 10)
+        self.assertEqual([job.ncpus for job in joblist], list(range(10)))
+
+        # jobs can be appended
+        jobs = (IngestedJob(label="job_{}".format(i), ncpus=i) for i in range(10, 13))
+        joblist = ChunkedJobList.write(self.filename, jobs, chunk_size=4, append=True)
+        self.assertEqual([len(chunk) for chunk in joblist.chunks()], [4, 4, 2, 3])
+        self.assertEqual([job.ncpus for job in joblist], list(range(13)))
+
+        # not a chunked job list
+        with open(os.path.join(self.tmpdir, "other"), "wb") as f:
+            pickle.dump([1, 2, 3], f)
+        self.assertRaises(ConfigurationError, ChunkedJobList, os.path.join(self.tmpdir, "other"))
+
+    def test_streamed_dataset(self):
+
+        dataset = FakeDataSet.from_logs_path(self.tmpdir, {"cache": False, "reparse": True, "n_jobs": 5,
+                                                           "chunk_file": self.filename, "chunk_size": 2})
+
+        # the jobs are kept on disk (and the streaming options are not part of the ingest config)
+        self.assertIsInstance(dataset.joblist, ChunkedJobList)
+        self.assertEqual(dataset.ingest_config, {"n_jobs": 5})
+        self.assertEqual(str(dataset), "Dataset(FakeDataSet) - 5 jobs")
+
+        # only the name of the job file is pickled
+        dataset = pickle.loads(pickle.dumps(dataset))
+        self.assertEqual(dataset.joblist.filename, self.filename)
+        self.assertEqual([job.label for job in dataset.joblist], ["job_{}".format(i) for i in range(5)])
+
+        # the jobs are still read in memory without streaming
+        dataset = FakeDataSet.from_logs_path(self.tmpdir, {"cache": False, "reparse": True, "n_jobs": 3})
+        self.assertIsInstance(dataset.joblist, list)
+        self.assertEqual(len(dataset.joblist), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
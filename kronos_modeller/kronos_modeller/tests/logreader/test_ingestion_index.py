@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# (C) Copyright 1996-2018 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from kronos_modeller.kronos_exceptions import ConfigurationError
+from kronos_modeller.jobs import IngestedJob
+from kronos_modeller.logreader.base import LogReader
+from kronos_modeller.logreader.dataset import IngestedDataSet
+from kronos_modeller.logreader.ingestion_index import IngestionIndex
+
+
+class CountingLogReader(LogReader):
+    """
+    One job per log file, with the number of lines of the file as ncpus
+    """
+    file_pattern = "*.log"
+    pool_readers = 1
+
+    parsed = []
+
+    def read_log(self, filename, suggested_label):
+        self.parsed.append(os.path.basename(filename))
+        with open(filename, "r") as f:
+            return [IngestedJob(label=os.path.basename(filename), filename=filename, ncpus=len(f.readlines()))]
+
+
+class CountingDataSet(IngestedDataSet):
+    log_reader_class = CountingLogReader
+
+
+class IngestionIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.logdir = os.path.join(self.tmpdir, "logs")
+        self.index_file = os.path.join(self.tmpdir, "ingested.index")
+        os.makedirs(self.logdir)
+
+        for i in range(4):
+            self.write_log("job{}.log".format(i), i + 1)
+
+        CountingLogReader.parsed = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write_log(self, name, n_lines):
+        with open(os.path.join(self.logdir, name), "w") as f:
+            f.write("line\n" * n_lines)
+
+    def ingest(self, **ingest_config):
+        """
+        Ingest the logs using the index, and return the (label, ncpus) of the jobs and the files parsed
+        """
+        ingest_config.update({"cache": False, "reparse": True, "index_file": self.index_file})
+        CountingLogReader.parsed = []
+        dataset = CountingDataSet.from_logs_path(self.logdir, ingest_config)
+
+        return sorted((job.label, job.ncpus) for job in dataset.joblist), sorted(CountingLogReader.parsed)
+
+    def test_incremental(self):
+
+        jobs, parsed = self.ingest()
+        self.assertEqual(jobs, [("job0.log", 1), ("job1.log", 2), ("job2.log", 3), ("job3.log", 4)])
+        self.assertEqual(parsed, ["job0.log", "job1.log", "job2.log", "job3.log"])
+
+        # nothing changed
+        self.assertEqual(self.ingest(), (jobs, []))
+
+        # only the new and changed files are parsed (and the files removed are dropped)
+        self.write_log("job1.log", 10)
+        self.write_log("job4.log", 5)
+        os.remove(os.path.join(self.logdir, "job0.log"))
+
+        jobs, parsed = self.ingest()
+        self.assertEqual(jobs, [("job1.log", 10), ("job2.log", 3), ("job3.log", 4), ("job4.log", 5)])
+        self.assertEqual(parsed, ["job1.log", "job4.log"])
+
+        # the number of workers does not invalidate the index
+        self.assertEqual(self.ingest(pool_readers=2), (jobs, []))
+
+    def test_lazy(self):
+
+        self.ingest()
+        self.write_log("job1.log", 10)
+        self.write_log("job3.log", 10)
+
+        # the files are parsed (and recorded) as the jobs are iterated
+        CountingLogReader.parsed = []
+        lr = CountingLogReader(self.logdir)
+        index = IngestionIndex(self.index_file, "CountingLogReader", self.logdir, {})
+        job_lists = index.update(lr)
+
+        jobs = []
+        for job_list in job_lists:
+            jobs.extend(job.label for job in job_list)
+            self.assertTrue(set(CountingLogReader.parsed) <= set(jobs))
+
+        self.assertEqual(sorted(jobs), ["job0.log", "job1.log", "job2.log", "job3.log"])
+        self.assertEqual(sorted(CountingLogReader.parsed), ["job1.log", "job3.log"])
+
+        # an interrupted ingestion keeps the files recorded so far
+        self.write_log("job2.log", 10)
+        with open(self.index_file, "ab") as f:
+            f.write(b"\x80\x04incomplete")
+
+        jobs, parsed = self.ingest()
+        self.assertEqual(jobs, [("job0.log", 1), ("job1.log", 10), ("job2.log", 10), ("job3.log", 10)])
+        self.assertEqual(parsed, ["job2.log"])
+        self.assertEqual(self.ingest(), (jobs, []))
+
+    def test_streamed(self):
+
+        chunk_file = os.path.join(self.tmpdir, "ingested.jobs")
+        jobs, _ = self.ingest(chunk_file=chunk_file, chunk_size=3)
+
+        self.write_log("job2.log", 10)
+        dataset = CountingDataSet.from_logs_path(self.logdir, {"cache": False, "reparse": True,
+                                                               "index_file": self.index_file,
+                                                               "chunk_file": chunk_file, "chunk_size": 3})
+        self.assertEqual([len(chunk) for chunk in dataset.joblist.chunks()], [3, 1])
+        self.assertEqual(sorted((job.label, job.ncpus) for job in dataset.joblist),
+                         [("job0.log", 1), ("job1.log", 2), ("job2.log", 10), ("job3.log", 4)])
+
+        # the store only keeps the jobs of the current files
+        for i in range(1, 4):
+            os.remove(os.path.join(self.logdir, "job{}.log".format(i)))
+        self.ingest()
+
+        index = IngestionIndex(self.index_file, "CountingLogReader", self.logdir, {})
+        self.assertEqual(list(index.entries), [os.path.abspath(os.path.join(self.logdir, "job0.log"))])
+        self.assertEqual(os.path.getsize(index.store_filename), index.entries[os.path.abspath(
+            os.path.join(self.logdir, "job0.log"))][2])
+
+    def test_rebuild(self):
+
+        self.ingest()
+        all_files = ["job0.log", "job1.log", "job2.log", "job3.log"]
+
+        self.assertEqual(self.ingest(rebuild=True)[1], all_files)
+
+        # a different configuration, or a new version of the reader
+        self.assertEqual(self.ingest(label_method="directory")[1], all_files)
+        self.assertEqual(self.ingest(label_method="directory")[1], [])
+
+        try:
+            CountingLogReader.reader_version = 2
+            self.assertEqual(self.ingest(label_method="directory")[1], all_files)
+        finally:
+            CountingLogReader.reader_version = 1
+
+        # not an ingestion index
+        with open(self.index_file, "w") as f:
+            f.write("not an index")
+        self.assertRaises(ConfigurationError, IngestionIndex, self.index_file, "CountingLogReader", self.logdir, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
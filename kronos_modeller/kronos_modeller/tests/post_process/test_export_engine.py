@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# (C) Copyright 1996-2018 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from kronos_executor.io_formats.format_data_handlers.kresults_data import KResultsData, KResultsDataSet
+from kronos_executor.io_formats.format_data_handlers.kresults_decorator import KResultsDecorator
+from kronos_executor.io_formats.format_data_handlers.kresults_job import KResultsJob
+from kronos_modeller.post_process.export_engine import ExportEngine
+from kronos_modeller.post_process.exporters import writer_map
+
+
+def dummy_job(workload_name, creation_date, flops):
+    time_series = {"flops": [flops, 0, flops], "bytes_read": [0, 1024, 1024], "n_read": [0, 1, 1],
+                   "bytes_write": [1024, 0, 1024], "n_write": [1, 0, 1], "durations": [1.0, 1.0, 2.0]}
+    stats = {"cpu": {"count": 2 * flops, "elapsed": 3.0},
+             "read": {"count": 2, "elapsed": 2.0, "bytes": 2048},
+             "write": {"count": 2, "elapsed": 3.0, "bytes": 2048}}
+    kresults_json_data = {"created": creation_date, "ranks": [{"stats": stats, "time_series": time_series}]}
+    return KResultsJob(kresults_json_data, decorator_data=KResultsDecorator(workload_name=workload_name,
+                                                                            job_name="job"))
+
+
+class ExportEngineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+        sims = []
+        for i_sim in range(2):
+            jobs = [dummy_job("wl_a", "2017-07-31T01:28:42+00:00", 100 * (i_sim + 1)),
+                    dummy_job("wl_b", "2017-07-31T01:28:44+00:00", 200),
+                    dummy_job("wl_a", "2017-07-31T01:28:45+00:00", 300)]
+            sims.append(KResultsData(jobs=jobs, sim_name="sim_{}".format(i_sim), n_procs_node=2))
+
+        self.sim_set = KResultsDataSet(sims)
+        self.job_classes = {"a": "wl_a", "b": "wl_b"}
+        self.sim_set.calculate_class_stats_sums(self.job_classes)
+
+        signals = {"flops": {}, "kb_read": {}, "write_rates": {}, "jobs": {}}
+        self.exports = [{"type": "time_series", "format": "json", "tag": "ts", "nbins": 8, "signals": signals},
+                        {"type": "time_series", "format": "png", "tag": "ts_plot", "nbins": 8, "signals": signals},
+                        {"type": "normalised_rates", "format": "json", "tag": "nr"}]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_export(self):
+
+        # the global series of each sim and class are calculated once for both time-series exports
+        engine_path = os.path.join(self.tmpdir, "engine")
+        engine = ExportEngine(self.sim_set, n_workers=2)
+        with mock.patch.object(KResultsData, "create_global_time_series",
+                               autospec=True, side_effect=KResultsData.create_global_time_series) as m:
+            engine.export(self.exports, engine_path, self.job_classes)
+            self.assertEqual(m.call_count, 2 * 3)
+
+            # exports one after the other (with the series already calculated)
+            serial_path = os.path.join(self.tmpdir, "serial")
+            for export_config in self.exports:
+                writer_map[export_config["type"]](sim_set=self.sim_set).export(export_config, serial_path,
+                                                                                self.job_classes)
+            self.assertEqual(m.call_count, 2 * 3)
+
+        self.assertEqual(sorted(os.listdir(engine_path)), sorted(os.listdir(serial_path)))
+        self.assertEqual(len(os.listdir(engine_path)), 5)
+        for file_name in os.listdir(engine_path):
+            if file_name.endswith(".json"):
+                with open(os.path.join(serial_path, file_name)) as f_serial, \
+                        open(os.path.join(engine_path, file_name)) as f_engine:
+                    self.assertEqual(json.load(f_engine), json.load(f_serial))
+
+        self.assertEqual([timing["frames"] for timing in engine.timings.values()], [2, 2, 1])
+        self.assertEqual(len(engine.timing_report()), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
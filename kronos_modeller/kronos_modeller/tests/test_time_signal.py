@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# (C) Copyright 1996-2018 ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation nor
+# does it submit to any jurisdiction.
+
+import pickle
+import unittest
+
+import numpy as np
+
+from kronos_modeller.time_signal.time_signal import TimeSignal
+
+
+class TimeSignalTest(unittest.TestCase):
+
+    def test_digitized(self):
+
+        # (the samples do not need to be sorted)
+        ts = TimeSignal("kb_read", xvalues=np.array([3.0, 0.0, 1.0, 2.0, 3.5]),
+                        yvalues=np.array([1.5, 1.0, 0.0, 0.0, 2.0]))
+
+        xvalues, yvalues = ts.digitized(2)
+        self.assertEqual(len(xvalues), 2)
+        self.assertEqual(yvalues.tolist(), [1.0, 3.5])
+
+        # empty bins, and bins with zeros only, are zero
+        xvalues, yvalues = ts.digitized(4)
+        self.assertEqual(yvalues.tolist(), [1.0, 0.0, 0.0, 3.5])
+
+        # the values of a bin are summed in the same way as numpy does
+        values = np.random.RandomState(0).rand(1000) * 1.0e6
+        ts = TimeSignal("kb_read", xvalues=np.arange(1000.0), yvalues=values)
+        xvalues, yvalues = ts.digitized(3)
+        edges = np.linspace(0.0, 999.0 + 1.0e-6, 4)
+        self.assertEqual(yvalues.tolist(), [values[(ts.xvalues >= edges[i]) & (ts.xvalues < edges[i+1])].sum()
+                                            for i in range(3)])
+
+        xvalues, yvalues = ts.digitized(None)
+        self.assertIs(yvalues, values)
+
+    def test_digitize_durations(self):
+
+        # bin width 0.75: sample 1 spans bins 0-3, sample 3 bins 2-3, samples 0 and 2 fit into one bin
+        ts = TimeSignal.from_values("kb_read", [0.0, 0.5, 1.2, 2.0], [10.0, 20.0, 30.0, 40.0],
+                                    durations=[0.2, 2.0, 0.1, 1.0])
+
+        xvalues, yvalues = ts.digitized(4)
+        np.testing.assert_allclose(xvalues, [0.375, 1.125, 1.875, 2.625], rtol=1.0e-6)
+
+        # the samples spanning several bins overwrite the values of these bins
+        # (here, sample 0 is overwritten by sample 1, and sample 1 by sample 3)
+        np.testing.assert_allclose(yvalues, [2.5, 37.5, 10.0, 30.0], rtol=1.0e-5)
+
+        # values are converted to the type of the signal
+        ts = TimeSignal.from_values("n_read", [0.0, 0.5, 1.2, 2.0], [10, 20, 30, 40], durations=[0.2, 2.0, 0.1, 1.0])
+        xvalues, yvalues = ts.digitized(4)
+        self.assertEqual(yvalues.tolist(), [2, 37, 10, 29])
+
+    def test_digitized_cache(self):
+
+        ts = TimeSignal.from_values("kb_read", [0.0, 1.0, 2.0, 3.0], [1.0, 2.0, 3.0, 4.0])
+
+        info = TimeSignal.digitized_cache_info()
+        xvalues, yvalues = ts.digitized(2)
+        self.assertEqual(yvalues.tolist(), [3.0, 7.0])
+
+        # the same results are returned until the values change (and they cannot be modified)
+        self.assertIs(ts.digitized(2)[1], yvalues)
+        self.assertIsNot(ts.digitized(2, trunc_pc=50)[1], yvalues)
+        self.assertRaises(ValueError, yvalues.fill, 0.0)
+
+        new_info = TimeSignal.digitized_cache_info()
+        self.assertEqual(new_info["hits"] - info["hits"], 1)
+        self.assertEqual(new_info["misses"] - info["misses"], 2)
+
+        ts.yvalues *= 2.0
+        self.assertEqual(ts.digitized(2)[1].tolist(), [6.0, 14.0])
+
+        # only the most recent results are kept
+        for nbins in range(1, TimeSignal.digitized_cache_size + 2):
+            ts.digitized(nbins)
+        info = TimeSignal.digitized_cache_info()
+        ts.digitized(1)
+        self.assertEqual(TimeSignal.digitized_cache_info()["misses"] - info["misses"], 1)
+
+        # the cache is not pickled
+        ts_copy = pickle.loads(pickle.dumps(ts))
+        self.assertIsNone(ts_copy._digitized)
+        self.assertEqual(ts_copy.digitized(2)[1].tolist(), [6.0, 14.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,6 +8,9 @@
 # does it submit to any jurisdiction.
 
 import json
+import os
+import shutil
+import tempfile
 import unittest
 from io import StringIO
 
@@ -150,6 +153,62 @@ class WorkloadTests(unittest.TestCase):
             else:
                 self.assertIsNone(signal)
 
+    def test_jobs_to_matrix(self):
+
+        n_bins = 3
+        rng = np.random.RandomState(0)
+        jobs = []
+        for jj in range(7):
+            # (some jobs miss some time signals)
+            timesignals = {tsk: TimeSignal.from_values(tsk, np.cumsum(rng.rand(10)), rng.rand(10))
+                           if (jj + tt) % 3 else None for tt, tsk in enumerate(time_signal_names)}
+            jobs.append(ModelJob(time_start=0.0, duration=10.0, ncpus=1, nnodes=1, timesignals=timesignals))
+
+        workload = Workload(jobs=jobs, tag="test_wl")
+        expected = np.vstack([job.ts_to_vector(n_bins) for job in jobs])
+
+        ts_matrix = workload.jobs_to_matrix(n_bins)
+        self.assertEqual(ts_matrix.dtype, np.float64)
+        self.assertTrue(np.array_equal(ts_matrix, expected))
+
+        # in chunks, in parallel
+        ts_matrix = workload.jobs_to_matrix(n_bins, dtype=np.float32, n_workers=2, chunk_size=3)
+        self.assertEqual(ts_matrix.dtype, np.float32)
+        self.assertTrue(np.array_equal(ts_matrix, expected.astype(np.float32)))
+
+        # memory-mapped
+        tmpdir = tempfile.mkdtemp()
+        try:
+            options = workload.matrix_options({"matrix_dir": tmpdir, "matrix_dtype": "float32"})
+            self.assertEqual(options["filename"], os.path.join(tmpdir, "test_wl.ts_matrix.npy"))
+
+            ts_matrix = workload.jobs_to_matrix(n_bins, **options)
+            self.assertIsInstance(ts_matrix, np.memmap)
+            ts_matrix.flush()
+            self.assertTrue(np.array_equal(np.load(options["filename"]), expected.astype(np.float32)))
+            del ts_matrix
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_matrix_to_jobs(self):
+
+        n_bins = 2
+        jobs = [ModelJob(time_start=0.0, duration=10.0, ncpus=1, nnodes=1,
+                         timesignals={tsk: None for tsk in time_signal_names}) for _ in range(3)]
+        workload = Workload(jobs=jobs, tag="test_wl")
+
+        # only the bins of the second time signal are given
+        idx_map = [2, 3]
+        filled_matrix = np.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]])
+        workload.matrix_to_jobs(filled_matrix, 5, idx_map, n_bins)
+
+        for job, row in zip(jobs, filled_matrix):
+            ts = job.timesignals[time_signal_names[1]]
+            self.assertEqual(ts.yvalues.tolist(), row.tolist())
+            self.assertEqual(ts.xvalues.tolist(), [0.0, 10.0])
+            self.assertEqual(ts.priority, 5)
+            self.assertEqual(job.timesignals[time_signal_names[0]].yvalues.tolist(), [0.0, 0.0])
+
 
 if __name__ == "__main__":
     unittest.main()
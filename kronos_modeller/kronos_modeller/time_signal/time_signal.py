@@ -6,7 +6,7 @@
 # granted to it by virtue of its status as an intergovernmental organisation nor
 # does it submit to any jurisdiction.
 
-import math
+from collections import OrderedDict
 
 import numpy as np
 from kronos_executor.definitions import signal_types
@@ -16,8 +16,18 @@ from kronos_modeller.tools.shared_utils import trunc_at_percent
 
 class TimeSignal(object):
 
+    # max number of digitised versions (i.e. (nbins, trunc_pc) pairs) of a signal kept in its cache
+    digitized_cache_size = 4
+
+    # cache hits and misses (for all the signals)
+    _digitized_cache_hits = 0
+    _digitized_cache_misses = 0
+
     def __init__(self, name, **kwargs):
 
+        # digitised values, by (nbins, trunc_pc) (reset when the values change)
+        self._digitized = None
+
         self.name = name
         self.base_signal_name = kwargs.get('base_signal_name', self.name)
         if self.base_signal_name is None:
@@ -54,6 +64,54 @@ class TimeSignal(object):
     def __str__(self):
         return "TimeSignal({})".format(self.name if self.name else "???")
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_digitized"] = None
+        return state
+
+    def __setstate__(self, state):
+        # (signals pickled before the values were properties)
+        for k in ("durations", "xvalues", "yvalues"):
+            if k in state:
+                state["_" + k] = state.pop(k)
+        state.setdefault("_digitized", None)
+        self.__dict__.update(state)
+
+    @property
+    def durations(self):
+        return self._durations
+
+    @durations.setter
+    def durations(self, values):
+        self._durations = values
+        self._digitized = None
+
+    @property
+    def xvalues(self):
+        return self._xvalues
+
+    @xvalues.setter
+    def xvalues(self, values):
+        self._xvalues = values
+        self._digitized = None
+
+    @property
+    def yvalues(self):
+        return self._yvalues
+
+    @yvalues.setter
+    def yvalues(self, values):
+        self._yvalues = values
+        self._digitized = None
+
+    @classmethod
+    def digitized_cache_info(cls):
+        """
+        Hits and misses of the cache of the digitised signals
+        :return: dict
+        """
+        return {"hits": TimeSignal._digitized_cache_hits, "misses": TimeSignal._digitized_cache_misses}
+
     def __bytes__(self):
         return str(self).encode('utf-8')
 
@@ -122,7 +180,8 @@ class TimeSignal(object):
 
     def digitized(self, nbins=None, trunc_pc=None):
         """
-        On-the-fly return digitized time series (rather than using
+        On-the-fly return digitized time series (the most recent results are cached, as read-only
+        arrays, until the values of the signal change)
         :param nbins: N of digitised bins
         :param trunc_pc: requested truncation of the signal (expressed in percent)
         :return:
@@ -130,6 +189,36 @@ class TimeSignal(object):
         if nbins is None:
             return self.xvalues, self.yvalues
 
+        cache_key = (nbins, trunc_pc)
+        if self._digitized is None:
+            self._digitized = OrderedDict()
+
+        digitized = self._digitized.get(cache_key)
+        if digitized is not None:
+            TimeSignal._digitized_cache_hits += 1
+            self._digitized.move_to_end(cache_key)
+            return digitized
+
+        TimeSignal._digitized_cache_misses += 1
+        digitized = self._digitize(nbins, trunc_pc)
+        for values in digitized:
+            if isinstance(values, np.ndarray):
+                values.flags.writeable = False
+
+        self._digitized[cache_key] = digitized
+        if len(self._digitized) > self.digitized_cache_size:
+            self._digitized.popitem(last=False)
+
+        return digitized
+
+    def _digitize(self, nbins, trunc_pc=None):
+        """
+        Digitized time series (not cached)
+        :param nbins: N of digitised bins
+        :param trunc_pc: requested truncation of the signal (expressed in percent)
+        :return:
+        """
+
         # Digitization key
         key = self.digitization_key
 
@@ -137,7 +226,7 @@ class TimeSignal(object):
             return self.digitize_durations(nbins, key)
 
         # Determine the bin boundaries
-        xedge_bins = np.linspace(min(self.xvalues), max(self.xvalues) + 1.0e-6, nbins + 1)
+        xedge_bins = np.linspace(np.min(self.xvalues), np.max(self.xvalues) + 1.0e-6, nbins + 1)
 
         # Return xvalues as the midpoints of the bins
         bins_delta = xedge_bins[1] - xedge_bins[0]
@@ -147,17 +236,31 @@ class TimeSignal(object):
         # n.b. Returned indices will be >= 1, as 0 means to the left of the left-most edge.
         bin_indices = np.digitize(self.xvalues, xedge_bins)
 
+        # values grouped by bin (in their original order within each bin): the values of a bin are
+        # then a contiguous slice, reduced exactly as the values selected by a mask of the bin
+        in_range = (bin_indices >= 1) & (bin_indices <= nbins)
+        bin_indices = bin_indices[in_range] - 1
+        bin_values = np.asarray(self.yvalues)[in_range]
+        if np.any(bin_indices[1:] < bin_indices[:-1]):
+            order = np.argsort(bin_indices, kind="stable")
+            bin_indices, bin_values = bin_indices[order], bin_values[order]
+
+        counts = np.bincount(bin_indices, minlength=nbins)
+        offsets = np.cumsum(counts) - counts
+
+        # only the bins with some non-zero values are filled
+        n_nonzero = np.bincount(bin_indices, weights=(bin_values != 0), minlength=nbins)
+        if key not in ('mean', 'sum') and np.any(n_nonzero):
+            raise ValueError("Digitization key value not recognised: {}".format(key))
+
         yvalues = np.zeros(nbins)
-        for i in range(nbins):
-            if any(self.yvalues[bin_indices == i+1]):
-                if key == 'mean':
-                    val = self.yvalues[bin_indices == i+1].mean()
-                elif key == 'sum':
-                    val = self.yvalues[bin_indices == i+1].sum()
-                else:
-                    raise ValueError("Digitization key value not recognised: {}".format(key))
 
-                yvalues[i] = val
+        single = np.flatnonzero((counts == 1) & (n_nonzero > 0))
+        yvalues[single] = bin_values[offsets[single]]
+
+        for i in np.flatnonzero((counts > 1) & (n_nonzero > 0)):
+            bin_slice = bin_values[offsets[i]:offsets[i] + counts[i]]
+            yvalues[i] = bin_slice.mean() if key == 'mean' else bin_slice.sum()
 
         # if trunc_pc is specified, use it
         if not trunc_pc:
@@ -176,28 +279,49 @@ class TimeSignal(object):
             key = self.digitization_key
 
         # Find out what the maximum time is
-        xedge_bins = np.linspace(0.0, max(self.xvalues + self.durations) + 1.0e-6, nbins + 1)
+        xedge_bins = np.linspace(0.0, np.max(self.xvalues + self.durations) + 1.0e-6, nbins + 1)
         dx_bins = xedge_bins[1] - xedge_bins[0]
         xvalues_bins = 0.5 * (xedge_bins[1:] + xedge_bins[:-1])
         yvalues_bins = np.zeros(len(xvalues_bins))
 
-        # Now we need to loop through to attribute the data to bins (as considering the durations, it may not be
-        # one-to-one
+        # Attribute the data to the bins (as considering the durations, it may not be one-to-one)
         start_bins = np.digitize(self.xvalues, xedge_bins) - 1
         end_bins = np.digitize(self.xvalues + self.durations, xedge_bins) - 1
-        for start, stop, x, y, dur in zip(start_bins, end_bins, self.xvalues, self.yvalues, self.durations):
-
-            # An index of -1 would imply the data is to the left of the first bin. This would be unacceptable.
-            assert start >= 0
-            assert stop >= 0
-
-            # If everything fits into one bin, then it should all be placed there.
-            if start == stop:
-                yvalues_bins[start] += y
-            else:
-                yvalues_bins[start] = y * (dx_bins - math.fmod(x, dx_bins)) / dur
-                yvalues_bins[start+1:stop--1] = y * dx_bins / dur
-                yvalues_bins[stop] = y * math.fmod(x + dur, dx_bins) / dur
+
+        # An index of -1 would imply the data is to the left of the first bin. This would be unacceptable.
+        assert np.all(start_bins >= 0)
+        assert np.all(end_bins >= 0)
+
+        # The samples spanning several bins set the values of these bins (pro-rata of their overlap with
+        # each bin), overwriting the previous ones, and the samples that fit into one bin are added to it.
+        x, y, dur = self.xvalues, self.yvalues, self.durations
+        multi = np.flatnonzero(start_bins != end_bins)
+        single = np.flatnonzero(start_bins == end_bins)
+
+        # one cell per (multi-bin sample, bin): first bin, intermediate bins, last bin
+        m_start, m_end = start_bins[multi], end_bins[multi]
+        n_cells = np.maximum(m_end - m_start - 1, 0) + 2
+        cell_sample = np.repeat(np.arange(len(multi)), n_cells)
+        cell_pos = np.arange(cell_sample.size) - np.repeat(np.cumsum(n_cells) - n_cells, n_cells)
+        is_last = cell_pos == n_cells[cell_sample] - 1
+        cell_bins = np.where(is_last, m_end[cell_sample], m_start[cell_sample] + cell_pos)
+
+        my, mx, mdur = y[multi], x[multi], dur[multi]
+        cell_values = (my * dx_bins / mdur)[cell_sample]
+        cell_values[cell_pos == 0] = my * (dx_bins - np.fmod(mx, dx_bins)) / mdur
+        cell_values[is_last] = my * np.fmod(mx + mdur, dx_bins) / mdur
+
+        # the last cell written in each bin (the cells are ordered as they are written)
+        last_cell = np.full(nbins, -1)
+        np.maximum.at(last_cell, cell_bins, np.arange(cell_bins.size))
+        written = last_cell >= 0
+        yvalues_bins[written] = cell_values[last_cell[written]]
+
+        # the single-bin samples only add up to the bins not overwritten after them
+        last_writer = np.full(nbins, -1)
+        last_writer[written] = multi[cell_sample[last_cell[written]]]
+        single = single[single > last_writer[start_bins[single]]]
+        np.add.at(yvalues_bins, start_bins[single], y[single])
 
         yvalues_bins = np.asarray(yvalues_bins)
         yvalues_bins = yvalues_bins.astype(self.ts_type)
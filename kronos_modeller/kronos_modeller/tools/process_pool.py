@@ -101,6 +101,21 @@ class ProcessingPool(Pool):
                 initializer=_internal_initialiser,
                 initargs=(global_data, processing_fn))
 
+    # With one process, the Pool machinery is never initialised: it must not be entered or cleaned up either
+
+    def __enter__(self):
+        if self.processes == 1:
+            return self
+        return super(ProcessingPool, self).__enter__()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.processes != 1:
+            super(ProcessingPool, self).__exit__(exc_type, exc_val, exc_tb)
+
+    def __del__(self):
+        if self.processes != 1 and hasattr(Pool, "__del__"):
+            super(ProcessingPool, self).__del__()
+
     def imap_trivial(self, iterable):
         """
         If we are only using one process, we can use a trivial imap. This is only in a separate function
@@ -5,17 +5,33 @@
 # In applying this licence, ECMWF does not waive the privileges and immunities 
 # granted to it by virtue of its status as an intergovernmental organisation nor
 # does it submit to any jurisdiction.
+import functools
 import logging
+import multiprocessing
+import os
+
 import numpy as np
 from .jobs import ModelJob
 
 from kronos_executor.definitions import signal_types, time_signal_names
+from kronos_modeller.kronos_exceptions import ConfigurationError
 from kronos_modeller.kronos_tools.utils import running_sum
 from kronos_modeller.time_signal.time_signal import TimeSignal
 
 logger = logging.getLogger(__name__)
 
 
+def jobs_to_rows(jobs, n_bins, dtype):
+    """
+    Rows of the time signal matrix of some jobs (in a worker process)
+    :param jobs:
+    :param n_bins:
+    :param dtype:
+    :return:
+    """
+    return np.asarray([job.ts_to_vector(n_bins) for job in jobs], dtype=dtype)
+
+
 class Workload(object):
     """
     Workload data contains "jobs", each composed of standardized "model jobs"
@@ -125,28 +141,82 @@ class Workload(object):
     def max_time_start(self):
         return max(j.time_start for j in self.jobs)
 
-    def jobs_to_matrix(self, n_bins):
+    def matrix_options(self, config):
         """
-        from jobs to ts_matrix
+        Options of the time signal matrix of this workload, from the config of an operation
+        (matrix_dtype, matrix_dir and matrix_workers, all optional)
+        :param config:
+        :return: keyword arguments of jobs_to_matrix
+        """
+
+        options = {
+            "dtype": np.dtype(config.get("matrix_dtype", "float64")),
+            "n_workers": config.get("matrix_workers", 1)
+        }
+
+        if config.get("matrix_dir"):
+            options["filename"] = os.path.join(config["matrix_dir"], "{}.ts_matrix.npy".format(self.tag))
+
+        return options
+
+    def jobs_to_matrix(self, n_bins, dtype=np.float64, filename=None, n_workers=1, chunk_size=1000):
+        """
+        from jobs to ts_matrix (one row per job, one column per time signal bin)
+        :param n_bins: N of bins of each time signal
+        :param dtype: data type of the matrix (e.g. float32 to halve its size)
+        :param filename: (optional) .npy file where the matrix is memory-mapped (instead of in memory)
+        :param n_workers: N of processes building the rows of the matrix (in chunks of jobs)
+        :param chunk_size: N of jobs per chunk
         :return:
         """
 
-        ts_matrix = np.zeros((0, len(time_signal_names) * n_bins))
+        shape = (len(self.jobs), len(time_signal_names) * n_bins)
+        if filename:
+            ts_matrix = np.lib.format.open_memmap(filename, mode="w+", dtype=dtype, shape=shape)
+        else:
+            ts_matrix = np.empty(shape, dtype=dtype)
 
-        # stack all the ts vectors
-        for job in self.jobs:
-            ts_matrix = np.vstack((ts_matrix, job.ts_to_vector(n_bins)))
+        chunk_starts = range(0, len(self.jobs), chunk_size)
+        chunks = (self.jobs[i_start:i_start + chunk_size] for i_start in chunk_starts)
+
+        if n_workers > 1 and len(chunk_starts) > 1:
+            with multiprocessing.Pool(n_workers) as pool:
+                chunk_rows = pool.imap(functools.partial(jobs_to_rows, n_bins=n_bins, dtype=dtype), chunks)
+                for i_start, rows in zip(chunk_starts, chunk_rows):
+                    ts_matrix[i_start:i_start + len(rows)] = rows
+        else:
+            for row, job in enumerate(self.jobs):
+                ts_matrix[row] = job.ts_to_vector(n_bins)
 
         return ts_matrix
 
     def matrix_to_jobs(self, filled_matrix, priority, idx_map, n_bins):
         """
-        from jobs to ts_matrix
+        from ts_matrix to jobs
+        :param filled_matrix: one row per job, with the columns listed in idx_map
+        :param priority: priority of the new time signals
+        :param idx_map: columns of the full matrix (N of signals x n_bins) held in the filled matrix
+        :param n_bins: N of bins of each time signal
         :return:
         """
 
-        for rr, row in enumerate(filled_matrix):
-            self.jobs[rr].vector_to_ts(row, priority, idx_map=idx_map, n_bins=n_bins)
+        # check that when the vector does not contain all the values, also the n_bins for each ts is provided
+        if idx_map and not n_bins:
+            raise ConfigurationError("the RS results are mapped to N_columns < N_columns_tot => n_bins is needed!")
+
+        if not idx_map and n_bins:
+            raise ConfigurationError("n_bins need to be specified only for mapped cases")
+
+        # map the columns of all the jobs at once
+        filled_matrix = np.asarray(filled_matrix)
+        if idx_map:
+            full_matrix = np.zeros((len(filled_matrix), len(time_signal_names) * n_bins))
+            full_matrix[:, np.asarray(idx_map)[:filled_matrix.shape[1]]] = filled_matrix
+        else:
+            full_matrix = filled_matrix
+
+        for job, row in zip(self.jobs, full_matrix):
+            job.vector_to_ts(row, priority)
 
     def check_jobs(self):
         """
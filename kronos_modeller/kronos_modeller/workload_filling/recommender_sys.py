@@ -44,7 +44,7 @@ class StrategyRecommender(FillingStrategy):
         priority = rs_config['priority']
 
         # get the total matrix fro the jobs
-        ts_matrix = wl_dest.jobs_to_matrix(n_bins)
+        ts_matrix = wl_dest.jobs_to_matrix(n_bins, **wl_dest.matrix_options(rs_config))
 
         if ts_matrix.shape[1] % n_bins:
             err_tmpl = "matrix col number={} not consistent with n_bins={}in the RS"
@@ -61,7 +61,7 @@ class KmeansClusters(ClusteringStrategy):
             logger.info("----> applying clustering to workload {}".format(wl_entry))
 
             # Apply clustering
-            job_signal_matrix = wl.jobs_to_matrix(config['num_timesignal_bins'])
+            job_signal_matrix = wl.jobs_to_matrix(config['num_timesignal_bins'], **wl.matrix_options(config))
             (clusters_matrix, clusters_labels) = self.apply_clustering(job_signal_matrix, config)
 
             # calculate the mean radius of gyration (among all clusters) for each sub-workload